@@ -0,0 +1 @@
+# Benchmarks for the churn service (run as `python -m benchmarks.<name>`).
@@ -0,0 +1,45 @@
+# Request-path overhead of live drift recording (src/live_drift.py), per row.
+# CLI: python -m benchmarks.bench_live_drift [--ref data/churn_ref_sample.csv] [--repeats 2000]
+
+import argparse, json, time
+import numpy as np
+import pandas as pd
+
+from src.drift import ReferenceProfile
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+from src.live_drift import LiveDriftMonitor
+
+
+def time_call(fn, repeats: int) -> float:
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ref", default="data/churn_ref_sample.csv")
+    ap.add_argument("--new", default="data/churn_shifted_sample.csv")
+    ap.add_argument("--repeats", type=int, default=2000)
+    args = ap.parse_args()
+
+    mon = LiveDriftMonitor(ReferenceProfile.from_frame(pd.read_csv(args.ref)))
+    new = pd.read_csv(args.new)
+    results = {}
+    for n in (1, 10, 100, 800):
+        rows = new.head(n).to_dict("records")
+        cols = {c: new[c].to_numpy()[:n] for c in CATEGORICAL_COLS + NUMERIC_COLS}
+        prob = np.random.default_rng(0).random(n)
+        reps = max(args.repeats // n, 20)
+        results[n] = {
+            "record_rows_us_per_row": 1e6 * time_call(lambda: mon.record_rows(rows, prob), reps) / n,
+            "record_columns_us_per_row": 1e6 * time_call(lambda: mon.record_columns(cols, prob), reps) / n,
+        }
+    results["report_ms"] = 1e3 * time_call(mon.report, 200)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Evaluation cost: the sort-once engine (src/metrics.py) against separate
+# sklearn calls, for point metrics, bootstrap intervals and segments.
+# CLI: python -m benchmarks.bench_metrics [--rows 1000000] [--n-boot 200]
+
+import argparse, json, time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, average_precision_score, roc_auc_score
+
+from src.metrics import SortedScores, bootstrap_ci, evaluate, segment_metrics
+
+
+def sklearn_point(y, p):
+    return roc_auc_score(y, p), average_precision_score(y, p), accuracy_score(y, p >= 0.5)
+
+
+def timed(fn, *args, **kw):
+    t0 = time.perf_counter()
+    fn(*args, **kw)
+    return round(time.perf_counter() - t0, 3)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--n-boot", type=int, default=200)
+    ap.add_argument("--sklearn-boot", type=int, default=5, help="sklearn replicates timed (then extrapolated)")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.rows
+    y = (rng.random(n) < 0.25).astype(int)
+    # float32 scores, as XGBoost returns them: realistic tie structure.
+    p = np.clip(rng.random(n) * 0.7 + 0.25 * y, 0, 1).astype(np.float32)
+    seg = pd.DataFrame({"plan_type": rng.choice(["Basic", "Standard", "Pro"], n),
+                        "contract_type": rng.choice(["Monthly", "Annual"], n)})
+
+    def sklearn_boot(reps):
+        r = np.random.default_rng(0)
+        for _ in range(reps):
+            i = r.integers(0, n, n)
+            sklearn_point(y[i], p[i])
+
+    def sklearn_segments():
+        for col in seg:
+            for v in seg[col].unique():
+                mask = (seg[col] == v).to_numpy()
+                sklearn_point(y[mask], p[mask])
+
+    s = SortedScores(y, p)
+    per_rep = timed(sklearn_boot, args.sklearn_boot) / args.sklearn_boot
+    out = {
+        "rows": n,
+        "point_s": {"sklearn": timed(sklearn_point, y, p), "engine": timed(evaluate, y, p, n_boot=0)},
+        "bootstrap_s": {"sklearn_extrapolated": round(per_rep * args.n_boot, 1),
+                        "engine": timed(bootstrap_ci, s, n_boot=args.n_boot)},
+        "segments_s": {"sklearn": timed(sklearn_segments), "engine": timed(segment_metrics, s, seg)},
+        "full_evaluate_s": timed(evaluate, y, p, segments=seg, n_boot=args.n_boot),
+    }
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
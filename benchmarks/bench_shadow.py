@@ -0,0 +1,78 @@
+# Cost of shadow scoring on the primary path: the same open-loop load against
+# a uvicorn server without a challenger, with one, and with a queue too small
+# to keep up (work is dropped, requests must not slow down).
+# CLI: python -m benchmarks.bench_shadow [--challenger artifacts/versions/<v>] [--rate 60] [--duration 15]
+
+import argparse, asyncio, json, os, sys, tempfile
+from typing import Any, Dict
+
+import httpx
+
+from .common import default_path, save_results
+from .loadtest import Recorder, build_requests, closed_loop, open_loop, parse_mix, start_uvicorn
+
+
+async def _drive(url: str, args, reqs):
+    limits = httpx.Limits(max_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await closed_loop(client, reqs, 1, args.warmup, Recorder())
+        rec = Recorder()
+        elapsed = await open_loop(client, reqs, args.rate, args.duration, rec, False, args.seed, args.max_inflight)
+        shadow = (await client.get("/stats")).json().get("shadow")
+    m = rec.metrics(elapsed)
+    return {k: m[k] for k in ("requests", "errors", "latency_p50_ms", "latency_p95_ms", "latency_p99_ms")}, shadow
+
+
+def run_scenario(env: Dict[str, str], args, reqs) -> Dict[str, Any]:
+    proc, url = start_uvicorn(env, 1)
+    try:
+        metrics, shadow = asyncio.run(_drive(url, args, reqs))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    if shadow:
+        metrics.update({f"shadow_{k}": shadow[k] for k in ("submitted", "dropped", "drop_rate", "scored", "mean_lag_ms")})
+    return metrics
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--challenger", default=os.environ.get("ARTIFACTS_DIR", "artifacts"),
+                    help="Challenger artifacts dir (default: the primary's, i.e. the shared-matrix path)")
+    ap.add_argument("--data", default="data/customer_churn_synth.csv")
+    ap.add_argument("--rate", type=float, default=60.0, help="Requests per second; keep below capacity so latency is not queueing")
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--warmup", type=float, default=2.0)
+    ap.add_argument("--batch-sizes", default="1:0.7,10:0.2,100:0.1")
+    ap.add_argument("--small-queue", type=int, default=2, help="SHADOW_QUEUE of the saturated scenario")
+    ap.add_argument("--max-inflight", type=int, default=256)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="Results JSON (default benchmarks/results/shadow-<commit>.json)")
+    args = ap.parse_args()
+
+    reqs = build_requests(args.data, 2000, args.seed, parse_mix(args.batch_sizes), {"predict": 1.0})
+    log_dir = tempfile.mkdtemp(prefix="shadow-bench-")
+    shadow_env = {"SHADOW_ARTIFACTS_DIR": args.challenger, "SHADOW_LOG_PATH": os.path.join(log_dir, "scores.jsonl")}
+    scenarios = {
+        "baseline": {},
+        "shadow": shadow_env,
+        "shadow_small_queue": {**shadow_env, "SHADOW_QUEUE": str(args.small_queue)},
+    }
+    metrics: Dict[str, Any] = {}
+    for name, env in scenarios.items():
+        for k, v in run_scenario(env, args, reqs).items():
+            metrics[f"{name}.{k}"] = v
+        print(f"{name}: done", file=sys.stderr)
+    for name in ("shadow", "shadow_small_queue"):
+        for q in ("p50", "p99"):
+            metrics[f"{name}.added_{q}_ms"] = round(metrics[f"{name}.latency_{q}_ms"]
+                                                    - metrics[f"baseline.latency_{q}_ms"], 3)
+
+    path = args.out or default_path("shadow")
+    save_results(path, "shadow", {k: v for k, v in vars(args).items() if k != "out"}, metrics)
+    print(json.dumps(metrics, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Cold-start benchmark: pickles vs compact inference bundle (optionally with NumPy trees).
+# CLI: python -m benchmarks.bench_startup --artifacts artifacts --repeats 5
+
+import argparse, json, os, statistics, subprocess, sys
+
+# Runs in a fresh interpreter: import the app (loads artifacts) and score one row.
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from src import app as m
+t1 = time.perf_counter()
+row = {"plan_type": "Basic", "contract_type": "Monthly", "autopay": "No", "is_promo_user": "No",
+       "add_on_count": 0, "tenure_months": 3, "monthly_usage_gb": 90.0, "avg_latency_ms": 150.0,
+       "support_tickets_30d": 1, "discount_pct": 5.0, "payment_failures_90d": 0, "downtime_hours_30d": 1.0}
+h = m._active
+h.score(h.transform_rows([row]))
+t2 = time.perf_counter()
+print(json.dumps({"import_and_load_s": t1 - t0, "first_prediction_s": t2 - t0,
+                  "sklearn_imported": "sklearn" in sys.modules, "pandas_imported": "pandas" in sys.modules}))
+"""
+
+
+def run_probe(artifacts: str, use_bundle: bool, native_trees: bool = False) -> dict:
+    env = dict(os.environ, ARTIFACTS_DIR=artifacts, USE_BUNDLE="1" if use_bundle else "0",
+               TREE_EVAL="native" if native_trees else "library",
+               MODEL_WATCH_SECS="0", BATCH_WINDOW_MS="0")
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=env, check=True,
+                         capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--artifacts", default=os.environ.get("ARTIFACTS_DIR", "artifacts"))
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--out", default=None, help="Optional JSON results path")
+    args = ap.parse_args()
+
+    results = {}
+    configs = [("pickles", False, False), ("bundle", True, False), ("bundle_native_trees", True, True)]
+    for label, use_bundle, native in configs:
+        runs = [run_probe(args.artifacts, use_bundle, native) for _ in range(args.repeats)]
+        results[label] = {
+            "import_and_load_s_median": statistics.median(r["import_and_load_s"] for r in runs),
+            "first_prediction_s_median": statistics.median(r["first_prediction_s"] for r in runs),
+            "sklearn_imported": runs[-1]["sklearn_imported"],
+            "pandas_imported": runs[-1]["pandas_imported"],
+        }
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
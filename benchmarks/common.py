@@ -0,0 +1,59 @@
+# Shared helpers for the benchmark harness: run metadata, percentiles and the
+# results file format read by benchmarks.compare.
+#
+# Results file: {"kind", "meta": {commit, time, host...}, "config": {...},
+#                "metrics": {"name": number, ...}}
+# Metric names ending in "_per_s" are higher-is-better; all others are
+# lower-is-better (latencies, seconds, MB).
+
+import json, os, platform, subprocess, sys, time
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except Exception:
+        return None
+
+
+def run_meta() -> Dict[str, Any]:
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "argv": sys.argv[1:],
+    }
+
+
+def latency_stats(seconds: Iterable[float], prefix: str) -> Dict[str, float]:
+    x = np.asarray(list(seconds), dtype=np.float64) * 1e3
+    if not len(x):
+        return {}
+    p50, p95, p99 = np.percentile(x, [50, 95, 99])
+    return {f"{prefix}p50_ms": round(float(p50), 3), f"{prefix}p95_ms": round(float(p95), 3),
+            f"{prefix}p99_ms": round(float(p99), 3), f"{prefix}max_ms": round(float(x.max()), 3)}
+
+
+def higher_is_better(name: str) -> bool:
+    return name.endswith("_per_s")
+
+
+def save_results(path: str, kind: str, config: Dict[str, Any], metrics: Dict[str, float]) -> Dict[str, Any]:
+    out = {"kind": kind, "meta": run_meta(), "config": config, "metrics": metrics}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    return out
+
+
+def default_path(kind: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{kind}-{git_commit() or 'nocommit'}.json")
@@ -0,0 +1,65 @@
+# Compare two results files from benchmarks.loadtest / benchmarks.micro
+# (e.g. the same run on two commits) metric by metric.
+# CLI: python -m benchmarks.compare base.json new.json [--threshold 10] [--fail-on-regression]
+#
+# Metrics ending in "_per_s" are better when higher, all others when lower.
+# A change beyond --threshold percent in the bad direction is a regression;
+# counters (requests, errors) are shown but never judged.
+
+import argparse, json, sys
+from typing import Any, Dict, List
+
+from .common import higher_is_better
+
+UNJUDGED_SUFFIXES = ("requests", "errors", "duration_s")
+
+
+def compare(base: Dict[str, float], new: Dict[str, float], threshold_pct: float) -> List[Dict[str, Any]]:
+    rows = []
+    for name in sorted(set(base) | set(new)):
+        a, b = base.get(name), new.get(name)
+        row = {"metric": name, "base": a, "new": b, "change_pct": None, "verdict": ""}
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a:
+            change = 100.0 * (b - a) / abs(a)
+            row["change_pct"] = round(change, 2)
+            if not name.endswith(UNJUDGED_SUFFIXES):
+                worse = -change if higher_is_better(name) else change
+                row["verdict"] = "regression" if worse > threshold_pct else \
+                    "improvement" if worse < -threshold_pct else ""
+        rows.append(row)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=10.0, help="Percent change treated as noise")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    ap.add_argument("--json", action="store_true", help="Print rows as JSON instead of a table")
+    args = ap.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if base.get("kind") != new.get("kind"):
+        print(f"warning: comparing {base.get('kind')} with {new.get('kind')}", file=sys.stderr)
+    if base.get("config") != new.get("config"):
+        print("warning: runs used different configs", file=sys.stderr)
+
+    rows = compare(base["metrics"], new["metrics"], args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"base {base['meta'].get('commit')}  new {new['meta'].get('commit')}")
+        width = max(len(r["metric"]) for r in rows) if rows else 10
+        for r in rows:
+            change = "" if r["change_pct"] is None else f"{r['change_pct']:+.1f}%"
+            print(f"{r['metric']:<{width}}  {r['base']!s:>12}  {r['new']!s:>12}  {change:>8}  {r['verdict']}")
+    if args.fail_on_regression and any(r["verdict"] == "regression" for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
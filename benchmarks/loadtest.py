@@ -0,0 +1,236 @@
+# Load test for the churn API: seeded request mixes built from the training
+# CSV, replayed in-process (ASGI, no network), against a uvicorn server this
+# script starts, or against any running URL.
+# CLI: python -m benchmarks.loadtest --target inprocess --mode closed --concurrency 8 --duration 20
+#      python -m benchmarks.loadtest --target uvicorn --mode open --rate 200 \
+#             --batch-sizes 1:0.7,10:0.2,100:0.1 --endpoints predict:0.8,columnar:0.15,stream:0.05
+#      python -m benchmarks.loadtest --target http://127.0.0.1:8000 ...
+#
+# Open loop sends at a fixed (or Poisson) rate and measures latency from each
+# request's scheduled time, so a slow server cannot hide queueing delay;
+# closed loop runs `--concurrency` clients back to back.
+
+import argparse, asyncio, json, os, random, socket, subprocess, sys, time
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+from src.metrics import peak_rss_mb
+from .common import default_path, latency_stats, save_results
+
+ROUTES = {"predict": "/predict", "columnar": "/predict/columnar", "stream": "/predict/stream"}
+
+Request = Tuple[str, bytes, str, int]  # (endpoint, body, content type, rows)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    # "1:0.7,10:0.2" -> {"1": 0.7, "10": 0.2}
+    out = {}
+    for part in spec.split(","):
+        k, _, w = part.partition(":")
+        out[k.strip()] = float(w or 1)
+    return out
+
+
+def build_requests(data: str, n: int, seed: int, batch_sizes: Dict[str, float],
+                   endpoints: Dict[str, float]) -> List[Request]:
+    """
+    `n` request bodies: endpoint and batch size drawn from the given weights,
+    rows sampled from `data`. Same seed, same requests.
+    """
+    df = pd.read_csv(data, usecols=CATEGORICAL_COLS + NUMERIC_COLS)
+    rows = df.to_dict("records")
+    rng = random.Random(seed)
+    sizes, size_w = [int(k) for k in batch_sizes], list(batch_sizes.values())
+    names, name_w = list(endpoints), list(endpoints.values())
+    out: List[Request] = []
+    for _ in range(n):
+        ep = rng.choices(names, name_w)[0]
+        batch = [rows[rng.randrange(len(rows))] for _ in range(rng.choices(sizes, size_w)[0])]
+        if ep == "predict":
+            out.append((ep, json.dumps({"rows": batch}).encode(), "application/json", len(batch)))
+        elif ep == "columnar":
+            cols = {c: [r[c] for r in batch] for c in CATEGORICAL_COLS + NUMERIC_COLS}
+            out.append((ep, json.dumps({"columns": cols}).encode(), "application/json", len(batch)))
+        else:
+            body = "".join(json.dumps(r) + "\n" for r in batch).encode()
+            out.append((ep, body, "application/x-ndjson", len(batch)))
+    return out
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: List[Tuple[str, float, int, bool]] = []  # (endpoint, seconds, rows, ok)
+
+    def add(self, ep: str, seconds: float, rows: int, ok: bool) -> None:
+        self.samples.append((ep, seconds, rows, ok))
+
+    def metrics(self, elapsed: float) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for ep in [None] + sorted({s[0] for s in self.samples}):
+            sel = [s for s in self.samples if ep is None or s[0] == ep]
+            prefix = "" if ep is None else f"{ep}."
+            ok = [s for s in sel if s[3]]
+            out[f"{prefix}requests"] = len(sel)
+            out[f"{prefix}errors"] = len(sel) - len(ok)
+            out[f"{prefix}requests_per_s"] = round(len(ok) / elapsed, 2)
+            out[f"{prefix}rows_per_s"] = round(sum(s[2] for s in ok) / elapsed, 2)
+            out.update(latency_stats((s[1] for s in ok), f"{prefix}latency_"))
+        return out
+
+
+async def send(client, req: Request, rec: Recorder, t_sched: float) -> None:
+    ep, body, ctype, n = req
+    try:
+        r = await client.post(ROUTES[ep], content=body, headers={"content-type": ctype})
+        ok = r.status_code == 200
+    except Exception:
+        ok = False
+    rec.add(ep, time.perf_counter() - t_sched, n, ok)
+
+
+async def closed_loop(client, reqs: List[Request], concurrency: int, duration: float, rec: Recorder) -> float:
+    t0 = time.perf_counter()
+    counter = iter(range(10 ** 12))
+
+    async def worker():
+        while time.perf_counter() - t0 < duration:
+            t = time.perf_counter()
+            await send(client, reqs[next(counter) % len(reqs)], rec, t)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0
+
+
+async def open_loop(client, reqs: List[Request], rate: float, duration: float, rec: Recorder,
+                    poisson: bool, seed: int, max_inflight: int) -> float:
+    rng = random.Random(seed)
+    sem = asyncio.Semaphore(max_inflight)
+    tasks = []
+    t0 = time.perf_counter()
+    t_next, i = t0, 0
+    while t_next - t0 < duration:
+        delay = t_next - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        async def one(req=reqs[i % len(reqs)], t_sched=t_next):
+            async with sem:
+                await send(client, req, rec, t_sched)
+
+        tasks.append(asyncio.ensure_future(one()))
+        i += 1
+        t_next = t_next + rng.expovariate(rate) if poisson else t0 + i / rate
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - t0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(env: Dict[str, str], workers: int) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "src.app:app", "--port", str(port), "--log-level", "warning",
+           "--workers", str(workers)]
+    proc = subprocess.Popen(cmd, env={**os.environ, **env})
+    url = f"http://127.0.0.1:{port}"
+    import httpx
+    for _ in range(300):
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return proc, url
+        except Exception:
+            time.sleep(0.1)
+        if proc.poll() is not None:
+            break
+    proc.kill()
+    raise RuntimeError("uvicorn did not become healthy")
+
+
+def proc_rss_mb(pid: int) -> Dict[str, float]:
+    # Current and peak RSS of a process tree root (Linux /proc).
+    out = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key = "server_rss_mb" if line.startswith("VmRSS") else "server_peak_rss_mb"
+                    out[key] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return out
+
+
+async def run(args, reqs: List[Request]) -> Dict[str, Any]:
+    import httpx
+    proc, extra = None, {}
+    if args.target == "inprocess":
+        os.environ.update(dict(kv.split("=", 1) for kv in args.env))
+        from src import app as app_module
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+    else:
+        url = args.target
+        if args.target == "uvicorn":
+            proc, url = start_uvicorn(dict(kv.split("=", 1) for kv in args.env), args.workers)
+        limits = httpx.Limits(max_connections=max(args.concurrency, args.max_inflight))
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    try:
+        async with client:
+            warm = Recorder()
+            await closed_loop(client, reqs, 1, args.warmup, warm)
+            rec = Recorder()
+            if args.mode == "closed":
+                elapsed = await closed_loop(client, reqs, args.concurrency, args.duration, rec)
+            else:
+                elapsed = await open_loop(client, reqs, args.rate, args.duration, rec,
+                                          args.arrivals == "poisson", args.seed, args.max_inflight)
+        if proc is not None:
+            extra = proc_rss_mb(proc.pid)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+    metrics = rec.metrics(elapsed)
+    metrics["duration_s"] = round(elapsed, 3)
+    if args.target == "inprocess":
+        metrics["peak_rss_mb"] = peak_rss_mb()  # client and app share this process
+    metrics.update(extra)
+    return metrics
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--target", default="inprocess", help="inprocess, uvicorn, or a base URL")
+    ap.add_argument("--data", default="data/customer_churn_synth.csv")
+    ap.add_argument("--mode", choices=["closed", "open"], default="closed")
+    ap.add_argument("--concurrency", type=int, default=8, help="Clients in closed-loop mode")
+    ap.add_argument("--rate", type=float, default=100.0, help="Requests per second in open-loop mode")
+    ap.add_argument("--arrivals", choices=["fixed", "poisson"], default="fixed")
+    ap.add_argument("--max-inflight", type=int, default=256)
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--warmup", type=float, default=2.0)
+    ap.add_argument("--batch-sizes", default="1:0.7,10:0.2,100:0.1", help="size:weight,...")
+    ap.add_argument("--endpoints", default="predict:0.8,columnar:0.15,stream:0.05", help="name:weight,...")
+    ap.add_argument("--requests", type=int, default=2000, help="Distinct request bodies (cycled)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers (--target uvicorn)")
+    ap.add_argument("--env", action="append", default=[], help="KEY=VALUE for the app, repeatable")
+    ap.add_argument("--out", default=None, help="Results JSON (default benchmarks/results/loadtest-<commit>.json)")
+    args = ap.parse_args()
+    unknown = set(parse_mix(args.endpoints)) - set(ROUTES)
+    if unknown:
+        ap.error(f"unknown endpoints {sorted(unknown)}; choose from {sorted(ROUTES)}")
+
+    reqs = build_requests(args.data, args.requests, args.seed, parse_mix(args.batch_sizes), parse_mix(args.endpoints))
+    metrics = asyncio.run(run(args, reqs))
+    path = args.out or default_path("loadtest")
+    save_results(path, "loadtest", {k: v for k, v in vars(args).items() if k != "out"}, metrics)
+    print(json.dumps(metrics, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
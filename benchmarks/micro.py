@@ -0,0 +1,204 @@
+# Micro-benchmarks for the offline pieces: training, drift scoring, the
+# agent monitor, per-row explanations and the cost of a profiling span.
+# Each suite reports flat metrics into one results file.
+# CLI: python -m benchmarks.micro [--suites train,drift,monitor] [--out results.json]
+#      python -m benchmarks.micro --suites drift --drift-rows 1000000
+#      python -m benchmarks.micro --suites explain --artifacts artifacts
+#      python -m benchmarks.micro --suites profiling
+
+import argparse, json, os, subprocess, sys, tempfile, time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from .common import default_path, save_results
+
+Metrics = Dict[str, float]
+
+
+def best_of(fn: Callable[[], object], repeats: int) -> float:
+    """Fastest of `repeats` timed calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_train(args) -> Metrics:
+    # A fresh interpreter per run: import time and peak RSS are part of the cost.
+    out: Metrics = {}
+    for model in args.train_models.split(","):
+        with tempfile.TemporaryDirectory() as outdir:
+            cmd = [sys.executable, "-m", "src.train", "--data", args.data, "--outdir", outdir,
+                   "--model", model, "--no-cache"]
+            t0 = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            out[f"train.{model}.wall_s"] = round(time.perf_counter() - t0, 3)
+            with open(os.path.join(outdir, "metrics.json"), encoding="utf-8") as f:
+                m = json.load(f)
+        for k in ("fit_seconds", "peak_rss_mb"):
+            if m.get(k) is not None:
+                out[f"train.{model}.{k.replace('_seconds', '_s')}"] = round(m[k], 3)
+    return out
+
+
+def bench_drift(args) -> Metrics:
+    import numpy as np
+    from src.drift import DriftAccumulator, ReferenceProfile
+    from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+    from src.live_drift import LiveDriftMonitor
+    from .bench_drift import synthetic
+
+    df = synthetic(args.data, args.drift_rows, seed=args.seed)
+    ref = df.iloc[: len(df) // 2]
+    new = df.iloc[len(df) // 2:]
+    out: Metrics = {}
+    t = best_of(lambda: ReferenceProfile.from_frame(ref), args.repeats)
+    out["drift.profile_rows_per_s"] = round(len(ref) / t)
+    profile = ReferenceProfile.from_frame(ref)
+    t = best_of(lambda: DriftAccumulator(profile).update(new).report(), args.repeats)
+    out["drift.score_rows_per_s"] = round(len(new) / t)
+
+    mon = LiveDriftMonitor(profile)
+    for n in (1, 100):
+        rows = new.head(n).to_dict("records")
+        cols = {c: new[c].to_numpy()[:n] for c in CATEGORICAL_COLS + NUMERIC_COLS}
+        prob = np.random.default_rng(args.seed).random(n)
+        reps = max(2000 // n, 50)
+        t = best_of(lambda: [mon.record_rows(rows, prob) for _ in range(reps)], args.repeats)
+        out[f"drift.live_rows_{n}_us_per_row"] = round(1e6 * t / reps / n, 3)
+        t = best_of(lambda: [mon.record_columns(cols, prob) for _ in range(reps)], args.repeats)
+        out[f"drift.live_columns_{n}_us_per_row"] = round(1e6 * t / reps / n, 3)
+    out["drift.live_report_ms"] = round(1e3 * best_of(mon.report, args.repeats), 3)
+    return out
+
+
+def write_history(path: str, rows: int, seed: int) -> None:
+    """`rows` hourly records shaped like data/metrics_history.jsonl."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t0 = datetime(2025, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            f.write(json.dumps({
+                "ts": (t0 + timedelta(hours=i)).isoformat(),
+                "roc_auc": round(0.91 + 0.01 * rng.standard_normal(), 3),
+                "pr_auc": round(0.66 + 0.01 * rng.standard_normal(), 3),
+                "acc": round(0.87 + 0.005 * rng.standard_normal(), 3),
+                "latency_p95_ms": int(220 + 20 * rng.standard_normal()),
+                "error_rate": round(abs(0.015 + 0.003 * rng.standard_normal()), 3),
+            }) + "\n")
+
+
+def bench_monitor(args) -> Metrics:
+    from src.agent_monitor import ModelWatch, build_plan, load_jsonl, plan_from_store
+    from src.history import HistoryStore
+
+    out: Metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics_history.jsonl")
+        write_history(path, args.history_rows, args.seed)
+        out["monitor.full_plan_s"] = round(best_of(lambda: build_plan(load_jsonl(path), {}), args.repeats), 4)
+        store = HistoryStore(os.path.join(tmp, "store"))
+        t0 = time.perf_counter()
+        store.ingest_jsonl(path)
+        out["monitor.ingest_rows_per_s"] = round(args.history_rows / (time.perf_counter() - t0))
+        root = os.path.join(tmp, "store")
+        out["monitor.store_plan_s"] = round(
+            best_of(lambda: plan_from_store(HistoryStore(root), {}), args.repeats), 4)
+
+        watch = ModelWatch("bench", path)
+        watch.poll()
+        reps = 2000
+        t = best_of(lambda: [watch.poll() for _ in range(reps)], args.repeats)
+        out["monitor.idle_poll_us"] = round(1e6 * t / reps, 3)
+    return out
+
+
+def bench_explain(args) -> Metrics:
+    # Needs trained XGBoost or logistic regression artifacts (--artifacts).
+    import pandas as pd
+    from src.explain import EXPLAIN_COLUMNS, FEATURES
+    from src.prediction_cache import PredictionCache
+    from src.serving import ModelHandle
+
+    df = pd.read_csv(args.data, usecols=FEATURES, nrows=args.explain_rows)
+    rows = df.to_dict("records")
+    out: Metrics = {}
+    for mode, approx in (("exact", False), ("approx", True)):
+        h = ModelHandle.load(args.artifacts, explain_approx=approx)
+        X = h.transform_rows(rows)
+        ex = h.explainer()
+        t = best_of(lambda: ex.explain(X), args.repeats)
+        out[f"explain.{mode}_rows_per_s"] = round(len(rows) / t)
+        t = best_of(lambda: [ex.explain(X[:1]) for _ in range(100)], args.repeats)
+        out[f"explain.{mode}_single_row_us"] = round(1e6 * t / 100, 1)
+    cache = PredictionCache(len(rows), width=len(EXPLAIN_COLUMNS))
+    h = ModelHandle.load(args.artifacts, explain_cache=cache)
+    cache.activate(h.cache_scope)
+    h.explain_rows(rows)
+    t = best_of(lambda: h.explain_rows(rows), args.repeats)
+    out["explain.cached_rows_per_s"] = round(len(rows) / t)
+    return out
+
+
+def bench_profiling(args) -> Metrics:
+    # Cost of one span (src/profiling.py) beyond an empty block: disabled,
+    # enabled outside a profiled root (unsampled request), and recording.
+    from src import profiling
+    from src.profiling import span
+
+    def spans():
+        for _ in range(reps):
+            with span("x"):
+                pass
+
+    def bare():
+        for _ in range(reps):
+            pass
+
+    reps = 100_000
+    base = best_of(bare, args.repeats)
+    out: Metrics = {"profiling.disabled_span_ns": round(1e9 * (best_of(spans, args.repeats) - base) / reps, 1)}
+    p = profiling.Profiler("bench", out_dir=tempfile.mkdtemp()).start(root=False)
+    out["profiling.unsampled_span_ns"] = round(1e9 * (best_of(spans, args.repeats) - base) / reps, 1)
+    with p.root("request"):
+        out["profiling.recorded_span_ns"] = round(1e9 * (best_of(spans, args.repeats) - base) / reps, 1)
+    p.stop()
+    return out
+
+
+SUITES = {"train": bench_train, "drift": bench_drift, "monitor": bench_monitor, "explain": bench_explain,
+          "profiling": bench_profiling}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--suites", default="train,drift,monitor")
+    ap.add_argument("--data", default="data/customer_churn_synth.csv")
+    ap.add_argument("--train-models", default="logreg", help="Comma-separated --model values for src.train")
+    ap.add_argument("--drift-rows", type=int, default=400_000)
+    ap.add_argument("--history-rows", type=int, default=100_000)
+    ap.add_argument("--artifacts", default=os.environ.get("ARTIFACTS_DIR", "artifacts"))
+    ap.add_argument("--explain-rows", type=int, default=20_000)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="Results JSON (default benchmarks/results/micro-<commit>.json)")
+    args = ap.parse_args()
+    suites = args.suites.split(",")
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        ap.error(f"unknown suites {sorted(unknown)}; choose from {sorted(SUITES)}")
+
+    metrics: Metrics = {}
+    for name in suites:
+        metrics.update(SUITES[name](args))
+    path = args.out or default_path("micro")
+    save_results(path, "micro", {k: v for k, v in vars(args).items() if k != "out"}, metrics)
+    print(json.dumps(metrics, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
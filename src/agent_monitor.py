@@ -1,8 +1,30 @@
 # TODO: Implement Agentic Monitor (LLM-optional)
 # CLI: python -m src.agent_monitor --metrics data/metrics_history.jsonl --drift data/drift_latest.json --out artifacts/agent_plan.yaml
+#      python -m src.agent_monitor --store artifacts/history --metrics data/metrics_history.jsonl --drift ... --out ...
+#      python -m src.agent_monitor --daemon --watch churn=data/metrics_history.jsonl:data/drift_latest.json \
+#             [--watch other=...] --out artifacts/plans/{model}.yaml [--events artifacts/monitor_events.jsonl]
+#      any mode: [--profile [spans,cprofile,tracemalloc]]  (see src/profiling.py)
+#
+# With --store, --metrics is ingested incrementally into a src.history store
+# and the plan is built from the store's rolling tails, so each run costs
+# the new lines only, however long the history grows.
+#
+# --daemon keeps running: one asyncio task per model follows its metrics file
+# by byte offset into sliding windows, reloads its drift report when the file
+# changes, re-evaluates the rules once a burst of changes has settled
+# (debounce) and writes the plan / emits an event only when the status changes.
 
-import argparse, json, os, statistics, yaml
-from typing import List, Dict, Any
+import argparse, asyncio, json, os, signal, statistics, time, yaml
+from collections import deque
+from typing import Callable, List, Dict, Any, Mapping, Optional, Sequence
+
+from .history import HistoryStore, read_new_records
+from . import profiling
+from .profiling import span
+
+# Points per series the rules look at: median of the last 7, latest 2 for latency.
+MEDIAN_WINDOW = 7
+SERIES = ("roc_auc", "pr_auc", "latency_p95_ms")
 
 def load_jsonl(path: str) -> List[Dict[str, Any]]:
     out = []
@@ -19,11 +41,23 @@ def load_jsonl(path: str) -> List[Dict[str, Any]]:
 def median_last_7(vals: List[float]) -> float:
     return statistics.median(vals[-7:]) if vals else float("nan")
 
+def series_tails(history: List[Dict[str, Any]], n: int = MEDIAN_WINDOW) -> Dict[str, List[float]]:
+    out: Dict[str, List[float]] = {}
+    for key in SERIES:
+        out[key] = [r.get(key) for r in history if r.get(key) is not None][-n:]
+    return out
+
 def build_plan(history: List[Dict[str, Any]], drift: Dict[str, Any]) -> Dict[str, Any]:
-    # Extract series
-    aucs = [r.get("roc_auc") for r in history if r.get("roc_auc") is not None]
-    pr_aucs = [r.get("pr_auc") for r in history if r.get("pr_auc") is not None]
-    lat = [r.get("latency_p95_ms") for r in history if r.get("latency_p95_ms") is not None]
+    return plan_from_tails(series_tails(history), drift)
+
+def plan_from_store(store: HistoryStore, drift: Dict[str, Any]) -> Dict[str, Any]:
+    return plan_from_tails({k: store.tail(k) for k in SERIES}, drift)
+
+def plan_from_tails(tails: Mapping[str, Sequence[float]], drift: Dict[str, Any]) -> Dict[str, Any]:
+    # The last MEDIAN_WINDOW points of each series (fewer if the history is shorter)
+    aucs = list(tails.get("roc_auc", []))
+    pr_aucs = list(tails.get("pr_auc", []))
+    lat = list(tails.get("latency_p95_ms", []))
 
     findings = []
     status = "healthy"
@@ -79,26 +113,193 @@ def build_plan(history: List[Dict[str, Any]], drift: Dict[str, Any]) -> Dict[str
         )
     }
 
+def load_drift(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return {}
+    try:
+        if path.endswith(".jsonl"):
+            # Time series from src.drift_batch: the latest window decides.
+            series = load_jsonl(path)
+            return max(series, key=lambda r: r.get("window", "")) if series else {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def write_plan(plan: Dict[str, Any], out: str) -> None:
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        yaml.safe_dump(plan, f, sort_keys=False, allow_unicode=True)
+
+
+# ---- daemon mode -------------------------------------------------------------
+
+class ModelWatch:
+    """
+    One monitored model: its metrics JSONL, followed by byte offset into
+    MEDIAN_WINDOW-point sliding windows per series (or into a src.history
+    store, which survives restarts), and its drift report, reloaded when the
+    file's mtime or size changes.
+    """
+
+    def __init__(self, name: str, metrics: str, drift: Optional[str] = None, store_root: Optional[str] = None):
+        self.name = name
+        self.metrics = metrics
+        self.drift_path = drift
+        self.store = HistoryStore(os.path.join(store_root, name), tail=MEDIAN_WINDOW) if store_root else None
+        self.windows = {k: deque(maxlen=MEDIAN_WINDOW) for k in SERIES}
+        self.drift: Dict[str, Any] = {}
+        self.status: Optional[str] = None
+        self._source: Optional[Dict[str, int]] = None
+        self._drift_sig: Any = None
+
+    def poll(self) -> bool:
+        """Take in new metrics points and a changed drift report; True if anything changed."""
+        changed = False
+        if os.path.exists(self.metrics):
+            if self.store is not None:
+                changed = self.store.ingest_jsonl(self.metrics) > 0
+            else:
+                records, _, self._source = read_new_records(self.metrics, self._source)
+                for r in records:
+                    for k, w in self.windows.items():
+                        if r.get(k) is not None:
+                            w.append(r[k])
+                changed = bool(records)
+        if self.drift_path:
+            try:
+                st = os.stat(self.drift_path)
+                sig = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                sig = None
+            if sig != self._drift_sig:
+                self._drift_sig = sig
+                self.drift = load_drift(self.drift_path) if sig else {}
+                changed = True
+        return changed
+
+    def plan(self) -> Dict[str, Any]:
+        if self.store is not None:
+            return plan_from_store(self.store, self.drift)
+        return plan_from_tails(self.windows, self.drift)
+
+
+Emit = Callable[[ModelWatch, Optional[str], Dict[str, Any]], None]
+
+async def watch_model(w: ModelWatch, emit: Emit, poll_s: float, debounce_s: float, stop: asyncio.Event) -> None:
+    """
+    Poll `w` every `poll_s`. Changes are evaluated once none has arrived for
+    `debounce_s` (or after 10 x debounce_s of continuous changes), and
+    `emit(w, old_status, plan)` is called only when the status differs.
+    """
+    loop = asyncio.get_running_loop()
+    first = last = loop.time()  # start pending: the first evaluation always emits
+    pending = True
+    while not stop.is_set():
+        now = loop.time()
+        with span("poll"):
+            changed = w.poll()
+        if changed:
+            if not pending:
+                first = now
+            last, pending = now, True
+        if pending and (now - last >= debounce_s or now - first >= 10 * debounce_s):
+            pending = False
+            with span("plan"):
+                plan = w.plan()
+            if plan["status"] != w.status:
+                old, w.status = w.status, plan["status"]
+                emit(w, old, plan)
+        # Sleep to the next multiple of poll_s, so all models wake together
+        # (one event-loop wakeup per tick). A plain sleep is also much cheaper
+        # than wait_for(stop.wait()); stopping may take up to poll_s.
+        await asyncio.sleep(poll_s - loop.time() % poll_s)
+
+async def run_daemon(watches: List[ModelWatch], emit: Emit, poll_s: float = 1.0, debounce_s: float = 2.0,
+                     stop: Optional[asyncio.Event] = None) -> None:
+    stop = stop or asyncio.Event()
+    await asyncio.gather(*(watch_model(w, emit, poll_s, debounce_s, stop) for w in watches))
+
+def parse_watch(spec: str):
+    # NAME=METRICS[:DRIFT]
+    name, _, paths = spec.partition("=")
+    metrics, _, drift = paths.partition(":")
+    if not name or not metrics:
+        raise ValueError(f"--watch expects NAME=METRICS[:DRIFT], got {spec!r}")
+    return name, metrics, drift or None
+
+def daemon_main(args, prof: Optional[profiling.Profiler] = None) -> None:
+    specs = [parse_watch(s) for s in args.watch] or [("default", args.metrics, args.drift)]
+    watches = [ModelWatch(n, m, d, args.store) for n, m, d in specs]
+
+    def emit(w: ModelWatch, old: Optional[str], plan: Dict[str, Any]) -> None:
+        write_plan(plan, args.out.format(model=w.name))
+        event = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "model": w.name, "from": old, "to": plan["status"],
+                 "actions": plan["actions"], "findings": plan["findings"]}
+        if args.events:
+            os.makedirs(os.path.dirname(args.events) or ".", exist_ok=True)
+            with open(args.events, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+        print(json.dumps(event), flush=True)
+
+    async def run() -> None:
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        await run_daemon(watches, emit, args.poll_s, args.debounce_s, stop)
+
+    asyncio.run(run())
+    if prof is not None:
+        print(json.dumps({"profile": prof.finish()}), flush=True)
+
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--metrics", required=True)
-    ap.add_argument("--drift", required=True)
-    ap.add_argument("--out", required=True)
+    ap.add_argument("--metrics", default=None, help="metrics_history.jsonl (ingested into --store when given)")
+    ap.add_argument("--store", default=None, help="src.history store directory (one per model in --daemon mode)")
+    ap.add_argument("--drift", default=None)
+    ap.add_argument("--out", required=True, help="Plan path; may contain {model} in --daemon mode")
+    ap.add_argument("--daemon", action="store_true", help="Keep running and follow the inputs")
+    ap.add_argument("--watch", action="append", default=[], help="NAME=METRICS[:DRIFT], repeatable (--daemon)")
+    ap.add_argument("--events", default=None, help="Append status transitions to this JSONL (--daemon)")
+    ap.add_argument("--poll-s", type=float, default=1.0)
+    ap.add_argument("--debounce-s", type=float, default=2.0)
+    profiling.add_arguments(ap)
     args = ap.parse_args()
-
-    hist = load_jsonl(args.metrics)
     try:
-        with open(args.drift, "r", encoding="utf-8") as f:
-            drift = json.load(f)
-    except Exception:
-        drift = {}
+        prof = profiling.from_args("agent_monitor", args)
+    except ValueError as e:
+        ap.error(str(e))
 
-    plan = build_plan(hist, drift)
-    os.makedirs(os.path.dirname(args.out), exist_ok=True)
-    with open(args.out, "w", encoding="utf-8") as f:
-        yaml.safe_dump(plan, f, sort_keys=False, allow_unicode=True)
+    if args.daemon:
+        if not args.watch and not args.metrics:
+            ap.error("--daemon needs --watch or --metrics")
+        if len(args.watch) > 1 and "{model}" not in args.out:
+            ap.error("--out must contain {model} when watching several models")
+        daemon_main(args, prof)
+        return
+    if not args.drift:
+        ap.error("--drift is required")
+    if not args.metrics and not args.store:
+        ap.error("one of --metrics or --store is required")
+
+    store = None
+    with span("load_history"):
+        if args.store:
+            store = HistoryStore(args.store, tail=MEDIAN_WINDOW)
+            if args.metrics:
+                with span("ingest"):
+                    store.ingest_jsonl(args.metrics)
+        else:
+            hist = load_jsonl(args.metrics)
+    with span("load_drift"):
+        drift = load_drift(args.drift)
+
+    with span("plan"):
+        plan = plan_from_store(store, drift) if store else build_plan(hist, drift)
+    if prof is not None:
+        plan["profile"] = prof.finish()
+    write_plan(plan, args.out)
     print(yaml.safe_dump(plan, sort_keys=False, allow_unicode=True))
 
 if __name__ == "__main__":
     main()
-
@@ -1,51 +1,530 @@
 # TODO: Implement FastAPI app for churn inference.
-# Endpoints: GET /health, POST /predict
+# Endpoints: GET /health, GET /stats, GET /drift, GET /metrics, POST /predict, POST /predict/columnar,
+#            POST /predict/stream, GET /admin/model, POST|DELETE /admin/model/pin,
+#            POST|DELETE /admin/shadow, POST /explain, GET /admin/profile
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi import status
-from joblib import load
-import pandas as pd
-import os
-from sklearn.preprocessing import MinMaxScaler
-from .io_schemas import PredictRequest, PredictResponse
-from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from pydantic import BaseModel, ValidationError
+from typing import Optional
+import atexit, contextvars, json, logging, os, tempfile, threading, time
+from .io_schemas import (PredictRequest, PredictResponse, RowIn, ColumnarPredictRequest, ExplainResponse,
+                         validate_columns)
+from .serving import ModelHandle
+from .telemetry import HistoryWriter, Telemetry
+from .prediction_cache import PredictionCache
+from .shadow import ShadowScorer
+from .explain import EXPLAIN_COLUMNS, FEATURES, ExplainUnsupported, explain_payload
+from . import profiling
+from . import registry
+
+log = logging.getLogger("churn.app")
 
 ART = os.environ.get("ARTIFACTS_DIR", "artifacts")
-PRE = os.path.join(ART, "feature_pipeline.pkl")
-MODEL = os.path.join(ART, "model.pkl")
+
+# Micro-batching is off unless a window is configured (e.g. BATCH_WINDOW_MS=2).
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", "0"))
+BATCH_MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", "256"))
+# Rows scored per model call on the NDJSON streaming route.
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "1024"))
+# NDJSON bodies above this size spill from memory to a temp file.
+STREAM_SPOOL_BYTES = int(os.environ.get("STREAM_SPOOL_BYTES", str(16 * 1024 * 1024)))
+# Poll interval for new versions under ARTIFACTS_DIR/versions (0 disables the watcher).
+MODEL_WATCH_SECS = float(os.environ.get("MODEL_WATCH_SECS", "0"))
+# Load artifacts/inference_bundle (mmap'd arrays, no sklearn/pandas) when present.
+USE_BUNDLE = os.environ.get("USE_BUNDLE", "1") != "0"
+# TREE_EVAL=native scores tree models with the NumPy evaluator in src/trees.py
+# (faster for small batches, no xgboost import with a bundle).
+NATIVE_TREES = os.environ.get("TREE_EVAL", "library") == "native"
+# Sliding window for live drift on served rows (0 disables) and its bucket size.
+LIVE_DRIFT_WINDOW_S = float(os.environ.get("LIVE_DRIFT_WINDOW_S", "3600"))
+LIVE_DRIFT_BUCKET_S = float(os.environ.get("LIVE_DRIFT_BUCKET_S", "60"))
+# When set, request latency percentiles are appended to this JSONL (the
+# metrics_history.jsonl schema read by src.agent_monitor) every TELEMETRY_HISTORY_SECS.
+TELEMETRY_HISTORY_PATH = os.environ.get("TELEMETRY_HISTORY_PATH")
+TELEMETRY_HISTORY_SECS = float(os.environ.get("TELEMETRY_HISTORY_SECS", "60"))
+# Cache of probabilities for repeated rows (0 entries disables): LRU over at
+# most PREDICTION_CACHE_SIZE entries and PREDICTION_CACHE_MAX_MB, entries
+# expire after PREDICTION_CACHE_TTL_S (0 = never). Cleared on every model swap.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "3600"))
+PREDICTION_CACHE_MAX_MB = float(os.environ.get("PREDICTION_CACHE_MAX_MB", "64"))
+# Per-row contributions on /explain: cached like predictions (on by default,
+# same bounds and TTL semantics); EXPLAIN_APPROX=1 uses XGBoost's per-path
+# attribution instead of exact TreeSHAP.
+EXPLAIN_CACHE_SIZE = int(os.environ.get("EXPLAIN_CACHE_SIZE", "100000"))
+EXPLAIN_CACHE_TTL_S = float(os.environ.get("EXPLAIN_CACHE_TTL_S", "3600"))
+EXPLAIN_CACHE_MAX_MB = float(os.environ.get("EXPLAIN_CACHE_MAX_MB", "64"))
+EXPLAIN_APPROX = os.environ.get("EXPLAIN_APPROX", "0") == "1"
+# Scoring threads per model call for models with their own pool (XGBoost); 0 = library default.
+MODEL_THREADS = int(os.environ.get("MODEL_THREADS", "0"))
+# Shadow scoring: a challenger (registry version SHADOW_VERSION, or the
+# artifacts dir SHADOW_ARTIFACTS_DIR) scores every answered request in a
+# background thread and both probabilities are appended to SHADOW_LOG_PATH.
+# At most SHADOW_QUEUE requests wait; beyond that shadow work is dropped.
+# SHADOW_SAMPLE is the fraction of requests shadowed.
+SHADOW_VERSION = os.environ.get("SHADOW_VERSION")
+SHADOW_ARTIFACTS_DIR = os.environ.get("SHADOW_ARTIFACTS_DIR")
+SHADOW_LOG_PATH = os.environ.get("SHADOW_LOG_PATH", os.path.join(ART, "shadow", "scores.jsonl"))
+SHADOW_QUEUE = int(os.environ.get("SHADOW_QUEUE", "1024"))
+SHADOW_SAMPLE = float(os.environ.get("SHADOW_SAMPLE", "1.0"))
+# Request profiling (src/profiling.py): PROFILE=1 records stage spans for 1 in
+# PROFILE_SAMPLE_N requests, shown on GET /admin/profile and written to
+# PROFILE_DIR at exit. Unset, no middleware is installed.
+PROFILE = os.environ.get("PROFILE", "")
+PROFILE_SAMPLE_N = int(os.environ.get("PROFILE_SAMPLE_N", "100"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", profiling.PROFILE_DIR)
+# When set, /admin routes require a matching X-Admin-Token header.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+PREDICT_ROUTES = ("/predict", "/predict/columnar", "/predict/stream")
 
 app = FastAPI(title="Churn Classifier")
 
-_pre = None
-_model = None
-if os.path.exists(PRE) and os.path.exists(MODEL):
-    _pre = load(PRE)
-    _model = load(MODEL)
+TELEMETRY = Telemetry()
+PREDICTION_CACHE: Optional[PredictionCache] = None
+if PREDICTION_CACHE_SIZE > 0:
+    PREDICTION_CACHE = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S,
+                                       int(PREDICTION_CACHE_MAX_MB * 1024 * 1024))
+EXPLAIN_CACHE: Optional[PredictionCache] = None
+if EXPLAIN_CACHE_SIZE > 0:
+    EXPLAIN_CACHE = PredictionCache(EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_TTL_S, int(EXPLAIN_CACHE_MAX_MB * 1024 * 1024),
+                                    width=len(EXPLAIN_COLUMNS), name="explain_cache")
+# perf_counter() at request arrival; sync handlers run in the threadpool
+# with a copy of the request's context, so they can read it.
+_request_start: contextvars.ContextVar[float] = contextvars.ContextVar("request_start", default=0.0)
+
+class TelemetryMiddleware:
+    """
+    Times every HTTP request by route template and status. Plain ASGI, so it
+    adds no task or queue per request (unlike BaseHTTPMiddleware).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        _request_start.set(t0)
+        status_code = 500
+
+        async def send_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            TELEMETRY.observe(("request", route), time.perf_counter() - t0)
+            TELEMETRY.count(("requests", route, status_code))
+
+app.add_middleware(TelemetryMiddleware)
+
+_profiler: Optional[profiling.Profiler] = None
+_profile_modes = profiling.parse_modes(PROFILE)
+if _profile_modes:
+    if _profile_modes != ("spans",):
+        # cProfile / tracemalloc are process-wide: they would slow every
+        # concurrent request, not just the sampled one.
+        log.warning("PROFILE=%s: the API records spans only", PROFILE)
+    _profiler = profiling.Profiler("api", ("spans",), PROFILE_DIR, PROFILE_SAMPLE_N).start(root=False)
+    atexit.register(_profiler.finish)
+    app.add_middleware(profiling.ProfileMiddleware, profiler=_profiler)
+
+def _validated() -> None:
+    # Body read, JSON parsing and pydantic validation happen before the
+    # handler runs: the "validate" stage is request arrival -> now.
+    TELEMETRY.stage("validate", time.perf_counter() - _request_start.get())
+
+_active: Optional[ModelHandle] = None
+_pinned: Optional[str] = None
+_swap_lock = threading.Lock()
+_last_reload_error: Optional[str] = None
+_shadow: Optional[ShadowScorer] = None
+
+def _load_handle(version: Optional[str]) -> ModelHandle:
+    path = registry.version_dir(ART, version) if version else ART
+    return ModelHandle.load(path, version=version, use_bundle=USE_BUNDLE, native_trees=NATIVE_TREES,
+                            batch_window_ms=BATCH_WINDOW_MS, batch_max_rows=BATCH_MAX_ROWS,
+                            drift_window_s=LIVE_DRIFT_WINDOW_S, drift_bucket_s=LIVE_DRIFT_BUCKET_S,
+                            telemetry=TELEMETRY, cache=PREDICTION_CACHE, threads=MODEL_THREADS,
+                            shadow=_shadow, explain_cache=EXPLAIN_CACHE, explain_approx=EXPLAIN_APPROX)
+
+def _load_shadow(version: Optional[str], path: Optional[str] = None) -> ShadowScorer:
+    path = path or registry.version_dir(ART, version)
+    # One scoring thread and no telemetry or cache: the challenger must not
+    # compete for the primary's cores or show up in its stage timers.
+    challenger = ModelHandle.load(path, version=version or os.path.basename(os.path.normpath(path)),
+                                  use_bundle=USE_BUNDLE, native_trees=NATIVE_TREES, threads=1)
+    challenger.smoke_test()
+    return ShadowScorer(challenger, SHADOW_LOG_PATH, SHADOW_QUEUE, SHADOW_SAMPLE)
+
+def _set_shadow(shadow: Optional[ShadowScorer]) -> None:
+    # New handles pick up _shadow in _load_handle, under the same lock.
+    global _shadow
+    with _swap_lock:
+        old, _shadow = _shadow, shadow
+        if _active is not None:
+            _active.shadow = shadow
+    if old is not None:
+        old.close()
+
+def _swap(handle: ModelHandle) -> None:
+    # Single reference assignment: requests that already hold the old handle
+    # finish on it; new requests see the new one.
+    global _active
+    if PREDICTION_CACHE is not None:
+        PREDICTION_CACHE.activate(handle.cache_scope)
+    if EXPLAIN_CACHE is not None:
+        EXPLAIN_CACHE.activate(handle.cache_scope)
+    old, _active = _active, handle
+    if old is not None:
+        old.close()
+
+def _initial_load() -> None:
+    # Prefer the registry's LATEST; fall back to the flat artifacts dir.
+    latest = registry.latest_version(ART)
+    for version in ([latest, None] if latest else [None]):
+        try:
+            _swap(_load_handle(version))
+            return
+        except FileNotFoundError:
+            continue
+    # No artifacts yet; /predict answers 503 until training has run.
+
+def _check_for_update() -> Optional[str]:
+    """
+    Load, smoke-test and activate the LATEST version if it changed. Runs off
+    the request path (watcher thread); returns the newly active version.
+    """
+    global _last_reload_error
+    latest = registry.latest_version(ART)
+    with _swap_lock:
+        current = _active.version if _active is not None else None
+        if _pinned is not None or latest is None or latest == current:
+            return None
+        try:
+            handle = _load_handle(latest)
+            handle.smoke_test()
+        except Exception as e:
+            _last_reload_error = f"{latest}: {e}"
+            log.exception("Rejected model version %s", latest)
+            return None
+        _swap(handle)
+        _last_reload_error = None
+    log.info("Activated model version %s", latest)
+    return latest
+
+def _watch(stop: threading.Event) -> None:
+    while not stop.wait(MODEL_WATCH_SECS):
+        try:
+            _check_for_update()
+        except Exception:
+            log.exception("Model watcher iteration failed")
+
+def _active_version() -> Optional[str]:
+    h = _active
+    return h.version if h is not None else None
+
+_initial_load()
+if SHADOW_VERSION or SHADOW_ARTIFACTS_DIR:
+    try:
+        _set_shadow(_load_shadow(SHADOW_VERSION, SHADOW_ARTIFACTS_DIR))
+    except Exception:
+        log.exception("Shadow scoring disabled: cannot load the challenger")
+_watch_stop = threading.Event()
+_history_writer: Optional[HistoryWriter] = None
+
+def start_background(watch: bool = True, worker: Optional[int] = None) -> None:
+    """Model watcher, shadow scorer and telemetry history threads (per process: threads do not survive fork)."""
+    global _history_writer
+    if _shadow is not None:
+        _shadow.start()
+    if watch and MODEL_WATCH_SECS > 0:
+        threading.Thread(target=_watch, args=(_watch_stop,), name="model-watcher", daemon=True).start()
+    if TELEMETRY_HISTORY_PATH:
+        tag = {} if worker is None else {"worker": worker}
+        _history_writer = HistoryWriter(TELEMETRY, TELEMETRY_HISTORY_PATH, TELEMETRY_HISTORY_SECS, PREDICT_ROUTES,
+                                        extra=lambda: {"model_version": _active_version(), **tag}).start()
+
+def after_fork(worker: int, threads: int) -> None:
+    """
+    Called by src.serve in each forked worker: start this process's own
+    threads and give its model `threads` scoring threads. The parent
+    watches for new versions and restarts workers, so workers do not.
+    """
+    global MODEL_THREADS
+    MODEL_THREADS = threads
+    h = _active
+    if h is not None:
+        h.after_fork()
+        h.set_threads(threads)
+    if _shadow is not None:
+        _shadow.after_fork()
+    start_background(watch=False, worker=worker)
+
+# Under src.serve the pre-fork parent only loads the model; see after_fork.
+if os.environ.get("SERVE_PREFORK") != "1":
+    start_background()
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-def _ensure_ready():
-    if _pre is None or _model is None:
+@app.get("/stats")
+def stats():
+    h = _active
+    return {
+        "model_version": h.version if h is not None else None,
+        "batching": h.batcher.stats() if h is not None and h.batcher is not None else None,
+        "prediction_cache": PREDICTION_CACHE.stats() if PREDICTION_CACHE is not None else None,
+        "shadow": _shadow.stats() if _shadow is not None else None,
+        "explain_cache": EXPLAIN_CACHE.stats() if EXPLAIN_CACHE is not None else None,
+    }
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text format: request latency by route, stage latency
+    (validate, cache, frame, transform, predict, explain), request and row
+    counters, prediction/explanation cache and shadow scoring counters when enabled.
+    """
+    text = TELEMETRY.prometheus({"model_version": _active_version() or ""})
+    if PREDICTION_CACHE is not None:
+        text += PREDICTION_CACHE.prometheus()
+    if EXPLAIN_CACHE is not None:
+        text += EXPLAIN_CACHE.prometheus()
+    shadow = _shadow
+    if shadow is not None:
+        text += shadow.prometheus()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+@app.get("/drift")
+def live_drift(threshold: float = 0.2):
+    """
+    PSI of the rows and predictions served in the last LIVE_DRIFT_WINDOW_S
+    seconds against the active model's training reference profile.
+    """
+    h = _ensure_ready()
+    if h.drift is None:
+        raise HTTPException(status_code=404, detail="Live drift disabled or no reference_profile.json for this model")
+    return {"model_version": h.version, **h.drift.report(threshold)}
+
+def _ensure_ready() -> ModelHandle:
+    h = _active
+    if h is None:
         raise HTTPException(status_code=503, detail="Model artifacts not loaded. Run training first.")
+    return h
+
+def _check_admin(token: Optional[str]) -> None:
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+class PinRequest(BaseModel):
+    version: str
+
+@app.get("/admin/model")
+def admin_model(x_admin_token: Optional[str] = Header(default=None)):
+    _check_admin(x_admin_token)
+    h = _active
+    return {
+        "active_version": h.version if h is not None else None,
+        "latest_version": registry.latest_version(ART),
+        "pinned": _pinned,
+        "versions": registry.list_versions(ART),
+        "last_reload_error": _last_reload_error,
+        "shadow_version": _shadow.challenger.version if _shadow is not None else None,
+    }
+
+@app.post("/admin/model/pin")
+def admin_pin(req: PinRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Activate `version` and stop following LATEST until unpinned.
+    """
+    global _pinned
+    _check_admin(x_admin_token)
+    try:
+        path = registry.version_dir(ART, req.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {req.version}")
+    with _swap_lock:
+        try:
+            handle = _load_handle(req.version)
+            handle.smoke_test()
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Version {req.version} failed to load: {e}")
+        _swap(handle)
+        _pinned = req.version
+    return admin_model(x_admin_token)
+
+@app.delete("/admin/model/pin")
+def admin_unpin(x_admin_token: Optional[str] = Header(default=None)):
+    global _pinned
+    _check_admin(x_admin_token)
+    with _swap_lock:
+        _pinned = None
+    _check_for_update()
+    return admin_model(x_admin_token)
+
+@app.post("/admin/shadow")
+def admin_shadow(req: PinRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Shadow-score requests with registry version `version` (replaces any current challenger).
+    """
+    _check_admin(x_admin_token)
+    try:
+        path = registry.version_dir(ART, req.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {req.version}")
+    try:
+        shadow = _load_shadow(req.version)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Version {req.version} failed to load: {e}")
+    _set_shadow(shadow.start())
+    return admin_model(x_admin_token)
+
+@app.delete("/admin/shadow")
+def admin_unshadow(x_admin_token: Optional[str] = Header(default=None)):
+    _check_admin(x_admin_token)
+    _set_shadow(None)
+    return admin_model(x_admin_token)
+
+@app.get("/admin/profile")
+def admin_profile(format: str = Query("folded", pattern="^(folded|json)$"),
+                  x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Spans of the sampled requests so far: collapsed stacks weighted by self
+    time in microseconds (feed to flamegraph.pl / speedscope), or the summary.
+    """
+    _check_admin(x_admin_token)
+    if _profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling disabled (set PROFILE=1)")
+    if format == "json":
+        return _profiler.summary()
+    return PlainTextResponse(_profiler.collapsed())
 
 @app.post("/predict", response_model=PredictResponse)
 def predict(req: PredictRequest):
-    _ensure_ready()
+    _validated()
+    h = _ensure_ready()
     rows = [r.model_dump() for r in req.rows]
-    df = pd.DataFrame(rows, columns=CATEGORICAL_COLS + NUMERIC_COLS)
-    X = _pre.transform(df)
-    if hasattr(_model, "predict_proba"):
-        prob = _model.predict_proba(X)[:, 1]
-    else:
-        s = _model.decision_function(X).reshape(-1, 1)
-        prob = MinMaxScaler().fit_transform(s).ravel()
+    TELEMETRY.count(("rows", "/predict"), len(rows))
+    prob = h.score_rows(rows)
+    if h.drift is not None:
+        h.drift.record_rows(rows, prob)
     cls = (prob >= 0.5).astype(int).tolist()
     return {"prob": [float(p) for p in prob], "cls": cls}
 
+@app.post("/predict/columnar", response_model=PredictResponse)
+def predict_columnar(req: ColumnarPredictRequest):
+    """
+    Column-oriented /predict: one array per feature, checked with vectorized
+    NumPy rules instead of one pydantic object per row.
+    """
+    h = _ensure_ready()
+    cols, errors = validate_columns(req.columns)
+    _validated()
+    if errors:
+        raise RequestValidationError(errors)
+    prob = h.score_columns(cols)
+    TELEMETRY.count(("rows", "/predict/columnar"), len(prob))
+    if h.drift is not None:
+        h.drift.record_columns(cols, prob)
+    return {"prob": prob.astype(float).tolist(), "cls": (prob >= 0.5).astype(int).tolist()}
+
+@app.post("/explain", response_model=ExplainResponse)
+def explain(req: PredictRequest, top_k: int = Query(3, ge=0, le=len(FEATURES))):
+    """
+    Per-row feature contributions in log-odds (base_value + contributions =
+    the model's margin), summed back to the input features, with the `top_k`
+    features pushing each row towards churn.
+    """
+    _validated()
+    h = _ensure_ready()
+    rows = [r.model_dump() for r in req.rows]
+    TELEMETRY.count(("rows", "/explain"), len(rows))
+    try:
+        values = h.explain_rows(rows)
+    except ExplainUnsupported as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return explain_payload(values, top_k)
+
+def _score_stream_lines(h, lines, first_lineno):
+    # Parse and score one chunk of NDJSON lines; runs in the threadpool.
+    rows, out = [], []
+    t0 = time.perf_counter()
+    for i, line in enumerate(lines):
+        try:
+            rows.append(RowIn.model_validate_json(line).model_dump())
+            out.append(None)
+        except ValidationError as e:
+            out.append({"line": first_lineno + i, "error": json.loads(e.json(include_url=False))})
+    TELEMETRY.stage("validate", time.perf_counter() - t0)
+    TELEMETRY.count(("rows", "/predict/stream"), len(rows))
+    prob = h.score_rows(rows) if rows else []
+    if rows and h.drift is not None:
+        h.drift.record_rows(rows, prob)
+    k = 0
+    for i, item in enumerate(out):
+        if item is None:
+            p = float(prob[k])
+            k += 1
+            out[i] = {"prob": p, "cls": int(p >= 0.5)}
+    return "".join(json.dumps(item) + "\n" for item in out)
+
+def _read_stream_chunk(h, body, lineno):
+    # Next STREAM_CHUNK_ROWS non-empty lines from the spooled body, scored.
+    lines, first = [], None
+    for raw in body:
+        lineno += 1
+        if raw.strip():
+            if first is None:
+                first = lineno
+            lines.append(raw)
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                break
+    text = _score_stream_lines(h, lines, first) if lines else ""
+    return text, lineno, len(lines) < STREAM_CHUNK_ROWS
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    NDJSON in (one RowIn object per line), NDJSON out (one result per line,
+    same order). Invalid lines produce {"line", "error"} entries instead of
+    failing the whole stream.
+    """
+    h = _ensure_ready()
+    # The body is spooled before the response starts: StreamingResponse listens
+    # for disconnects on `receive`, so it cannot be read from the generator.
+    body = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_BYTES)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+
+    async def results():
+        lineno, done = 0, False
+        try:
+            while not done:
+                text, lineno, done = await run_in_threadpool(_read_stream_chunk, h, body, lineno)
+                if text:
+                    yield text
+        finally:
+            body.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
     return JSONResponse(
@@ -54,4 +533,4 @@ async def validation_exception_handler(request, exc):
             "detail": "Invalid request payload",
             "errors": exc.errors(),
         },
-    )
\ No newline at end of file
+    )
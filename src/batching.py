@@ -0,0 +1,124 @@
+# Adaptive micro-batching for concurrent /predict calls.
+# Enabled in the API with BATCH_WINDOW_MS > 0 (see src/app.py).
+
+import threading, time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Tuple
+import numpy as np
+
+
+class BatcherClosed(RuntimeError):
+    pass
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent scoring calls into one vectorized `score_fn` call.
+
+    Callers block in `submit` while a background thread collects queued
+    matrices; a batch is flushed as soon as `max_rows` rows are queued or the
+    oldest request has waited `window_ms`. Results are split back per caller.
+    """
+
+    def __init__(self, score_fn: Callable[[np.ndarray], np.ndarray],
+                 window_ms: float = 2.0, max_rows: int = 256, history: int = 2048):
+        self.score_fn = score_fn
+        self.window_s = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._cv = threading.Condition()
+        self._pending: Deque[Tuple[np.ndarray, Future, float]] = deque()
+        self._pending_rows = 0
+        self._closed = False
+
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._recent_sizes: Deque[int] = deque(maxlen=history)
+        self._recent_delays_ms: Deque[float] = deque(maxlen=history)
+
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> np.ndarray:
+        fut: Future = Future()
+        with self._cv:
+            if self._closed:
+                raise BatcherClosed("MicroBatcher is closed")
+            self._pending.append((X, fut, time.perf_counter()))
+            self._pending_rows += len(X)
+            self._cv.notify()
+        return fut.result()
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
+
+    def _take_batch(self) -> List[Tuple[np.ndarray, Future, float]]:
+        # Called with the lock held and at least one pending item.
+        batch = [self._pending.popleft()]
+        rows = len(batch[0][0])
+        while self._pending and rows + len(self._pending[0][0]) <= self.max_rows:
+            item = self._pending.popleft()
+            rows += len(item[0])
+            batch.append(item)
+        self._pending_rows -= rows
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._pending and not self._closed:
+                    self._cv.wait()
+                if not self._pending:
+                    return
+                deadline = self._pending[0][2] + self.window_s
+                while self._pending_rows < self.max_rows and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cv.wait(remaining)
+                batch = self._take_batch()
+
+            start = time.perf_counter()
+            sizes = [len(x) for x, _, _ in batch]
+            try:
+                X = batch[0][0] if len(batch) == 1 else np.vstack([x for x, _, _ in batch])
+                prob = np.asarray(self.score_fn(X))
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+
+            with self._cv:
+                self._batches += 1
+                self._requests += len(batch)
+                self._rows += len(X)
+                self._recent_sizes.append(len(X))
+                for _, _, t in batch:
+                    self._recent_delays_ms.append((start - t) * 1000.0)
+
+            off = 0
+            for (_, fut, _), n in zip(batch, sizes):
+                fut.set_result(prob[off:off + n])
+                off += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cv:
+            sizes = np.asarray(self._recent_sizes, dtype=float)
+            delays = np.asarray(self._recent_delays_ms, dtype=float)
+            out = {
+                "window_ms": self.window_s * 1000.0,
+                "max_rows": self.max_rows,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "queued_rows": self._pending_rows,
+            }
+        out["batch_rows_mean"] = float(sizes.mean()) if sizes.size else None
+        out["batch_rows_p95"] = float(np.percentile(sizes, 95)) if sizes.size else None
+        out["queue_delay_ms_p50"] = float(np.percentile(delays, 50)) if delays.size else None
+        out["queue_delay_ms_p95"] = float(np.percentile(delays, 95)) if delays.size else None
+        return out
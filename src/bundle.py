@@ -0,0 +1,145 @@
+# Compact inference bundle: flat .npy arrays (memory-mappable) + native model file.
+# Written by src/train.py next to the pickles; loaded by src/serving.py.
+#
+# <artifacts>/inference_bundle/
+#   manifest.json              kind, feature layout, categories, file names
+#   num_fill.npy mean.npy scale.npy
+#   model.ubj                  (xgb)  XGBoost native booster
+#   trees_*.npy                (xgb, hgb)  flat node arrays for src/trees.py
+#   coef.npy intercept.npy     (logreg)
+
+import json, os, shutil
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from .compiled import CompiledPreprocessor
+from .trees import TreeEnsemble
+
+BUNDLE_DIR = "inference_bundle"
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def model_kind(model: Any) -> Optional[str]:
+    if hasattr(model, "get_booster"):
+        return "xgb"
+    if model.__class__.__name__ == "HistGradientBoostingClassifier":
+        return "hgb"
+    if model.__class__.__name__ == "LogisticRegression":
+        return "logreg"
+    return None
+
+
+def _read_manifest(art: str) -> Dict[str, Any]:
+    with open(os.path.join(art, BUNDLE_DIR, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def has_bundle(art: str, native_trees: bool = False) -> bool:
+    """
+    True if `art` holds a bundle that can be served in this mode: HGB
+    bundles only carry node arrays, so they need the NumPy tree evaluator.
+    """
+    if not os.path.exists(os.path.join(art, BUNDLE_DIR, MANIFEST)):
+        return False
+    return native_trees or _read_manifest(art)["kind"] != "hgb"
+
+
+def export_bundle(art: str, pre, model) -> Optional[str]:
+    """
+    Write the bundle for a fitted preprocessor/model pair. Returns its path,
+    or None when the model type has no compact form (serving then uses the
+    pickles).
+    """
+    kind = model_kind(model)
+    if kind is None:
+        return None
+    comp = CompiledPreprocessor.from_pipeline(pre)
+    dest = os.path.join(art, BUNDLE_DIR)
+    tmp = dest + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "num_fill.npy"), comp.num_fill)
+    np.save(os.path.join(tmp, "mean.npy"), comp.mean)
+    np.save(os.path.join(tmp, "scale.npy"), comp.scale)
+    trees_meta = None
+    if kind in ("xgb", "hgb"):
+        trees_meta = TreeEnsemble.from_model(model).save(tmp)
+    if kind == "xgb":
+        model.get_booster().save_model(os.path.join(tmp, "model.ubj"))
+    elif kind == "logreg":
+        np.save(os.path.join(tmp, "coef.npy"), np.asarray(model.coef_, dtype=np.float64).ravel())
+        np.save(os.path.join(tmp, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64).ravel())
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "kind": kind,
+        "categorical_cols": CATEGORICAL_COLS,
+        "numeric_cols": NUMERIC_COLS,
+        "categories": comp.categories,
+        "cat_fill": comp.cat_fill,
+        "n_features": comp.n_features_out,
+        "trees": trees_meta,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(tmp, dest)
+    return dest
+
+
+class LinearBundleModel:
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray):
+        self.coef = coef
+        self.intercept = float(intercept[0])
+
+    def predict_proba(self, X) -> np.ndarray:
+        z = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        p = 1.0 / (1.0 + np.exp(-z))
+        return np.column_stack([1.0 - p, p])
+
+
+class XGBBundleModel:
+    """
+    Native XGBoost booster; xgboost is imported only when a bundle needs it.
+    """
+
+    def __init__(self, path: str):
+        import xgboost as xgb
+        self.booster = xgb.Booster(model_file=path)
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = np.asarray(self.booster.inplace_predict(X), dtype=np.float64)
+        return np.column_stack([1.0 - p, p])
+
+
+def load_bundle(art: str, mmap: bool = True, native_trees: bool = False) -> Tuple[CompiledPreprocessor, Any]:
+    """
+    Load (CompiledPreprocessor, model) from `art`/inference_bundle. Arrays
+    are memory-mapped read-only, so workers that load the same files share
+    the pages. With `native_trees`, tree models are evaluated by
+    src/trees.py from the node arrays and xgboost is never imported.
+    """
+    root = os.path.join(art, BUNDLE_DIR)
+    m = _read_manifest(art)
+    if m.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format: {m.get('format')}")
+    if m["categorical_cols"] != CATEGORICAL_COLS or m["numeric_cols"] != NUMERIC_COLS:
+        raise ValueError("Bundle was built for a different feature set")
+
+    mode = "r" if mmap else None
+    arr = lambda name: np.load(os.path.join(root, name), mmap_mode=mode)
+    comp = CompiledPreprocessor(m["categories"], m["cat_fill"], arr("num_fill.npy"),
+                                arr("mean.npy"), arr("scale.npy"))
+    if native_trees and m.get("trees"):
+        model = TreeEnsemble.load(root, m["trees"], mmap=mmap)
+    elif m["kind"] == "xgb":
+        model = XGBBundleModel(os.path.join(root, "model.ubj"))
+    elif m["kind"] == "logreg":
+        model = LinearBundleModel(arr("coef.npy"), arr("intercept.npy"))
+    else:
+        raise ValueError(f"Unknown bundle model kind: {m['kind']}")
+    return comp, model
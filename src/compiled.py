@@ -0,0 +1,119 @@
+# Compiled (pandas-free) preprocessor for low-latency serving.
+# Built at training time from the fitted ColumnTransformer (feature_pipeline.pkl).
+
+import json, os
+from typing import Any, Dict, List, Mapping, Sequence
+import numpy as np
+from .features import CATEGORICAL_COLS, NUMERIC_COLS
+
+INPUT_COLS: List[str] = CATEGORICAL_COLS + NUMERIC_COLS
+
+
+def _is_nan(v: Any) -> bool:
+    # Mirrors SimpleImputer(missing_values=np.nan): None is *not* imputed and
+    # falls through to the encoder as an unknown category.
+    return isinstance(v, float) and v != v
+
+
+class CompiledPreprocessor:
+    """
+    NumPy-only equivalent of a fitted `build_preprocessor()` pipeline.
+
+    Output layout matches the ColumnTransformer: one one-hot block per
+    categorical column (in CATEGORICAL_COLS order), then the standardized
+    NUMERIC_COLS. Missing values are imputed with the fitted modes/medians and
+    unknown categories encode to all zeros (handle_unknown="ignore").
+    """
+
+    def __init__(self, categories: List[List[str]], cat_fill: List[str],
+                 num_fill: Sequence[float], mean: Sequence[float], scale: Sequence[float]):
+        self.categories = [list(c) for c in categories]
+        self.cat_fill = list(cat_fill)
+        self.num_fill = np.asarray(num_fill, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+        self.cat_offsets: List[int] = []
+        off = 0
+        for cats in self.categories:
+            self.cat_offsets.append(off)
+            off += len(cats)
+        self.num_offset = off
+        self.n_features_out = off + len(NUMERIC_COLS)
+
+    @classmethod
+    def from_pipeline(cls, pre) -> "CompiledPreprocessor":
+        cat = pre.named_transformers_["cat"]
+        num = pre.named_transformers_["num"]
+        return cls(
+            categories=[[str(v) for v in c] for c in cat.named_steps["ohe"].categories_],
+            cat_fill=[str(v) for v in cat.named_steps["impute"].statistics_],
+            num_fill=num.named_steps["impute"].statistics_,
+            mean=num.named_steps["sc"].mean_,
+            scale=num.named_steps["sc"].scale_,
+        )
+
+    def transform_columns(self, cols: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """
+        Encode a column-oriented batch ({feature: values}) into a float32 matrix.
+        """
+        n = len(cols[NUMERIC_COLS[0]])
+        out = np.zeros((n, self.n_features_out), dtype=np.float32)
+
+        for c, cats, fill, off in zip(CATEGORICAL_COLS, self.categories, self.cat_fill, self.cat_offsets):
+            vals = np.asarray(cols[c], dtype=object)
+            matched = np.zeros(n, dtype=bool)
+            for k, cat in enumerate(cats):
+                hit = vals == cat
+                out[hit, off + k] = 1.0
+                matched |= hit
+            if not matched.all():
+                # Only unmatched rows can be missing; unknown categories stay all-zero.
+                for i in np.flatnonzero(~matched):
+                    if _is_nan(vals[i]) and fill in cats:
+                        out[i, off + cats.index(fill)] = 1.0
+
+        num = np.array([cols[c] for c in NUMERIC_COLS], dtype=np.float64).T
+        if n:
+            miss = np.isnan(num)
+            if miss.any():
+                num = np.where(miss, self.num_fill, num)
+            out[:, self.num_offset:] = (num - self.mean) / self.scale
+        return out
+
+    def transform_rows(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """
+        Encode a list of row dicts (the /predict payload) into a float32 matrix.
+        """
+        return self.transform_columns({c: [r.get(c) for r in rows] for c in INPUT_COLS})
+
+    def feature_names(self) -> List[str]:
+        """Output column names, as features.get_feature_names gives for the fitted pipeline."""
+        return [f"{c}_{v}" for c, cats in zip(CATEGORICAL_COLS, self.categories) for v in cats] + list(NUMERIC_COLS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "categorical_cols": CATEGORICAL_COLS,
+            "numeric_cols": NUMERIC_COLS,
+            "categories": self.categories,
+            "cat_fill": self.cat_fill,
+            "num_fill": self.num_fill.tolist(),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CompiledPreprocessor":
+        if d.get("categorical_cols") != CATEGORICAL_COLS or d.get("numeric_cols") != NUMERIC_COLS:
+            raise ValueError("Compiled preprocessor was built for a different feature set")
+        return cls(d["categories"], d["cat_fill"], d["num_fill"], d["mean"], d["scale"])
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledPreprocessor":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,94 @@
+# Content-addressed cache of the prepared training data.
+# Layout: <cache>/<key>/{feature_pipeline.pkl, reference_profile.json, X_trp.npy, X_valp.npy,
+#                        y_tr.npy, y_val.npy, idx_tr.npy, idx_val.npy}
+# The key hashes the data file bytes, the feature lists, the seed and the split size,
+# so a hit means the split and the fitted preprocessing are exactly what a fresh run
+# would produce.
+
+import hashlib, json, os, shutil
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .features import CATEGORICAL_COLS, NUMERIC_COLS, TARGET
+from .drift import ReferenceProfile
+
+CACHE_FORMAT = 2
+ARRAYS = ["X_trp", "X_valp", "y_tr", "y_val", "idx_tr", "idx_val"]
+
+
+def file_digest(path: str, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(block), b""):
+            h.update(b)
+    return h.hexdigest()
+
+
+def cache_key(data_path: str, seed: int, test_size: float) -> str:
+    import sklearn
+    spec = {
+        "format": CACHE_FORMAT,
+        "data": file_digest(data_path),
+        "categorical": CATEGORICAL_COLS,
+        "numeric": NUMERIC_COLS,
+        "target": TARGET,
+        "seed": seed,
+        "test_size": test_size,
+        # The fitted preprocessor is pickled; a different sklearn may not load it.
+        "sklearn": sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def load_prepared(root: str, key: str, mmap: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Prepared data for `key`, arrays memory-mapped read-only; None on a miss.
+    """
+    d = os.path.join(root, key)
+    if not os.path.isdir(d):
+        return None
+    from joblib import load
+    mode = "r" if mmap else None
+    try:
+        out: Dict[str, Any] = {k: np.load(os.path.join(d, f"{k}.npy"), mmap_mode=mode) for k in ARRAYS}
+        out["pre"] = load(os.path.join(d, "feature_pipeline.pkl"))
+        out["profile"] = ReferenceProfile.load(os.path.join(d, "reference_profile.json"))
+    except Exception:
+        return None
+    os.utime(d)  # recency for prune()
+    return out
+
+
+def save_prepared(root: str, key: str, prep: Dict[str, Any], keep: int = 3) -> str:
+    """
+    Write `prep` (the ARRAYS, the fitted "pre" and the drift "profile")
+    under `root`/`key`.
+    Written to a temp dir and renamed, so readers never see a partial entry.
+    """
+    from joblib import dump
+    dest = os.path.join(root, key)
+    tmp = dest + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for k in ARRAYS:
+        np.save(os.path.join(tmp, f"{k}.npy"), np.ascontiguousarray(prep[k]))
+    dump(prep["pre"], os.path.join(tmp, "feature_pipeline.pkl"))
+    prep["profile"].save(os.path.join(tmp, "reference_profile.json"))
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(tmp, dest)
+    prune(root, keep)
+    return dest
+
+
+def prune(root: str, keep: int) -> None:
+    """
+    Drop all but the `keep` most recently used entries.
+    """
+    if keep <= 0 or not os.path.isdir(root):
+        return
+    entries = [os.path.join(root, d) for d in os.listdir(root) if not d.endswith(".tmp")]
+    entries = [d for d in entries if os.path.isdir(d)]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for d in entries[keep:]:
+        shutil.rmtree(d, ignore_errors=True)
@@ -1,66 +1,421 @@
 # TODO: Implement PSI/KS drift calc.
 # CLI: python -m src.drift --ref data/churn_ref_sample.csv --new data/churn_shifted_sample.csv
+#      [--chunksize 100000] [--save-profile artifacts/reference_profile.json]
+#      python -m src.drift --ref-profile artifacts/reference_profile.json --new data/churn_shifted_sample.csv
+#      [--profile [spans,cprofile,tracemalloc]]  (see src/profiling.py)
+#
+# The reference is summarized once into a ReferenceProfile (PSI bin edges and
+# counts, category counts, an ECDF grid for KS); new data is then scored chunk
+# by chunk through a DriftAccumulator, so memory does not grow with its size.
+# Each chunk is binned for all features at once (numeric_counts,
+# category_counts) and PSI/KS are computed for all features at once
+# (psi_matrix, ks_matrix).
 
 import argparse, json, os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TYPE_CHECKING
 import numpy as np
-import pandas as pd
-from scipy.stats import ks_2samp
-from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from .features import ALLOWED_CATEGORIES, CATEGORICAL_COLS, NUMERIC_COLS, SEED
+from . import profiling
+from .profiling import span
+
+# pandas is imported where frames are read: the API imports this module for
+# ReferenceProfile/psi_from_counts and should not pay pandas' import time.
+if TYPE_CHECKING:
+    import pandas as pd
+
+PSI_EPS = 1e-6
+PROFILE_FORMAT = 1
+# Fixed bins for the predicted-probability distribution.
+PRED_EDGES = np.linspace(0.0, 1.0, 11)
+
+
+def psi_from_counts(r: np.ndarray, n: np.ndarray) -> float:
+    r = np.asarray(r, float) / max(float(np.sum(r)), 1.0)
+    n = np.asarray(n, float) / max(float(np.sum(n)), 1.0)
+    return float(np.sum((r - n) * np.log((r + PSI_EPS) / (n + PSI_EPS))))
+
+def quantile_cuts(ref: np.ndarray, bins: int = 10) -> np.ndarray:
+    qs = np.linspace(0, 1, bins + 1)
+    cuts = np.unique(np.quantile(ref, qs))
+    if len(cuts) < 3:
+        cuts = np.unique(np.concatenate([cuts, [cuts[-1] + 1e-9]]))
+    return cuts
 
 def psi_numeric(ref: np.ndarray, new: np.ndarray, bins: int = 10) -> float:
     ref = ref[~np.isnan(ref)]
     new = new[~np.isnan(new)]
     if len(ref) == 0 or len(new) == 0:
         return float("nan")
-    qs = np.linspace(0, 1, bins + 1)
-    cuts = np.unique(np.quantile(ref, qs))
-    if len(cuts) < 3:
-        cuts = np.unique(np.concatenate([cuts, [cuts[-1] + 1e-9]]))
+    cuts = quantile_cuts(ref, bins)
     r_hist, _ = np.histogram(ref, bins=cuts)
     n_hist, _ = np.histogram(new, bins=cuts)
-    r_perc = r_hist / max(r_hist.sum(), 1)
-    n_perc = n_hist / max(n_hist.sum(), 1)
-    eps = 1e-6
-    return float(np.sum((r_perc - n_perc) * np.log((r_perc + eps)/(n_perc + eps))))
-
-def psi_categorical(ref: pd.Series, new: pd.Series) -> float:
-    rc = ref.value_counts(dropna=False)
-    nc = new.value_counts(dropna=False)
-    cats = sorted(set(rc.index).union(nc.index))
-    r = np.array([rc.get(c, 0) for c in cats], float)
-    n = np.array([nc.get(c, 0) for c in cats], float)
-    r = r / max(r.sum(), 1.0)
-    n = n / max(n.sum(), 1.0)
-    eps = 1e-6
-    return float(np.sum((r - n) * np.log((r + eps)/(n + eps))))
+    return psi_from_counts(r_hist, n_hist)
+
+def psi_categorical(ref: "pd.Series", new: "pd.Series") -> float:
+    r, n = ref.value_counts(dropna=False).align(new.value_counts(dropna=False), fill_value=0)
+    return psi_from_counts(r.to_numpy(float), n.to_numpy(float))
+
+
+def _category_counts(s: "pd.Series") -> Dict[Optional[str], int]:
+    # Missing values are counted under None (JSON null) so they can drift too.
+    return {(None if k is None or k != k else str(k)): int(v) for k, v in s.value_counts(dropna=False).items()}
+
+def _merge_counts(into: Dict[Any, int], more: Dict[Any, int]) -> None:
+    for k, v in more.items():
+        into[k] = into.get(k, 0) + v
+
+def psi_from_category_counts(ref: Dict[Any, int], new: Dict[Any, int]) -> float:
+    cats = list(set(ref) | set(new))
+    return psi_from_counts(np.array([ref.get(c, 0) for c in cats], float),
+                           np.array([new.get(c, 0) for c in cats], float))
+
+def ks_from_grid(grid_cdf: np.ndarray, n_ref: int, le: np.ndarray, lt: np.ndarray, n_new: int) -> Optional[float]:
+    """
+    Two-sample KS statistic from counts on the reference grid: `grid_cdf[k]`
+    reference values <= grid[k], `le`/`lt` new values <= / < grid[k]. Exact
+    when the grid holds every distinct reference value; otherwise off by at
+    most the reference mass between neighbouring grid points.
+    """
+    if n_ref == 0 or n_new == 0:
+        return None
+    fr = grid_cdf / n_ref
+    fr_prev = np.concatenate([[0.0], fr[:-1]])
+    d = np.maximum(np.abs(fr - le / n_new), np.abs(fr_prev - lt / n_new))
+    return float(d.max()) if d.size else None
+
+
+# ---- batched kernels: every feature of a chunk at once ----------------------
+
+def pad_rows(rows: List[Any], dtype=np.float64) -> np.ndarray:
+    """Stack 1-D sequences of different lengths into a zero-padded matrix."""
+    out = np.zeros((len(rows), max((len(r) for r in rows), default=0)), dtype=dtype)
+    for j, r in enumerate(rows):
+        out[j, : len(r)] = r
+    return out
+
+def psi_matrix(R: np.ndarray, N: np.ndarray) -> np.ndarray:
+    """psi_from_counts for every row of two (features x bins) count matrices; zero padding adds nothing."""
+    r = R / np.maximum(R.sum(axis=1, keepdims=True), 1.0)
+    n = N / np.maximum(N.sum(axis=1, keepdims=True), 1.0)
+    return np.sum((r - n) * np.log((r + PSI_EPS) / (n + PSI_EPS)), axis=1)
+
+def ks_matrix(grid_cdf: np.ndarray, n_ref: np.ndarray, le: np.ndarray, lt: np.ndarray,
+              n_new: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    ks_from_grid for every row of (features x grid) matrices; `valid` marks
+    real grid points (the rest is padding). NaN where ks_from_grid gives None.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fr = grid_cdf / n_ref[:, None]
+        fr_prev = np.concatenate([np.zeros((len(fr), 1)), fr[:, :-1]], axis=1)
+        d = np.maximum(np.abs(fr - le / n_new[:, None]), np.abs(fr_prev - lt / n_new[:, None]))
+    d = np.where(valid, d, 0.0)
+    out = d.max(axis=1) if d.shape[1] else np.zeros(len(d))
+    out[(n_ref == 0) | (n_new == 0) | ~valid.any(axis=1)] = np.nan
+    return out
+
+def numeric_counts(X: np.ndarray, cuts: List[np.ndarray], grids: List[np.ndarray],
+                   counts: np.ndarray, le: np.ndarray, lt: np.ndarray) -> np.ndarray:
+    """
+    Add the PSI bin counts and KS grid counts of every column of X (rows x
+    features) to the (features x width) matrices `counts`, `le` and `lt`;
+    returns the non-missing values per column.
+
+    The chunk is sorted once, column-wise (NaN last), and the short cut and
+    grid arrays are searched into each sorted column, so the per-feature work
+    is O(bins + grid) rather than a pass over the rows. Bins follow
+    np.histogram (right-open, last bin closed, values outside the cuts
+    ignored); le[k] = #(x <= grid[k]), lt[k] = #(x < grid[k]).
+    """
+    S = np.sort(X.T, axis=1)
+    n = (~np.isnan(S)).sum(axis=1)
+    for j, (k, g) in enumerate(zip(cuts, grids)):
+        s = S[j, : n[j]]
+        if len(k):
+            pos = np.searchsorted(s, k, side="left")
+            pos[-1] = np.searchsorted(s, k[-1], side="right")
+            counts[j, : len(k) - 1] += np.diff(pos)
+        le[j, : len(g)] += np.searchsorted(s, g, side="right")
+        lt[j, : len(g)] += np.searchsorted(s, g, side="left")
+    return n
+
+def category_counts(df: "pd.DataFrame", cols: List[str]) -> Dict[str, Dict[Optional[str], int]]:
+    """
+    _category_counts for several columns with one weighted bincount. Each
+    column is hashed once (value_counts); its distinct values are then
+    integer-coded against ALLOWED_CATEGORIES plus a missing slot. Any other
+    value is kept under its own name, so unexpected categories still count.
+    """
+    import pandas as pd
+    out: Dict[str, Dict[Optional[str], int]] = {}
+    codes, weights, labels = [], [], []
+    for c in cols:
+        allowed = ALLOWED_CATEGORIES.get(c, [])
+        vc = df[c].value_counts(dropna=False)
+        code = pd.Index(allowed).get_indexer(vc.index)
+        code[vc.index.isna()] = len(allowed)
+        other = code < 0
+        out[c] = {str(k): int(v) for k, v in vc[other].items()}
+        codes.append(code[~other] + len(labels))
+        weights.append(vc.to_numpy()[~other])
+        labels += [(c, k) for k in allowed + [None]]
+    counts = np.bincount(np.concatenate(codes), np.concatenate(weights), len(labels)) if codes else []
+    for (c, k), v in zip(labels, counts):
+        if v:
+            out[c][k] = int(v)
+    return out
+
+
+class ReferenceProfile:
+    """
+    Everything drift needs from the reference data, in a small JSON file.
+
+    numeric[c]: PSI `cuts` and reference bin `counts`, a sorted KS `grid`
+    with reference `cdf` counts (count of values <= grid point) and `n`
+    non-missing values. categorical[c]: value counts (None = missing).
+    prediction: counts of validation-set probabilities over PRED_EDGES, set
+    by training once the model is fitted.
+    """
+
+    def __init__(self, numeric: Dict[str, Dict[str, Any]], categorical: Dict[str, Dict[Optional[str], int]],
+                 n_rows: int, bins: int = 10, prediction: Optional[List[int]] = None):
+        self.numeric = numeric
+        self.categorical = categorical
+        self.n_rows = n_rows
+        self.bins = bins
+        self.prediction = prediction
+
+    def set_prediction_reference(self, prob: np.ndarray) -> None:
+        self.prediction = np.histogram(np.asarray(prob, float), bins=PRED_EDGES)[0].tolist()
+
+    @classmethod
+    def from_chunks(cls, chunks: Callable[[], Iterable["pd.DataFrame"]], bins: int = 10,
+                    grid_size: int = 2048, sample_rows: int = 200_000, seed: int = SEED) -> "ReferenceProfile":
+        """
+        Build from `chunks()` (called twice). Pass 1 keeps a bounded row sample
+        for the cut points and category counts; pass 2 counts every value
+        against the fixed cuts/grid. Cuts match np.quantile on the full data
+        whenever it fits in `sample_rows`.
+        """
+        from .outofcore import RowReservoir
+        sample = RowReservoir(sample_rows, seed)
+        categorical: Dict[str, Dict[Optional[str], int]] = {c: {} for c in CATEGORICAL_COLS}
+        n_rows = 0
+        for df in _timed_chunks(chunks()):
+            with span("sample"):
+                n_rows += len(df)
+                sample.add(df[NUMERIC_COLS].reset_index(drop=True))
+                for c, cnt in category_counts(df, CATEGORICAL_COLS).items():
+                    _merge_counts(categorical[c], cnt)
+
+        numeric: Dict[str, Dict[str, Any]] = {}
+        for c in NUMERIC_COLS:
+            x = sample.rows[c].to_numpy(dtype=np.float64) if sample.rows is not None else np.empty(0)
+            x = np.sort(x[~np.isnan(x)])
+            if len(x) == 0:
+                numeric[c] = {"cuts": [], "counts": [], "grid": [], "cdf": [], "n": 0}
+                continue
+            grid = np.unique(x)
+            if len(grid) > grid_size:
+                grid = np.unique(np.quantile(x, np.linspace(0, 1, grid_size)))
+            cuts = quantile_cuts(x, bins)
+            numeric[c] = {"cuts": cuts, "counts": np.zeros(len(cuts) - 1, np.int64),
+                          "grid": grid, "cdf": np.zeros(len(grid), np.int64), "n": 0}
+
+        cuts = [np.asarray(numeric[c]["cuts"], np.float64) for c in NUMERIC_COLS]
+        grids = [np.asarray(numeric[c]["grid"], np.float64) for c in NUMERIC_COLS]
+        counts = pad_rows([np.zeros(max(len(k) - 1, 0)) for k in cuts], np.int64)
+        le = np.zeros(pad_rows(grids).shape, np.int64)
+        n = np.zeros(len(NUMERIC_COLS), np.int64)
+        for df in _timed_chunks(chunks()):
+            with span("histogram"):
+                X = df[NUMERIC_COLS].to_numpy(dtype=np.float64)
+                n += numeric_counts(X, cuts, grids, counts, le, np.zeros_like(le))
+
+        for j, c in enumerate(NUMERIC_COLS):
+            p = numeric[c]
+            p["counts"] = counts[j, : len(cuts[j]) - 1] if len(cuts[j]) else []
+            p["cdf"] = le[j, : len(grids[j])]
+            p["n"] = int(n[j]) if len(grids[j]) else 0
+            for k in ("cuts", "counts", "grid", "cdf"):
+                p[k] = np.asarray(p[k]).tolist()
+        return cls(numeric, categorical, n_rows, bins)
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", **kw) -> "ReferenceProfile":
+        return cls.from_chunks(lambda: [df], **kw)
+
+    @classmethod
+    def from_csv(cls, path: str, chunksize: int = 100_000, **kw) -> "ReferenceProfile":
+        return cls.from_chunks(lambda: read_feature_chunks(path, chunksize), **kw)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": PROFILE_FORMAT,
+            "bins": self.bins,
+            "n_rows": self.n_rows,
+            "numeric": self.numeric,
+            # JSON object keys must be strings; keep missing as an explicit pair list.
+            "categorical": {c: [[k, v] for k, v in cnt.items()] for c, cnt in self.categorical.items()},
+            "prediction": self.prediction,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ReferenceProfile":
+        if d.get("format") != PROFILE_FORMAT:
+            raise ValueError(f"Unsupported reference profile format: {d.get('format')}")
+        categorical = {c: {k: int(v) for k, v in pairs} for c, pairs in d["categorical"].items()}
+        return cls(d["numeric"], categorical, int(d["n_rows"]), int(d["bins"]), d.get("prediction"))
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "ReferenceProfile":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class DriftAccumulator:
+    """
+    Counts of new data against a ReferenceProfile. `update` per chunk (or per
+    micro-batch of a stream), `merge` partial accumulators, `report` at any
+    time; state is O(bins + grid + categories) per feature.
+    """
+
+    def __init__(self, profile: ReferenceProfile):
+        self.profile = profile
+        self.n_rows = 0
+        # Numeric state is one row per feature of zero-padded matrices, so a
+        # chunk is binned, merged and scored for all features at once.
+        self._cols = list(profile.numeric)
+        num = [profile.numeric[c] for c in self._cols]
+        self._cuts = [np.asarray(p["cuts"], dtype=np.float64) for p in num]
+        self._grid = [np.asarray(p["grid"], dtype=np.float64) for p in num]
+        self._ref_counts = pad_rows([p["counts"] for p in num])
+        self._ref_cdf = pad_rows([p["cdf"] for p in num])
+        self._ref_n = np.array([p["n"] for p in num], dtype=np.float64)
+        self._valid = pad_rows([np.ones(len(g)) for g in self._grid], bool)
+        self.counts = np.zeros(self._ref_counts.shape, np.int64)
+        self.le = np.zeros(self._ref_cdf.shape, np.int64)
+        self.lt = np.zeros(self._ref_cdf.shape, np.int64)
+        self.n = np.zeros(len(self._cols), np.int64)
+        self.categorical: Dict[str, Dict[Optional[str], int]] = {c: {} for c in profile.categorical}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only the counts travel between processes; the receiver merges them
+        # into an accumulator that already holds the profile.
+        return {k: v for k, v in self.__dict__.items() if k != "profile" and not k.startswith("_")}
+
+    def update(self, df: "pd.DataFrame") -> "DriftAccumulator":
+        self.n_rows += len(df)
+        if self._cols:
+            X = df[self._cols].to_numpy(dtype=np.float64)
+            self.n += numeric_counts(X, self._cuts, self._grid, self.counts, self.le, self.lt)
+        for c, cnt in category_counts(df, list(self.categorical)).items():
+            _merge_counts(self.categorical[c], cnt)
+        return self
+
+    def merge(self, other: "DriftAccumulator") -> "DriftAccumulator":
+        self.n_rows += other.n_rows
+        self.n += other.n
+        self.counts += other.counts
+        self.le += other.le
+        self.lt += other.lt
+        for c in self.categorical:
+            _merge_counts(self.categorical[c], other.categorical[c])
+        return self
+
+    def feature_stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        # One PSI call over numeric and categorical rows together.
+        cats = {c: list(set(ref) | set(self.categorical[c])) for c, ref in self.profile.categorical.items()}
+        R = pad_rows(list(self._ref_counts) + [[self.profile.categorical[c].get(k, 0) for k in ks]
+                                               for c, ks in cats.items()])
+        N = pad_rows(list(self.counts) + [[self.categorical[c].get(k, 0) for k in ks] for c, ks in cats.items()])
+        psi = psi_matrix(R, N)
+        ks = ks_matrix(self._ref_cdf, self._ref_n, self.le, self.lt, self.n.astype(np.float64), self._valid)
+
+        feats: Dict[str, Dict[str, Optional[float]]] = {}
+        for j, c in enumerate(self._cols):
+            if self._ref_n[j] == 0 or self.n[j] == 0:
+                feats[c] = {"psi": float("nan"), "ks": None}
+            else:
+                feats[c] = {"psi": float(psi[j]), "ks": None if np.isnan(ks[j]) else float(ks[j])}
+        for i, c in enumerate(cats):
+            feats[c] = {"psi": float(psi[len(self._cols) + i]), "ks": None}
+        return feats
+
+    def report(self, threshold: float = 0.2) -> Dict[str, Any]:
+        return drift_report(self.feature_stats(), threshold)
+
+
+def drift_report(feats: Dict[str, Dict[str, Optional[float]]], threshold: float) -> Dict[str, Any]:
+    overall = any(v["psi"] is not None and v["psi"] >= threshold for v in feats.values())
+    return {
+        "threshold": threshold,
+        "overall_drift": bool(overall),
+        "features": {k: round(v["psi"], 4) if v["psi"] is not None else None for k, v in feats.items()},
+        "ks": {k: (round(v["ks"], 4) if isinstance(v["ks"], float) else None) for k, v in feats.items()},
+    }
+
+
+def read_feature_chunks(path: str, chunksize: int) -> Iterator["pd.DataFrame"]:
+    import pandas as pd
+    return pd.read_csv(path, usecols=CATEGORICAL_COLS + NUMERIC_COLS, chunksize=chunksize)
+
+def _timed_chunks(chunks: Iterable["pd.DataFrame"]) -> Iterator["pd.DataFrame"]:
+    # Reading each chunk (the CSV parse, for read_feature_chunks) is a "read_csv" span.
+    if not profiling.active():
+        yield from chunks
+        return
+    it = iter(chunks)
+    while True:
+        with span("read_csv"):
+            df = next(it, None)
+        if df is None:
+            return
+        yield df
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--ref", required=True)
+    ref = ap.add_mutually_exclusive_group(required=True)
+    ref.add_argument("--ref", help="Reference CSV")
+    ref.add_argument("--ref-profile", help="Precomputed reference profile (written by src.train)")
     ap.add_argument("--new", required=True)
     ap.add_argument("--outdir", default="artifacts")
     ap.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--chunksize", type=int, default=100_000,
+                    help="Rows per chunk when reading --ref/--new")
+    ap.add_argument("--save-profile", default=None,
+                    help="Also write the reference profile (JSON) to this path")
+    profiling.add_arguments(ap)
     args = ap.parse_args()
+    try:
+        prof = profiling.from_args("drift", args)
+    except ValueError as e:
+        ap.error(str(e))
 
     os.makedirs(args.outdir, exist_ok=True)
-    ref = pd.read_csv(args.ref)
-    new = pd.read_csv(args.new)
-
-    feats = {}
-    for c in NUMERIC_COLS:
-        psi = psi_numeric(ref[c].to_numpy(), new[c].to_numpy())
-        ks = ks_2samp(ref[c].to_numpy(), new[c].to_numpy()).statistic
-        feats[c] = {"psi": psi, "ks": float(ks)}
-    for c in CATEGORICAL_COLS:
-        feats[c] = {"psi": psi_categorical(ref[c], new[c]), "ks": None}
-
-    overall = any(v["psi"] is not None and v["psi"] >= args.threshold for v in feats.values())
-    out = {
-        "threshold": args.threshold,
-        "overall_drift": bool(overall),
-        "features": {k: round(v["psi"], 4) if v["psi"] is not None else None for k, v in feats.items()},
-        "ks": {k: (round(v["ks"], 4) if isinstance(v["ks"], float) else None) for k, v in feats.items()},
-    }
+    with span("reference_profile"):
+        if args.ref_profile:
+            profile = ReferenceProfile.load(args.ref_profile)
+        else:
+            profile = ReferenceProfile.from_csv(args.ref, args.chunksize)
+    if args.save_profile:
+        profile.save(args.save_profile)
+
+    acc = DriftAccumulator(profile)
+    with span("new_data"):
+        for chunk in _timed_chunks(read_feature_chunks(args.new, args.chunksize)):
+            with span("histogram"):
+                acc.update(chunk)
+
+    with span("report"):
+        out = acc.report(args.threshold)
+    if prof is not None:
+        out["profile"] = prof.finish()
     with open(os.path.join(args.outdir, "drift_report.json"), "w", encoding="utf-8") as f:
         json.dump(out, f, indent=2)
     print(json.dumps(out, indent=2))
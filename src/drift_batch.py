@@ -0,0 +1,176 @@
+# Batch drift over many time windows and segments in parallel.
+# CLI: python -m src.drift_batch --ref-profile artifacts/reference_profile.json --partitions data/daily/
+#      python -m src.drift_batch --ref data/churn_ref_sample.csv --new traffic.csv --date-col ts --freq D \
+#             --segments plan_type,contract_type --workers 8
+#
+# Every window/segment is scored against one set of reference profiles (built
+# once), with DriftAccumulator counts computed in worker processes and merged
+# in the parent. Writes <outdir>/drift_batch_report.json and
+# <outdir>/drift_timeseries.jsonl (one drift_report-shaped line per window).
+
+import argparse, json, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+
+from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from .drift import DriftAccumulator, ReferenceProfile
+
+ALL = "all"
+Key = Tuple[str, str]  # (window, segment)
+
+
+def segment_name(col: str, value: Any) -> str:
+    return f"{col}={value}"
+
+
+def segment_keys(df: pd.DataFrame, segments: List[str]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    yield ALL, df
+    for col in segments:
+        for value, part in df.groupby(col, dropna=False, sort=False):
+            yield segment_name(col, value), part
+
+
+def list_partitions(root: str) -> List[Tuple[str, str]]:
+    """
+    (window, path) for every CSV below `root`; the window is the path
+    relative to `root` without extension (e.g. "2025-08-07" or "date=2025-08-07/part-0").
+    """
+    out = []
+    for d, _, files in os.walk(root):
+        for f in files:
+            if f.endswith(".csv"):
+                path = os.path.join(d, f)
+                out.append((os.path.splitext(os.path.relpath(path, root))[0], path))
+    return sorted(out)
+
+
+# Per-process reference profiles (set once by the pool initializer).
+_profiles: Dict[str, ReferenceProfile] = {}
+
+def _init_worker(profiles: Dict[str, Dict[str, Any]]) -> None:
+    _profiles.update({k: ReferenceProfile.from_dict(v) for k, v in profiles.items()})
+
+def _profile_for(segment: str) -> ReferenceProfile:
+    return _profiles.get(segment, _profiles[ALL])
+
+def _accumulate(window_frames: Iterator[Tuple[str, pd.DataFrame]], segments: List[str]) -> Dict[Key, DriftAccumulator]:
+    out: Dict[Key, DriftAccumulator] = {}
+    for window, df in window_frames:
+        for seg, part in segment_keys(df, segments):
+            key = (window, seg)
+            if key not in out:
+                out[key] = DriftAccumulator(_profile_for(seg))
+            out[key].update(part)
+    return out
+
+def _partition_task(window: str, path: str, segments: List[str], chunksize: int) -> Dict[Key, DriftAccumulator]:
+    return _accumulate(((window, c) for c in _read(path, chunksize)), segments)
+
+def _frame_task(df: pd.DataFrame, window_col: str, segments: List[str]) -> Dict[Key, DriftAccumulator]:
+    return _accumulate(((str(w), g) for w, g in df.groupby(window_col, sort=False)), segments)
+
+def _read(path: str, chunksize: int, extra: Optional[List[str]] = None):
+    cols = CATEGORICAL_COLS + NUMERIC_COLS + (extra or [])
+    return pd.read_csv(path, usecols=cols, chunksize=chunksize)
+
+
+def build_profiles(args, segments: List[str]) -> Dict[str, ReferenceProfile]:
+    """
+    The global profile, plus one per segment value when the reference CSV is
+    available, so a segment is compared with the same segment of the
+    reference. Segments without their own profile use the global one.
+    """
+    if args.ref_profile:
+        return {ALL: ReferenceProfile.load(args.ref_profile)}
+    profiles = {ALL: ReferenceProfile.from_csv(args.ref, args.chunksize)}
+    for col in segments:
+        for value in profiles[ALL].categorical[col]:
+            if value is None:
+                continue
+            chunks = lambda col=col, value=value: (c[c[col] == value] for c in _read(args.ref, args.chunksize))
+            profiles[segment_name(col, value)] = ReferenceProfile.from_chunks(chunks)
+    return profiles
+
+
+def run(args) -> Dict[str, Any]:
+    segments = [c for c in (args.segments or "").split(",") if c]
+    profiles = build_profiles(args, segments)
+    merged: Dict[Key, DriftAccumulator] = {}
+
+    def collect(part: Dict[Key, DriftAccumulator]) -> None:
+        for key, acc in part.items():
+            if key not in merged:
+                merged[key] = DriftAccumulator(profiles.get(key[1], profiles[ALL]))
+            merged[key].merge(acc)
+
+    # spawn, not fork: see src/score.py.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=({k: p.to_dict() for k, p in profiles.items()},)) as ex:
+        if args.partitions:
+            futs = [ex.submit(_partition_task, w, p, segments, args.chunksize)
+                    for w, p in list_partitions(args.partitions)]
+        else:
+            futs = []
+            for chunk in _read(args.new, args.chunksize, [args.date_col]):
+                ts = pd.to_datetime(chunk[args.date_col], errors="coerce")
+                chunk = chunk.assign(_window=ts.dt.to_period(args.freq).astype(str)).drop(columns=[args.date_col])
+                futs.append(ex.submit(_frame_task, chunk, "_window", segments))
+                # Bound parent memory: wait on the oldest chunks past 2 per worker.
+                while len(futs) > 2 * args.workers:
+                    collect(futs.pop(0).result())
+        for f in futs:
+            collect(f.result())
+
+    results = []
+    for (window, seg), acc in sorted(merged.items()):
+        rep = acc.report(args.threshold)
+        results.append({"window": window, "segment": seg, "rows": acc.n_rows,
+                        "reference": seg if seg in profiles else ALL, **rep})
+    windows = sorted({r["window"] for r in results})
+    return {
+        "threshold": args.threshold,
+        "windows": windows,
+        "segments": [ALL] + sorted({r["segment"] for r in results} - {ALL}),
+        "drifted_windows": [r["window"] for r in results if r["segment"] == ALL and r["overall_drift"]],
+        "results": results,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ref = ap.add_mutually_exclusive_group(required=True)
+    ref.add_argument("--ref", help="Reference CSV")
+    ref.add_argument("--ref-profile", help="Precomputed reference profile (written by src.train)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--partitions", help="Directory of CSV partitions, one window per file")
+    src.add_argument("--new", help="Single CSV split into windows by --date-col")
+    ap.add_argument("--date-col", default=None)
+    ap.add_argument("--freq", default="D", help="pandas period for --date-col windows (D, W, M, h)")
+    ap.add_argument("--segments", default="", help="Comma-separated segment columns, e.g. plan_type,contract_type")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--outdir", default="artifacts")
+    args = ap.parse_args()
+    if args.new and not args.date_col:
+        ap.error("--new requires --date-col")
+    bad = [c for c in args.segments.split(",") if c and c not in CATEGORICAL_COLS]
+    if bad:
+        ap.error(f"--segments must be categorical feature columns, got {bad}")
+
+    report = run(args)
+    os.makedirs(args.outdir, exist_ok=True)
+    with open(os.path.join(args.outdir, "drift_batch_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    # Time series for src.agent_monitor: one drift_report-shaped line per window.
+    with open(os.path.join(args.outdir, "drift_timeseries.jsonl"), "w", encoding="utf-8") as f:
+        for r in report["results"]:
+            if r["segment"] == ALL:
+                f.write(json.dumps(r) + "\n")
+    print(json.dumps({k: report[k] for k in ("windows", "segments", "drifted_windows")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 # TODO: Implement sklearn ColumnTransformer
 
-from typing import List
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.impute import SimpleImputer
+from typing import List, TYPE_CHECKING
+
+# sklearn is imported inside the builders: the serving path only needs the
+# column constants below and should not pay sklearn's import time.
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
 
 SEED = 42
 
@@ -30,7 +31,17 @@ ALLOWED_CATEGORIES = {
     "is_promo_user": ["Yes", "No"],
 }
 
-def build_preprocessor() -> ColumnTransformer:
+# Inclusive [low, high] bounds enforced on request payloads.
+NUMERIC_BOUNDS = {
+    "discount_pct": (0.0, 100.0),
+}
+
+def build_preprocessor() -> "ColumnTransformer":
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from sklearn.impute import SimpleImputer
+
     cat = Pipeline([
         ("impute", SimpleImputer(strategy="most_frequent")),
         ("ohe", OneHotEncoder(handle_unknown="ignore", sparse_output=False)),
@@ -44,7 +55,7 @@ def build_preprocessor() -> ColumnTransformer:
         ("num", num, NUMERIC_COLS),
     ], remainder="drop", verbose_feature_names_out=False)
 
-def get_feature_names(pre: ColumnTransformer) -> List[str]:
+def get_feature_names(pre: "ColumnTransformer") -> List[str]:
     """
     Return feature names from a fitted ColumnTransformer.
     """
@@ -0,0 +1,273 @@
+# Append-only metrics-history store for the agent monitor.
+# CLI: python -m src.history --store artifacts/history --ingest data/metrics_history.jsonl
+#      python -m src.history --store artifacts/history --compact-before 2025-08-14 [--resolution day]
+#
+# <store>/
+#   seg-000001.jsonl ...   append-only segments of at most `segment_rows` records
+#   checkpoint.json        segment index (ts range, rows, bytes), rolling tails
+#                          and counters, byte offsets of ingested source files
+#
+# The checkpoint is replaced atomically after every append, and bytes past a
+# segment's recorded size are discarded on open, so a crash loses at most
+# the batch being appended. The monitor only reads the checkpoint: its cost
+# does not depend on how long the history is.
+
+import argparse, json, os, statistics, sys
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+CHECKPOINT = "checkpoint.json"
+STORE_FORMAT = 1
+# Timestamp prefix length per compaction resolution (ISO 8601 "ts" fields).
+RESOLUTIONS = {"hour": 13, "day": 10, "month": 7}
+
+
+def _metric_items(rec: Dict[str, Any]) -> Iterator:
+    for k, v in rec.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield k, v
+
+
+def read_new_records(path: str, source: Optional[Dict[str, int]] = None):
+    """
+    JSON-object lines appended to `path` since `source` (the position
+    returned by the previous call; None reads from the start). A truncated
+    or replaced file is read from the start; a trailing partial line is left
+    for the next call. Returns (records, bad line count, new position).
+    """
+    st = os.stat(path)
+    offset = source["offset"] if source and source["inode"] == st.st_ino and st.st_size >= source["offset"] else 0
+    records, bad = [], 0
+    if st.st_size == offset:
+        return records, bad, {"offset": offset, "inode": st.st_ino}
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # partial line: still being written
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                rec = None
+            if isinstance(rec, dict):
+                records.append(rec)
+            else:
+                bad += 1
+    return records, bad, {"offset": offset, "inode": st.st_ino}
+
+
+class HistoryStore:
+    """
+    Metrics records (dicts with an ISO "ts") in append-only JSONL segments.
+
+    Besides the segments, the checkpoint keeps the last `tail` values of
+    every numeric field and per-field counters, updated as records arrive,
+    so `tail`/`median` never touch the segments. `read(since, until)` uses
+    the per-segment ts range to open only the segments that overlap.
+    """
+
+    def __init__(self, root: str, segment_rows: int = 10_000, tail: int = 7):
+        self.root = root
+        self.segment_rows = segment_rows
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, CHECKPOINT)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                ck = json.load(f)
+            if ck.get("format") != STORE_FORMAT:
+                raise ValueError(f"Unsupported history store format: {ck.get('format')}")
+        else:
+            ck = {"segments": [], "tail": tail, "tails": {}, "counts": {}, "rows": 0,
+                  "bad_lines": 0, "sources": {}, "next_segment": 1}
+        self.segments: List[Dict[str, Any]] = ck["segments"]
+        self.tail_size = int(ck["tail"])
+        self.tails: Dict[str, Deque[float]] = {k: deque(v, maxlen=self.tail_size) for k, v in ck["tails"].items()}
+        self.counts: Dict[str, int] = ck["counts"]
+        self.rows = int(ck["rows"])
+        self.bad_lines = int(ck["bad_lines"])
+        self.sources: Dict[str, Dict[str, int]] = ck["sources"]
+        self._next = int(ck["next_segment"])
+        self._recover()
+
+    def _recover(self) -> None:
+        # Drop bytes appended after the last checkpoint (an interrupted append).
+        for seg in self.segments:
+            path = os.path.join(self.root, seg["name"])
+            if os.path.getsize(path) > seg["bytes"]:
+                with open(path, "r+b") as f:
+                    f.truncate(seg["bytes"])
+
+    def _checkpoint(self) -> None:
+        ck = {"format": STORE_FORMAT, "segments": self.segments, "tail": self.tail_size,
+              "tails": {k: list(v) for k, v in self.tails.items()}, "counts": self.counts,
+              "rows": self.rows, "bad_lines": self.bad_lines, "sources": self.sources,
+              "next_segment": self._next}
+        path = os.path.join(self.root, CHECKPOINT)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(ck, f)
+        os.replace(path + ".tmp", path)
+
+    def _new_segment(self) -> Dict[str, Any]:
+        seg = {"name": f"seg-{self._next:06d}.jsonl", "first_ts": None, "last_ts": None, "rows": 0, "bytes": 0}
+        self._next += 1
+        self.segments.append(seg)
+        open(os.path.join(self.root, seg["name"]), "wb").close()
+        return seg
+
+    def _active_segment(self) -> Dict[str, Any]:
+        last = self.segments[-1] if self.segments else None
+        if last is None or last["rows"] >= self.segment_rows or last.get("compacted"):
+            return self._new_segment()
+        return last
+
+    # ---- writing ----------------------------------------------------------
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        n = self._write(records)
+        self._checkpoint()
+        return n
+
+    def _write(self, records: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        seg, f = None, None
+        try:
+            for rec in records:
+                if seg is None or seg["rows"] >= self.segment_rows:
+                    if f is not None:
+                        f.close()
+                    seg = self._active_segment()
+                    f = open(os.path.join(self.root, seg["name"]), "ab")
+                line = (json.dumps(rec) + "\n").encode("utf-8")
+                f.write(line)
+                ts = rec.get("ts")
+                if ts is not None:
+                    seg["first_ts"] = ts if seg["first_ts"] is None else min(seg["first_ts"], ts)
+                    seg["last_ts"] = ts if seg["last_ts"] is None else max(seg["last_ts"], ts)
+                seg["rows"] += 1
+                seg["bytes"] += len(line)
+                for k, v in _metric_items(rec):
+                    self.tails.setdefault(k, deque(maxlen=self.tail_size)).append(v)
+                    self.counts[k] = self.counts.get(k, 0) + 1
+                self.rows += 1
+                n += 1
+        finally:
+            if f is not None:
+                f.close()
+        return n
+
+    def ingest_jsonl(self, path: str) -> int:
+        """
+        Append the complete lines added to `path` since the last call (see
+        read_new_records). Lines that are not JSON objects count in `bad_lines`.
+        """
+        key = os.path.abspath(path)
+        records, bad, self.sources[key] = read_new_records(path, self.sources.get(key))
+        self.bad_lines += bad
+        n = self._write(records)
+        self._checkpoint()
+        return n
+
+    # ---- reading ----------------------------------------------------------
+
+    def tail(self, metric: str) -> List[float]:
+        return list(self.tails.get(metric, ()))
+
+    def median(self, metric: str) -> float:
+        vals = self.tails.get(metric)
+        return statistics.median(vals) if vals else float("nan")
+
+    def read(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Records with since <= ts < until, opening only overlapping segments."""
+        for seg in self.segments:
+            if seg["rows"] == 0:
+                continue
+            if since is not None and seg["last_ts"] is not None and seg["last_ts"] < since:
+                continue
+            if until is not None and seg["first_ts"] is not None and seg["first_ts"] >= until:
+                continue
+            with open(os.path.join(self.root, seg["name"]), "rb") as f:
+                data = f.read(seg["bytes"])
+            for line in data.splitlines():
+                rec = json.loads(line)
+                ts = rec.get("ts")
+                if (since is None or (ts is not None and ts >= since)) and \
+                        (until is None or (ts is not None and ts < until)):
+                    yield rec
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": self.rows, "stored_rows": sum(s["rows"] for s in self.segments),
+                "segments": len(self.segments), "bad_lines": self.bad_lines,
+                "first_ts": min((s["first_ts"] for s in self.segments if s["first_ts"]), default=None),
+                "last_ts": max((s["last_ts"] for s in self.segments if s["last_ts"]), default=None),
+                "counts": self.counts}
+
+    # ---- compaction -------------------------------------------------------
+
+    def compact(self, before: str, resolution: str = "day") -> int:
+        """
+        Replace the full segments that end before `before` with one segment
+        holding a record per `resolution` period: the period start as "ts",
+        the median of every numeric field and the source row count "n".
+        Rolling tails and counters are unaffected. Returns rows removed.
+        """
+        width = RESOLUTIONS[resolution]
+        old = [s for s in self.segments[:-1] if s["rows"] and s["last_ts"] is not None and s["last_ts"] < before]
+        if not old:
+            return 0
+        periods: Dict[str, Dict[str, List[float]]] = {}
+        for seg in old:
+            with open(os.path.join(self.root, seg["name"]), "rb") as f:
+                for line in f.read(seg["bytes"]).splitlines():
+                    rec = json.loads(line)
+                    p = periods.setdefault(str(rec.get("ts", ""))[:width], {})
+                    p.setdefault("n", []).append(rec.get("n", 1))
+                    for k, v in _metric_items(rec):
+                        if k != "n":
+                            p.setdefault(k, []).append(v)
+        out = [{"ts": ts, **{k: statistics.median(v) for k, v in p.items() if k != "n"}, "n": sum(p["n"])}
+               for ts, p in sorted(periods.items())]
+
+        name = f"seg-{self._next:06d}.jsonl"
+        self._next += 1
+        data = b"".join((json.dumps(r) + "\n").encode("utf-8") for r in out)
+        with open(os.path.join(self.root, name + ".tmp"), "wb") as f:
+            f.write(data)
+        os.replace(os.path.join(self.root, name + ".tmp"), os.path.join(self.root, name))
+        seg = {"name": name, "first_ts": out[0]["ts"], "last_ts": out[-1]["ts"], "rows": len(out),
+               "bytes": len(data), "compacted": resolution}
+        # The compacted segment takes the place of the first one it replaces.
+        first = self.segments.index(old[0])
+        self.segments = [s for s in self.segments if s not in old]
+        self.segments.insert(first, seg)
+        self._checkpoint()
+        for s in old:
+            os.remove(os.path.join(self.root, s["name"]))
+        return sum(s["rows"] for s in old) - len(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store", required=True)
+    ap.add_argument("--ingest", default=None, help="JSONL file to ingest incrementally")
+    ap.add_argument("--compact-before", default=None, help="Compact segments ending before this ts")
+    ap.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="day")
+    ap.add_argument("--segment-rows", type=int, default=10_000)
+    args = ap.parse_args()
+
+    store = HistoryStore(args.store, segment_rows=args.segment_rows)
+    out: Dict[str, Any] = {}
+    if args.ingest:
+        out["ingested"] = store.ingest_jsonl(args.ingest)
+    if args.compact_before:
+        out["compacted_rows"] = store.compact(args.compact_before, args.resolution)
+    out.update(store.stats())
+    json.dump(out, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
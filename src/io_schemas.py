@@ -1,7 +1,9 @@
 # TODO: Pydantic schemas for /predict
 
-from typing import List, Literal
+from typing import Any, Dict, List, Literal, Tuple
+import numpy as np
 from pydantic import BaseModel, field_validator
+from .features import ALLOWED_CATEGORIES, CATEGORICAL_COLS, NUMERIC_BOUNDS, NUMERIC_COLS
 
 class RowIn(BaseModel):
     plan_type: Literal["Basic","Standard","Pro"]
@@ -20,13 +22,108 @@ class RowIn(BaseModel):
     @field_validator("discount_pct")
     @classmethod
     def pct_bounds(cls, v):
-        if v < 0 or v > 100:
+        lo, hi = NUMERIC_BOUNDS["discount_pct"]
+        if v < lo or v > hi:
             raise ValueError("discount_pct must be in [0, 100]")
         return v
 
 class PredictRequest(BaseModel):
     rows: List[RowIn]
 
+class ColumnarPredictRequest(BaseModel):
+    """
+    One array per feature, e.g. {"columns": {"plan_type": [...], ...}}.
+    Only the outer shape is checked by pydantic; values are checked in bulk
+    by `validate_columns`.
+    """
+    columns: Dict[str, List[Any]]
+
 class PredictResponse(BaseModel):
     prob: List[float]
     cls: List[int]
+
+class Reason(BaseModel):
+    feature: str
+    contribution: float
+
+class ExplainRow(BaseModel):
+    prob: float
+    cls: int
+    base_value: float
+    contributions: Dict[str, float]
+    top: List[Reason]
+
+class ExplainResponse(BaseModel):
+    units: str
+    features: List[str]
+    rows: List[ExplainRow]
+
+# Cap per-column error entries so a bad million-row payload stays a small response.
+MAX_ERRORS_PER_COLUMN = 10
+
+def validate_columns(columns: Dict[str, List[Any]]) -> Tuple[Dict[str, np.ndarray], List[Dict[str, Any]]]:
+    """
+    Vectorized equivalent of the RowIn checks for a columnar payload.
+
+    Returns ({feature: array}, errors); errors use the pydantic error layout
+    (type/loc/msg/input) so they render like the /predict 400 response.
+    """
+    errors: List[Dict[str, Any]] = []
+    out: Dict[str, np.ndarray] = {}
+    base = ("body", "columns")
+
+    missing = [c for c in CATEGORICAL_COLS + NUMERIC_COLS if c not in columns]
+    for c in missing:
+        errors.append({"type": "missing", "loc": base + (c,), "msg": "Field required", "input": None})
+    if missing:
+        return out, errors
+
+    n = len(columns[CATEGORICAL_COLS[0]])
+    for c in CATEGORICAL_COLS + NUMERIC_COLS:
+        if len(columns[c]) != n:
+            errors.append({"type": "value_error", "loc": base + (c,),
+                           "msg": f"Value error, expected {n} values, got {len(columns[c])}",
+                           "input": len(columns[c])})
+    if errors:
+        return out, errors
+
+    for c in CATEGORICAL_COLS:
+        allowed = ALLOWED_CATEGORIES[c]
+        arr = np.asarray(columns[c], dtype=object)
+        ok = np.zeros(n, dtype=bool)
+        for cat in allowed:
+            ok |= arr == cat
+        if not ok.all():
+            expected = ", ".join(repr(a) for a in allowed[:-1]) + f" or {allowed[-1]!r}"
+            for i in np.flatnonzero(~ok)[:MAX_ERRORS_PER_COLUMN]:
+                errors.append({"type": "literal_error", "loc": base + (c, int(i)),
+                               "msg": f"Input should be {expected}", "input": arr[i]})
+        out[c] = arr
+
+    for c in NUMERIC_COLS:
+        vals = columns[c]
+        try:
+            arr = np.asarray(vals, dtype=np.float64)
+            bad = np.isnan(arr)  # JSON has no NaN, so these were nulls
+        except (TypeError, ValueError):
+            arr = None
+            bad = np.array([not _is_number(v) for v in vals], dtype=bool)
+        for i in np.flatnonzero(bad)[:MAX_ERRORS_PER_COLUMN]:
+            errors.append({"type": "float_type", "loc": base + (c, int(i)),
+                           "msg": "Input should be a valid number", "input": vals[i]})
+        if arr is None or bad.any():
+            continue
+        if c in NUMERIC_BOUNDS:
+            lo, hi = NUMERIC_BOUNDS[c]
+            oob = (arr < lo) | (arr > hi)
+            for i in np.flatnonzero(oob)[:MAX_ERRORS_PER_COLUMN]:
+                errors.append({"type": "value_error", "loc": base + (c, int(i)),
+                               "msg": f"Value error, {c} must be in [{lo:g}, {hi:g}]", "input": float(arr[i])})
+        out[c] = arr
+    return out, errors
+
+def _is_number(v: Any) -> bool:
+    try:
+        return float(v) == float(v)
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,195 @@
+# Live drift monitoring inside the API: sliding-window histograms of the rows
+# and predicted probabilities that /predict already sees, binned with the
+# training ReferenceProfile. Nothing per row is stored; see GET /drift.
+
+import threading, time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from .drift import PRED_EDGES, ReferenceProfile, psi_from_counts, psi_from_category_counts
+
+
+class LiveDriftMonitor:
+    """
+    Time-bucketed counters over a sliding window.
+
+    Every feature (and the prediction) owns a slice of one flat counter
+    vector: numeric features get the profile's PSI bins, categoricals one
+    slot per reference category plus "missing" and "other". A ring of
+    `window_s / bucket_s` such vectors holds the window.
+
+    Small batches (the common single-row /predict) are binned in plain
+    Python and their slot indices appended to a short pending list that is
+    folded into the bucket with one bincount; large batches are binned with
+    one vectorized pass. Either way the cost per row is constant.
+    """
+
+    SMALL_BATCH = 32
+    FLUSH_SLOTS = 8192
+
+    def __init__(self, profile: ReferenceProfile, window_s: float = 3600.0, bucket_s: float = 60.0,
+                 clock=time.monotonic):
+        self.profile = profile
+        self.window_s = window_s
+        self.bucket_s = bucket_s
+        self.clock = clock
+
+        # Numeric cuts padded to a common width (+inf) for one 2-D comparison.
+        self._cuts = [np.asarray(profile.numeric[c]["cuts"], dtype=np.float64) for c in NUMERIC_COLS]
+        self._nbins = np.array([max(len(k) - 1, 0) for k in self._cuts])
+        width = max(len(k) for k in self._cuts)
+        self._padded = np.full((len(NUMERIC_COLS), width), np.inf)
+        for j, k in enumerate(self._cuts):
+            self._padded[j, : len(k)] = k
+        self._lo = np.array([k[0] if len(k) else np.inf for k in self._cuts])
+        self._hi = np.array([k[-1] if len(k) else -np.inf for k in self._cuts])
+        self._num_off = np.concatenate([[0], np.cumsum(self._nbins)[:-1]])
+        off = int(self._nbins.sum())
+        # (column, cuts list, first slot, last bin, low, high) for the scalar path.
+        self._num_py = [(c, k.tolist(), int(o), int(nb) - 1, float(k[0]), float(k[-1]))
+                        for c, k, o, nb in zip(NUMERIC_COLS, self._cuts, self._num_off, self._nbins) if nb > 0]
+
+        # Categorical slots: reference categories, then missing, then other.
+        self._cat_names: Dict[str, List[Optional[str]]] = {}
+        self._cat_index: Dict[str, Dict[Optional[str], int]] = {}
+        for c in CATEGORICAL_COLS:
+            names = [k for k in profile.categorical[c] if k is not None] + [None, "__other__"]
+            self._cat_names[c] = names
+            self._cat_index[c] = {k: off + i for i, k in enumerate(names)}
+            off += len(names)
+        self._cat_py = [(c, self._cat_index[c], self._cat_index[c]["__other__"]) for c in CATEGORICAL_COLS]
+
+        self._pred_off = off
+        self.size = off + len(PRED_EDGES) - 1
+
+        n_buckets = max(int(np.ceil(window_s / bucket_s)), 1)
+        self._counts = np.zeros((n_buckets, self.size), dtype=np.int64)
+        self._rows = np.zeros(n_buckets, dtype=np.int64)
+        self._epoch = np.full(n_buckets, -1, dtype=np.int64)
+        self._cur = -1
+        self._pending: List[int] = []
+        self._lock = threading.Lock()
+
+    # ---- recording (request path) ----------------------------------------
+
+    def record_rows(self, rows: List[Dict[str, Any]], prob) -> None:
+        if len(rows) <= self.SMALL_BATCH:
+            self._add(self._slots_py(rows, np.asarray(prob, dtype=np.float64).tolist()), len(rows))
+            return
+        X = np.array([[r[c] for c in NUMERIC_COLS] for r in rows], dtype=np.float64)
+        cats = [self._cat_slots(c, [r[c] for r in rows]) for c in CATEGORICAL_COLS]
+        self._add(self._slots_np(X, cats, prob), len(rows))
+
+    def record_columns(self, cols: Dict[str, Any], prob) -> None:
+        n = len(prob)
+        if n <= self.SMALL_BATCH:
+            # Python scalars: comparisons on NumPy scalars cost far more.
+            names = CATEGORICAL_COLS + NUMERIC_COLS
+            values = [np.asarray(cols[c]).tolist() for c in names]
+            rows = [dict(zip(names, r)) for r in zip(*values)]
+            self._add(self._slots_py(rows, np.asarray(prob, dtype=np.float64).tolist()), n)
+            return
+        X = np.column_stack([np.asarray(cols[c], dtype=np.float64) for c in NUMERIC_COLS])
+        cats = [self._cat_slots(c, cols[c]) for c in CATEGORICAL_COLS]
+        self._add(self._slots_np(X, cats, prob), n)
+
+    def _slots_py(self, rows: List[Dict[str, Any]], prob) -> List[int]:
+        # Same bins as np.histogram(x, cuts): right-open, last bin closed,
+        # values outside [cuts[0], cuts[-1]] (and NaN) are not counted.
+        out: List[int] = []
+        npred = len(PRED_EDGES) - 1
+        append = out.append
+        for r, p in zip(rows, prob):
+            for c, cuts, off, last, lo, hi in self._num_py:
+                v = r[c]
+                if lo <= v <= hi:
+                    b = bisect_right(cuts, v) - 1
+                    append(off + (b if b < last else last))
+            for c, index, other in self._cat_py:
+                append(index.get(r[c], other))
+            append(self._pred_off + min(max(int(p * npred), 0), npred - 1))
+        return out
+
+    def _cat_slots(self, c: str, values) -> np.ndarray:
+        index = self._cat_index[c]
+        other = index["__other__"]
+        return np.fromiter((index.get(v, other) for v in values), dtype=np.int64)
+
+    def _slots_np(self, X: np.ndarray, cats: List[np.ndarray], prob) -> np.ndarray:
+        b = (X[:, :, None] >= self._padded[None, :, :]).sum(axis=2) - 1
+        b = np.where(X == self._hi, self._nbins - 1, b)
+        ok = (X >= self._lo) & (X <= self._hi)
+        num = (b + self._num_off)[ok]
+        p = np.asarray(prob, dtype=np.float64)
+        pb = np.clip(np.searchsorted(PRED_EDGES, p, side="right") - 1, 0, len(PRED_EDGES) - 2)
+        return np.concatenate([num, *cats, pb + self._pred_off])
+
+    def _add(self, slots, n: int) -> None:
+        epoch = int(self.clock() // self.bucket_s)
+        with self._lock:
+            if epoch != self._cur:
+                self._flush()
+                i = epoch % len(self._epoch)
+                if self._epoch[i] != epoch:
+                    self._counts[i] = 0
+                    self._rows[i] = 0
+                    self._epoch[i] = epoch
+                self._cur = epoch
+            i = epoch % len(self._epoch)
+            if isinstance(slots, list):
+                self._pending.extend(slots)
+                if len(self._pending) >= self.FLUSH_SLOTS:
+                    self._flush()
+            else:
+                self._counts[i] += np.bincount(slots, minlength=self.size)
+            self._rows[i] += n
+
+    def _flush(self) -> None:
+        # Lock held. Pending slots belong to the current bucket.
+        if self._pending:
+            self._counts[self._cur % len(self._epoch)] += np.bincount(self._pending, minlength=self.size)
+            self._pending.clear()
+
+    # ---- reporting --------------------------------------------------------
+
+    def window_counts(self):
+        epoch = int(self.clock() // self.bucket_s)
+        with self._lock:
+            self._flush()
+            live = self._epoch > epoch - len(self._epoch)
+            return self._counts[live].sum(axis=0), int(self._rows[live].sum())
+
+    def report(self, threshold: float = 0.2) -> Dict[str, Any]:
+        """
+        PSI per feature and for the prediction over the current window, with
+        the drift.py formulas and the drift_report.json field names.
+        """
+        counts, rows = self.window_counts()
+        feats: Dict[str, Optional[float]] = {}
+        for j, c in enumerate(NUMERIC_COLS):
+            ref = self.profile.numeric[c]["counts"]
+            live = counts[self._num_off[j]: self._num_off[j] + self._nbins[j]]
+            feats[c] = psi_from_counts(np.asarray(ref), live) if rows and len(ref) else None
+        for c in CATEGORICAL_COLS:
+            live_c = {k: int(counts[self._cat_index[c][k]]) for k in self._cat_names[c]}
+            feats[c] = psi_from_category_counts(self.profile.categorical[c], live_c) if rows else None
+
+        pred_live = counts[self._pred_off:]
+        pred_psi = None
+        if rows and self.profile.prediction is not None:
+            pred_psi = psi_from_counts(np.asarray(self.profile.prediction), pred_live)
+        rounded = {k: round(v, 4) if v is not None else None for k, v in feats.items()}
+        return {
+            "threshold": threshold,
+            "window_seconds": self.window_s,
+            "rows": rows,
+            "overall_drift": any(v is not None and v >= threshold for v in feats.values()),
+            "features": rounded,
+            "prediction": {
+                "psi": round(pred_psi, 4) if pred_psi is not None else None,
+                "edges": PRED_EDGES.tolist(),
+                "counts": pred_live.tolist(),
+            },
+        }
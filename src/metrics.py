@@ -1,14 +1,184 @@
 # TODO: Compute ROC-AUC, PR-AUC, accuracy
+#
+# Evaluation engine: scores are sorted once, and ROC-AUC, PR-AUC (average
+# precision), accuracy and a threshold sweep all come from cumulative
+# true/false-positive counts per run of tied scores. Bootstrap replicates and
+# segments reuse that order: a resample only changes the counts per run, and
+# a segment is a sub-sequence of the sorted rows, so neither sorts again.
+
+import json, os, subprocess, time
+from typing import Any, Dict, List, Optional, Sequence, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SWEEP_THRESHOLDS = tuple(round(t, 2) for t in np.arange(0.05, 1.0, 0.05))
+SEGMENT_COLS = ["plan_type", "contract_type"]
+# Bootstrap index matrices are drawn in blocks of at most this many cells.
+BOOT_BLOCK_CELLS = 4_000_000
+
+
+class SortedScores:
+    """
+    Labels and scores ordered by decreasing score, grouped into runs of tied
+    scores (the distinct thresholds of the ROC/PR curves). `ends` is the
+    last sorted position of each group.
+    """
+
+    def __init__(self, y_true, y_prob, _order: Optional[np.ndarray] = None):
+        p = np.asarray(y_prob, dtype=np.float64)
+        order = np.argsort(-p, kind="stable") if _order is None else _order
+        self._set(order, p[order], (np.asarray(y_true) != 0)[order])
+
+    def _set(self, order: np.ndarray, p: np.ndarray, y: np.ndarray) -> None:
+        self.order, self.p, self.y = order, p, y
+        self.ends = np.append(np.flatnonzero(p[1:] != p[:-1]), len(p) - 1)
+
+    def subset(self, mask: np.ndarray) -> "SortedScores":
+        """Rows where `mask` (in the original row order) is true, still sorted."""
+        keep = np.asarray(mask, dtype=bool)[self.order]
+        out = SortedScores.__new__(SortedScores)
+        out._set(self.order[keep], self.p[keep], self.y[keep])
+        return out
+
+    def group_counts(self):
+        """(positives, negatives) per tie group, in decreasing score order."""
+        pos = np.diff(np.cumsum(self.y)[self.ends], prepend=0)
+        return pos, np.diff(self.ends, prepend=-1) - pos
+
+    def groups_above(self, thresholds) -> np.ndarray:
+        """Tie groups with score >= each threshold (they hold the predicted positives)."""
+        return np.searchsorted(-self.p[self.ends], -np.asarray(thresholds, dtype=np.float64), side="right")
+
+
+def _at(cum: np.ndarray, k: np.ndarray) -> np.ndarray:
+    # cum[..., k - 1], with 0 where k == 0.
+    return np.where(k > 0, cum[..., np.maximum(k - 1, 0)], 0)
+
+
+def curve_metrics(pos: np.ndarray, neg: np.ndarray, k: int) -> Dict[str, np.ndarray]:
+    """
+    ROC-AUC, average precision and accuracy at the threshold splitting off
+    the first `k` tie groups, from per-group positive/negative counts (last
+    axis in decreasing score order; leading axes are independent
+    replicates). Same definitions as sklearn's roc_auc_score,
+    average_precision_score and accuracy_score.
+    """
+    tps, fps = np.cumsum(pos, axis=-1), np.cumsum(neg, axis=-1)
+    P, N = tps[..., -1], fps[..., -1]
+    # Rows above each group's threshold, floored at 1: where it is 0, tps is too.
+    seen = tps + fps
+    np.maximum(seen, 1, out=seen)
+    dot = lambda a, b: np.einsum("...i,...i->...", a, b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Trapezoid under the ROC curve: each group adds neg * (tps_before + pos / 2).
+        auc = (2 * dot(neg, tps) - dot(neg, pos)) / (2.0 * P * N)
+        ap = dot(pos, tps / seen) / P
+        tp, fp = _at(tps, np.asarray(k)), _at(fps, np.asarray(k))
+        acc = (tp + N - fp) / (P + N)
+    return {"roc_auc": auc, "pr_auc": ap, "accuracy": acc}
+
+
+def _point(s: SortedScores, threshold: float) -> Dict[str, Optional[float]]:
+    pos, neg = s.group_counts()
+    m = curve_metrics(pos, neg, int(s.groups_above([threshold])[0]))
+    return {k: (float(v) if np.isfinite(v) else None) for k, v in m.items()}
+
+
+def threshold_sweep(s: SortedScores, thresholds: Sequence[float] = SWEEP_THRESHOLDS) -> List[Dict[str, float]]:
+    pos, neg = s.group_counts()
+    tps, fps = np.cumsum(pos), np.cumsum(neg)
+    P, N = float(tps[-1]), float(fps[-1])
+    k = s.groups_above(thresholds)
+    out = []
+    for t, tp, fp in zip(thresholds, _at(tps, k).tolist(), _at(fps, k).tolist()):
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / P if P else 0.0
+        out.append({
+            "threshold": float(t),
+            "precision": round(precision, 6),
+            "recall": round(recall, 6),
+            "f1": round(2 * precision * recall / (precision + recall), 6) if precision + recall else 0.0,
+            "accuracy": round((tp + N - fp) / (P + N), 6),
+            "fpr": round(fp / N, 6) if N else 0.0,
+            "positive_rate": round((tp + fp) / (P + N), 6),
+        })
+    return out
+
+
+def bootstrap_ci(s: SortedScores, threshold: float = 0.5, n_boot: int = 200, level: float = 0.95,
+                 seed: int = 42) -> Dict[str, List[Optional[float]]]:
+    """
+    Percentile intervals from `n_boot` resamples with replacement. Each row
+    is coded `group + G * label`; a block of replicates is an (m, n) index
+    matrix mapped through the codes and counted with one bincount, which
+    gives every replicate's per-group counts without sorting again.
+    """
+    n, G = len(s.y), len(s.ends)
+    rng = np.random.default_rng(seed)
+    k = int(s.groups_above([threshold])[0])
+    block = max(1, BOOT_BLOCK_CELLS // max(n, 1))
+    dtype = np.int32 if 2 * G * block < 2 ** 31 else np.int64
+    code = np.zeros(n, dtype=dtype)
+    code[s.ends[:-1] + 1] = 1
+    code = np.cumsum(code, dtype=dtype) + G * s.y.astype(dtype)
+    draws: Dict[str, List[np.ndarray]] = {"roc_auc": [], "pr_auc": [], "accuracy": []}
+    for start in range(0, n_boot, block):
+        m = min(block, n_boot - start)
+        c = code[rng.integers(0, n, size=(m, n), dtype=dtype)]
+        c += (np.arange(m, dtype=dtype) * (2 * G))[:, None]
+        counts = np.bincount(c.ravel(), minlength=2 * G * m).reshape(m, 2, G)
+        for name, v in curve_metrics(counts[:, 1], counts[:, 0], k).items():
+            draws[name].append(v)
+    q = [50 * (1 - level), 50 * (1 + level)]
+    out = {}
+    for name, parts in draws.items():
+        v = np.concatenate(parts)
+        v = v[np.isfinite(v)]
+        out[name] = [round(float(x), 6) for x in np.percentile(v, q)] if len(v) else [None, None]
+    return out
+
+
+def segment_metrics(s: SortedScores, segments: "pd.DataFrame", threshold: float = 0.5) -> Dict[str, Any]:
+    """Point metrics per value of each column of `segments` (rows aligned with the scores)."""
+    out: Dict[str, Any] = {}
+    for col in segments.columns:
+        values = segments[col].to_numpy()
+        out[col] = {}
+        for v in sorted(set(values.tolist()), key=str):
+            sub = s.subset(values == v)
+            out[col][str(v)] = {"n": int(len(sub.y)), "positives": int(sub.y.sum()), **_point(sub, threshold)}
+    return out
+
+
+def evaluate(y_true, y_prob, threshold: float = 0.5, segments: Optional["pd.DataFrame"] = None,
+             n_boot: int = 200, level: float = 0.95, seed: int = 42) -> Dict[str, Any]:
+    """
+    Point metrics (the top-level roc_auc/pr_auc/accuracy keys of
+    metrics.json), bootstrap intervals, the threshold sweep and, given a
+    frame of segment columns, per-segment metrics.
+    """
+    t0 = time.perf_counter()
+    s = SortedScores(y_true, y_prob)
+    out: Dict[str, Any] = _point(s, threshold)
+    if n_boot > 0:
+        out["ci"] = {"level": level, "n_boot": n_boot, **bootstrap_ci(s, threshold, n_boot, level, seed)}
+    out["threshold"] = threshold
+    out["threshold_sweep"] = threshold_sweep(s)
+    if segments is not None:
+        out["segments"] = segment_metrics(s, segments.reset_index(drop=True), threshold)
+    out["n_eval"] = int(len(s.y))
+    out["eval_seconds"] = round(time.perf_counter() - t0, 4)
+    return out
 
-import json, os, subprocess
-from typing import Dict, Optional
-from sklearn.metrics import roc_auc_score, average_precision_score, accuracy_score
 
 def compute_metrics(y_true, y_prob, y_pred) -> Dict[str, float]:
+    m = _point(SortedScores(y_true, y_prob), 0.5)
     return {
-        "roc_auc": float(roc_auc_score(y_true, y_prob)),
-        "pr_auc": float(average_precision_score(y_true, y_prob)),
-        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "roc_auc": m["roc_auc"],
+        "pr_auc": m["pr_auc"],
+        "accuracy": float(np.mean(np.asarray(y_true) == np.asarray(y_pred))),
     }
 
 def save_json(path: str, obj) -> None:
@@ -16,6 +186,18 @@ def save_json(path: str, obj) -> None:
     with open(path, "w", encoding="utf-8") as f:
         json.dump(obj, f, indent=2)
 
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process so far (None where unsupported).
+    """
+    try:
+        import resource, sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except Exception:
+        return None
+
 def get_git_sha() -> Optional[str]:
     try:
         sha = subprocess.check_output(
@@ -1,8 +1,7 @@
 # TODO: Train/save/load utilities
 
 from typing import Any
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import HistGradientBoostingClassifier
+import numpy as np
 from .features import SEED
 
 
@@ -24,9 +23,23 @@ def build_model(kind: str = "xgb") -> Any:
             )
         except Exception:
             kind = "hgb"
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import HistGradientBoostingClassifier
     if kind == "hgb":
         return HistGradientBoostingClassifier(
             max_depth=None, max_leaf_nodes=31, learning_rate=0.08,
             l2_regularization=0.0, random_state=SEED
         )
     return LogisticRegression(solver="lbfgs", max_iter=2000, n_jobs=1, random_state=SEED)
+
+
+def positive_proba(model: Any, X) -> np.ndarray:
+    """
+    Probability of the positive class; min-max scaled scores for models
+    without predict_proba.
+    """
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(X)[:, 1]
+    from sklearn.preprocessing import MinMaxScaler
+    s = model.decision_function(X).reshape(-1, 1)
+    return MinMaxScaler().fit_transform(s).ravel()
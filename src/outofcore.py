@@ -0,0 +1,191 @@
+# Out-of-core training: streaming preprocessor statistics, per-chunk stratified
+# holdout and XGBoost external-memory input. Used by `src.train --chunksize N`.
+#
+# Pass 1 reads the CSV once: it assigns every row to train/holdout and
+# accumulates train-row statistics. The preprocessor is then built from those
+# statistics. Pass 2 (repeated by XGBoost as needed) streams transformed train
+# chunks into a QuantileDMatrix, so only the quantized matrix (one byte per
+# value) is resident.
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .features import build_preprocessor, CATEGORICAL_COLS, NUMERIC_COLS, TARGET
+
+INPUT_COLS = CATEGORICAL_COLS + NUMERIC_COLS
+
+
+def read_chunks(data_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    return pd.read_csv(data_path, usecols=INPUT_COLS + [TARGET], chunksize=chunksize)
+
+
+def holdout_mask(y: np.ndarray, frac: float, seed: int, chunk_idx: int) -> np.ndarray:
+    """
+    Stratified holdout for one chunk: round(frac * n_c) rows of each class.
+    Seeded by (seed, chunk_idx), so every pass over the file agrees.
+    """
+    rng = np.random.default_rng([seed, chunk_idx])
+    mask = np.zeros(len(y), dtype=bool)
+    for c in np.unique(y):
+        idx = np.flatnonzero(y == c)
+        k = int(round(frac * len(idx)))
+        mask[rng.permutation(idx)[:k]] = True
+    return mask
+
+
+class RowReservoir:
+    """
+    Uniform sample of at most `size` rows: every row gets a random key and
+    the rows with the smallest keys are kept.
+    """
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.rows: Optional[pd.DataFrame] = None
+
+    def add(self, rows: pd.DataFrame) -> None:
+        keys = np.concatenate([self.keys, self.rng.random(len(rows))])
+        rows = rows if self.rows is None else pd.concat([self.rows, rows], ignore_index=True)
+        if len(rows) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size)[: self.size])
+            keys, rows = keys[keep], rows.iloc[keep].reset_index(drop=True)
+        self.keys, self.rows = keys, rows
+
+
+class StreamingStats:
+    """
+    Sufficient statistics for build_preprocessor(), accumulated chunk by chunk:
+    value counts per categorical, per-numeric count/sum/sum-of-squares and a
+    row reservoir for medians (exact while the data fits in the reservoir).
+    """
+
+    def __init__(self, reservoir_rows: int = 100_000, seed: int = 0):
+        self.n = 0
+        self.cat_counts: Dict[str, Dict[Any, int]] = {c: {} for c in CATEGORICAL_COLS}
+        self.count = np.zeros(len(NUMERIC_COLS))
+        self.shift: Optional[np.ndarray] = None
+        self.sum = np.zeros(len(NUMERIC_COLS))
+        self.sumsq = np.zeros(len(NUMERIC_COLS))
+        self._sample = RowReservoir(reservoir_rows, seed)
+
+    def update(self, df: pd.DataFrame) -> None:
+        self.n += len(df)
+        for c in CATEGORICAL_COLS:
+            counts = self.cat_counts[c]
+            for v, k in df[c].value_counts(dropna=True).items():
+                counts[v] = counts.get(v, 0) + int(k)
+        X = df[NUMERIC_COLS].to_numpy(dtype=np.float64)
+        if self.shift is None:
+            # Shifted sums keep the variance well conditioned for large means.
+            self.shift = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+        ok = ~np.isnan(X)
+        D = np.where(ok, X - self.shift, 0.0)
+        self.count += ok.sum(axis=0)
+        self.sum += D.sum(axis=0)
+        self.sumsq += (D * D).sum(axis=0)
+        self._sample.add(df[NUMERIC_COLS].reset_index(drop=True))
+
+    def modes(self) -> List[Any]:
+        # SimpleImputer(most_frequent) breaks ties with the smallest value.
+        return [min(v for v, k in cnt.items() if k == max(cnt.values())) for cnt in self.cat_counts.values()]
+
+    def medians(self) -> np.ndarray:
+        return np.nanmedian(self._sample.rows.to_numpy(dtype=np.float64), axis=0)
+
+    def mean_var(self, fill: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean/variance of the imputed columns (missing values replaced by `fill`),
+        which is what StandardScaler sees after SimpleImputer.
+        """
+        missing = self.n - self.count
+        d = fill - self.shift
+        s = self.sum + missing * d
+        ss = self.sumsq + missing * d * d
+        mean = s / self.n
+        var = np.maximum(ss / self.n - mean * mean, 0.0)
+        return mean + self.shift, var
+
+    def build_preprocessor(self):
+        """
+        A fitted build_preprocessor() whose learned statistics come from the
+        stream. The sklearn objects are fitted on a tiny frame with the
+        observed categories (for the encoder layout), then overwritten.
+        """
+        cats = {c: sorted(cnt) for c, cnt in self.cat_counts.items()}
+        rows = max(max(len(v) for v in cats.values()), 2)
+        seed_frame = pd.DataFrame({c: [v[i % len(v)] for i in range(rows)] for c, v in cats.items()})
+        for c in NUMERIC_COLS:
+            seed_frame[c] = np.arange(rows, dtype=np.float64)
+        pre = build_preprocessor().fit(seed_frame)
+
+        cat_pipe = pre.named_transformers_["cat"]
+        cat_pipe.named_steps["impute"].statistics_ = np.asarray(self.modes(), dtype=object)
+
+        med = self.medians()
+        mean, var = self.mean_var(med)
+        num_pipe = pre.named_transformers_["num"]
+        num_pipe.named_steps["impute"].statistics_ = med
+        sc = num_pipe.named_steps["sc"]
+        sc.mean_, sc.var_ = mean, var
+        sc.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+        sc.n_samples_seen_ = self.n
+        return pre
+
+
+def scan(data_path: str, chunksize: int, seed: int, test_size: float,
+         val_max_rows: int = 200_000) -> Tuple[StreamingStats, pd.DataFrame, np.ndarray, int]:
+    """
+    Pass 1. Returns (train statistics, holdout X, holdout y, n_train). The
+    holdout kept in memory is a uniform sample of at most `val_max_rows`.
+    """
+    stats = StreamingStats(seed=seed)
+    val = RowReservoir(val_max_rows, seed + 1)
+    for i, chunk in enumerate(read_chunks(data_path, chunksize)):
+        y = chunk[TARGET].astype(int).to_numpy()
+        hold = holdout_mask(y, test_size, seed, i)
+        stats.update(chunk[~hold])
+        val.add(chunk[hold].reset_index(drop=True))
+    if stats.n == 0 or val.rows is None:
+        raise ValueError(f"Not enough rows in {data_path} for a train/holdout split")
+    return stats, val.rows[INPUT_COLS], val.rows[TARGET].astype(int).to_numpy(), stats.n
+
+
+def train_xgb_chunked(data_path: str, pre, model, chunksize: int, seed: int, test_size: float):
+    """
+    Pass 2. Fit `model` (an unfitted XGBClassifier) from transformed train
+    chunks through a DataIter + QuantileDMatrix; returns a fitted XGBClassifier.
+    """
+    import xgboost as xgb
+
+    class _TrainChunks(xgb.DataIter):
+        def __init__(self):
+            super().__init__()
+            self._it: Optional[Iterator] = None
+            self._i = 0
+
+        def reset(self) -> None:
+            self._it, self._i = None, 0
+
+        def next(self, input_data) -> bool:
+            if self._it is None:
+                self._it = iter(read_chunks(data_path, chunksize))
+            for chunk in self._it:
+                i, self._i = self._i, self._i + 1
+                y = chunk[TARGET].astype(int).to_numpy()
+                keep = ~holdout_mask(y, test_size, seed, i)
+                if keep.any():
+                    X = pre.transform(chunk.loc[keep, INPUT_COLS]).astype(np.float32)
+                    input_data(data=X, label=y[keep])
+                    return True
+            return False
+
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+    dtrain = xgb.QuantileDMatrix(_TrainChunks(), max_bin=params.get("max_bin", 256))
+    booster = xgb.train(params, dtrain, num_boost_round=model.n_estimators)
+
+    fitted = type(model)(**model.get_params())
+    fitted.load_model(bytearray(booster.save_raw("ubj")))
+    return fitted
@@ -0,0 +1,156 @@
+# Bounded LRU + TTL cache of predicted probabilities for repeated rows.
+# Enabled in the API with PREDICTION_CACHE_SIZE > 0 (see src/app.py); the
+# same class caches feature contributions for /explain (src/explain.py).
+#
+# A row's key is its canonical binary form: the category codes followed by
+# the numeric values as little-endian float64, i.e. struct "<4B8d" (68
+# bytes). The key is exact, so equal rows share an entry whichever route
+# (/predict, /predict/columnar, /predict/stream) scored them, and different
+# rows never collide. The dict hashes these bytes.
+
+import struct, sys, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .features import ALLOWED_CATEGORIES, CATEGORICAL_COLS, NUMERIC_COLS
+
+_ROW = struct.Struct("<" + "B" * len(CATEGORICAL_COLS) + "d" * len(NUMERIC_COLS))
+_CODES = {c: {v: i for i, v in enumerate(ALLOWED_CATEGORIES[c])} for c in CATEGORICAL_COLS}
+_PACKED = np.dtype([("codes", "u1", (len(CATEGORICAL_COLS),)), ("values", "<f8", (len(NUMERIC_COLS),))])
+
+# Approximate memory per entry: key bytes, (prob, stored at) tuple and floats,
+# plus the OrderedDict slot and link node.
+ENTRY_BYTES = sys.getsizeof(b"\0" * _ROW.size) + sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0) + 100
+
+
+def row_keys(rows: Sequence[Dict[str, Any]]) -> List[bytes]:
+    # "+ 0.0" folds -0.0 into 0.0 so equal values give equal keys.
+    return [_ROW.pack(*[_CODES[c][r[c]] for c in CATEGORICAL_COLS], *[float(r[c]) + 0.0 for c in NUMERIC_COLS])
+            for r in rows]
+
+
+def column_keys(cols: Dict[str, np.ndarray]) -> List[bytes]:
+    """Same keys as `row_keys` for validated columns (see io_schemas.validate_columns)."""
+    n = len(cols[NUMERIC_COLS[0]])
+    packed = np.empty(n, dtype=_PACKED)
+    for j, c in enumerate(CATEGORICAL_COLS):
+        codes = np.zeros(n, dtype=np.uint8)
+        for v, i in _CODES[c].items():
+            codes[cols[c] == v] = i
+        packed["codes"][:, j] = codes
+    for j, c in enumerate(NUMERIC_COLS):
+        packed["values"][:, j] = np.asarray(cols[c], dtype=np.float64) + 0.0
+    buf, w = packed.tobytes(), _ROW.size
+    return [buf[i * w:(i + 1) * w] for i in range(n)]
+
+
+class PredictionCache:
+    """
+    Probabilities by row key for one model at a time (or, with `width`,
+    fixed-length float64 vectors, e.g. feature contributions).
+
+    Entries belong to a scope (the serving handle of one loaded model
+    version); `activate(scope)` on every model swap drops all entries, and
+    lookups or inserts from any other scope (a request still finishing on
+    the old model) miss and are ignored. Capacity is `max_entries`, further
+    limited by `max_bytes` at ENTRY_BYTES per entry; least recently used
+    entries are evicted first and entries older than `ttl_s` (0 = no expiry)
+    count as misses. `name` prefixes the Prometheus metrics.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float = 0.0, max_bytes: Optional[int] = None,
+                 clock=time.monotonic, width: int = 0, name: str = "prediction_cache"):
+        # Vectors are stored as their float64 bytes.
+        self.width = width
+        self.entry_bytes = ENTRY_BYTES + (sys.getsizeof(b"") + 8 * width if width else 0)
+        self.name = name
+        self.capacity = max_entries if max_bytes is None else min(max_entries, max_bytes // self.entry_bytes)
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._scope: Optional[Hashable] = None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def activate(self, scope: Hashable) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._scope = scope
+
+    def get_many(self, scope: Hashable, keys: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """(values with NaN for misses, indices of the misses); values are (n, width) with a width."""
+        out = np.full((len(keys), self.width) if self.width else len(keys), np.nan)
+        if scope != self._scope:
+            return out, np.arange(len(keys))
+        now = self.clock()
+        entries = self._entries
+        found = np.zeros(len(keys), dtype=bool)
+        values = []
+        with self._lock:
+            for i, k in enumerate(keys):
+                v = entries.get(k)
+                if v is None:
+                    continue
+                if self.ttl_s and now - v[1] > self.ttl_s:
+                    del entries[k]
+                    self.expirations += 1
+                    continue
+                entries.move_to_end(k)
+                found[i] = True
+                values.append(v[0])
+            miss = np.flatnonzero(~found)
+            self.hits += len(values)
+            self.misses += len(miss)
+        if values:
+            out[found] = (np.frombuffer(b"".join(values)).reshape(-1, self.width) if self.width
+                          else values)
+        return out, miss
+
+    def put_many(self, scope: Hashable, keys: Sequence[bytes], prob: np.ndarray) -> None:
+        if self.capacity <= 0:
+            return
+        now = self.clock()
+        entries = self._entries
+        if self.width:
+            buf, w = np.ascontiguousarray(prob, dtype=np.float64).tobytes(), 8 * self.width
+            values = [buf[i * w:(i + 1) * w] for i in range(len(keys))]
+        else:
+            values = prob.tolist()
+        with self._lock:
+            if scope != self._scope:
+                return
+            for k, p in zip(keys, values):
+                entries[k] = (p, now)
+                entries.move_to_end(k)
+            extra = len(entries) - self.capacity
+            for _ in range(max(extra, 0)):
+                entries.popitem(last=False)
+            self.evictions += max(extra, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "approx_bytes": len(self._entries) * self.entry_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def prometheus(self) -> str:
+        s = self.stats()
+        out: List[str] = []
+        for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            metric = f"churn_{self.name}_{name}_total"
+            out += [f"# TYPE {metric} counter", f"{metric} {s[name]}"]
+        for name in ("entries", "approx_bytes"):
+            metric = f"churn_{self.name}_{name}"
+            out += [f"# TYPE {metric} gauge", f"{metric} {s[name]}"]
+        return "\n".join(out) + "\n"
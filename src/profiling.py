@@ -0,0 +1,276 @@
+# Opt-in profiling shared by the entry points: nested stage spans written as
+# collapsed stacks ("a;b;c <self µs>", for flamegraph.pl, inferno or
+# speedscope), optionally with a cProfile dump and a tracemalloc allocation
+# flamegraph, plus a short summary the caller adds to its JSON output.
+# CLI entry points (src.train, src.drift, src.agent_monitor):
+#      --profile [spans|cprofile|tracemalloc,...] [--profile-dir artifacts/profiles]  (or PROFILE=...)
+# API: PROFILE=1 PROFILE_SAMPLE_N=100 uvicorn src.app:app   (spans for 1 in N requests)
+#
+# Disabled (the default), `span()` is one global check returning a shared
+# no-op context manager. Spans nest per context (contextvars), so a request's
+# stack follows it from the event loop into the threadpool; totals are
+# aggregated by stack path and a path's self time is its total minus its
+# children's.
+
+import argparse, contextvars, os, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MODES = ("spans", "cprofile", "tracemalloc")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join("artifacts", "profiles"))
+# Frames kept per allocation traceback in tracemalloc mode.
+TRACEMALLOC_FRAMES = 16
+# Entries in the summary's span and cProfile tables.
+SUMMARY_SPANS = 10
+SUMMARY_FUNCTIONS = 5
+
+Path = Tuple[str, ...]
+
+# Stack of the current span; None outside any profiled root (for the API: an
+# unsampled request), where span() does nothing.
+_stack: contextvars.ContextVar[Optional[Path]] = contextvars.ContextVar("profile_stack", default=None)
+_profiler: Optional["Profiler"] = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "token", "t0")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name.replace(";", ",")  # ';' separates frames in the collapsed format
+
+    def __enter__(self):
+        self.token = _stack.set((_stack.get() or ()) + (self.name,))
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        path = _stack.get()
+        _stack.reset(self.token)
+        self.profiler.add(path, seconds)
+        return False
+
+
+def span(name: str):
+    """Time the enclosed block as `name` under the current span (no-op when not profiling)."""
+    p = _profiler
+    if p is None or _stack.get() is None:
+        return _NULL_SPAN
+    return _Span(p, name)
+
+
+def record(name: str, seconds: float, count: int = 1) -> None:
+    """Add time measured elsewhere (e.g. in worker processes) as a child of the current span."""
+    p = _profiler
+    stack = _stack.get()
+    if p is not None and stack is not None:
+        p.add(stack + (name.replace(";", ","),), seconds, count)
+
+
+def active() -> bool:
+    return _profiler is not None
+
+
+class Profiler:
+    """
+    Span totals for one process. `start()` makes it the active profiler (one
+    at a time); `finish()` stops it, writes the profile files to `out_dir`
+    and returns the summary.
+    """
+
+    def __init__(self, name: str, modes: Iterable[str] = ("spans",), out_dir: str = PROFILE_DIR,
+                 sample_n: int = 1):
+        self.name = name
+        self.modes = tuple(modes)
+        self.out_dir = out_dir
+        self.sample_n = max(int(sample_n), 1)
+        self.totals: Dict[Path, List[float]] = {}  # path -> [seconds, count]
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._root: Optional[_Span] = None
+        self._cprofile = None
+        self._alloc_peak_mb: Optional[float] = None
+        self._running = False
+
+    def add(self, path: Path, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            t = self.totals.get(path)
+            if t is None:
+                self.totals[path] = [seconds, count]
+            else:
+                t[0] += seconds
+                t[1] += count
+
+    def start(self, root: bool = True) -> "Profiler":
+        """Activate; with `root` the rest of the calling context is profiled under a `name` span."""
+        global _profiler
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if "cprofile" in self.modes:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        _profiler = self
+        self._running = True
+        if root:
+            self._root = _Span(self, self.name).__enter__()
+        return self
+
+    def sampled(self) -> bool:
+        """True for 1 in `sample_n` calls (request sampling)."""
+        with self._lock:
+            self._seen += 1
+            return (self._seen - 1) % self.sample_n == 0
+
+    def root(self, name: str) -> _Span:
+        """A top-level span, e.g. one per sampled request."""
+        return _Span(self, name)
+
+    def stop(self) -> bool:
+        """Deactivate; False if it was not running."""
+        global _profiler
+        if not self._running:
+            return False
+        self._running = False
+        if self._root is not None:
+            self._root.__exit__(None, None, None)
+            self._root = None
+        if _profiler is self:
+            _profiler = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        return True
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Stop, write the profile files and return the summary (None if already finished)."""
+        if not self.stop():
+            return None
+        return self.summary(self.write())
+
+    def self_seconds(self) -> Dict[Path, float]:
+        with self._lock:
+            totals = {p: t[0] for p, t in self.totals.items()}
+        children: Dict[Path, float] = {}
+        for p, s in totals.items():
+            if len(p) > 1:
+                children[p[:-1]] = children.get(p[:-1], 0.0) + s
+        # Children recorded from parallel workers can exceed their parent's wall time.
+        return {p: max(s - children.get(p, 0.0), 0.0) for p, s in totals.items()}
+
+    def collapsed(self) -> str:
+        """Collapsed stacks weighted by self time in microseconds."""
+        lines = [f"{';'.join(p)} {round(s * 1e6)}" for p, s in sorted(self.self_seconds().items())]
+        return "".join(line + "\n" for line in lines if not line.endswith(" 0"))
+
+    def write(self) -> List[str]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{self.name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}")
+        files = [stem + ".spans.folded"]
+        with open(files[0], "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        if self._cprofile is not None:
+            files.append(stem + ".pstats")
+            self._cprofile.dump_stats(files[-1])
+        if "tracemalloc" in self.modes:
+            files.append(stem + ".alloc.folded")
+            self._alloc_peak_mb = _write_allocations(files[-1])
+        return files
+
+    def summary(self, files: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Small JSON-able digest: the largest spans, and the top cProfile functions / allocation peak."""
+        selfs = self.self_seconds()
+        with self._lock:
+            totals = {p: tuple(t) for p, t in self.totals.items()}
+        top = sorted(totals.items(), key=lambda kv: -kv[1][0])[:SUMMARY_SPANS]
+        out: Dict[str, Any] = {
+            "modes": list(self.modes),
+            "files": files or [],
+            "spans": {";".join(p): {"count": int(n), "total_s": round(s, 6), "self_s": round(selfs[p], 6)}
+                      for p, (s, n) in top},
+        }
+        if self.sample_n > 1:
+            out["sample_n"] = self.sample_n
+        if self._cprofile is not None:
+            out["cprofile_top"] = _cprofile_top(self._cprofile, SUMMARY_FUNCTIONS)
+        if self._alloc_peak_mb is not None:
+            out["tracemalloc_peak_mb"] = self._alloc_peak_mb
+        return out
+
+
+def _cprofile_top(prof, n: int) -> List[Dict[str, Any]]:
+    import pstats
+    stats = pstats.Stats(prof).stats  # (file, line, func) -> (cc, nc, tottime, cumtime, callers)
+    top = sorted(stats.items(), key=lambda kv: -kv[1][3])[:n]
+    return [{"function": f"{os.path.basename(f)}:{line}({func})", "calls": nc,
+             "cum_s": round(ct, 6), "self_s": round(tt, 6)}
+            for (f, line, func), (_, nc, tt, ct, _) in top]
+
+
+def _write_allocations(path: str) -> float:
+    # Live allocations at finish, by allocating traceback (outermost frame first), in KiB.
+    import tracemalloc
+    snapshot = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    with open(path, "w", encoding="utf-8") as f:
+        for stat in snapshot.statistics("traceback"):
+            kib = round(stat.size / 1024)
+            if kib:
+                frames = ";".join(f"{os.path.basename(fr.filename)}:{fr.lineno}" for fr in stat.traceback)
+                f.write(f"{frames} {kib}\n")
+    return round(peak / 2 ** 20, 1)
+
+
+def parse_modes(spec: Optional[str]) -> Tuple[str, ...]:
+    """'' / '0' / 'off' -> (); '1' / 'spans' -> spans; 'cprofile,tracemalloc' adds those (spans always on)."""
+    spec = (spec or "").strip().lower()
+    if spec in ("", "0", "off", "false", "no"):
+        return ()
+    modes = {"spans"}
+    for m in (s.strip() for s in spec.split(",")):
+        if m in ("1", "on", "true", "yes"):
+            continue
+        if m not in MODES:
+            raise ValueError(f"Unknown profile mode {m!r} (expected {', '.join(MODES)})")
+        modes.add(m)
+    return tuple(m for m in MODES if m in modes)
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--profile", nargs="?", const="spans", default=os.environ.get("PROFILE"), metavar="MODES",
+                    help=f"Profile this run (comma-separated: {', '.join(MODES)}; default spans; env PROFILE)")
+    ap.add_argument("--profile-dir", default=PROFILE_DIR, help="Where profile files are written")
+
+
+def from_args(name: str, args: argparse.Namespace) -> Optional[Profiler]:
+    """Started profiler for a CLI run, or None when profiling is off."""
+    modes = parse_modes(args.profile)
+    return Profiler(name, modes, args.profile_dir).start() if modes else None
+
+
+class ProfileMiddleware:
+    """Profiles 1 in `profiler.sample_n` HTTP requests under a "METHOD /path" root span."""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.sampled():
+            return await self.app(scope, receive, send)
+        with self.profiler.root(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
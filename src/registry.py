@@ -0,0 +1,72 @@
+# Versioned artifact registry.
+# Layout: <artifacts>/versions/<version>/{feature_pipeline.pkl, model.pkl, ...}
+#         <artifacts>/versions/LATEST  (name of the newest published version)
+
+import os, shutil
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+VERSIONS_DIR = "versions"
+LATEST_FILE = "LATEST"
+
+
+def new_version_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def versions_root(art: str) -> str:
+    return os.path.join(art, VERSIONS_DIR)
+
+
+def version_dir(art: str, version: str) -> str:
+    if not version or os.sep in version or version.startswith("."):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return os.path.join(versions_root(art), version)
+
+
+def list_versions(art: str) -> List[str]:
+    root = versions_root(art)
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root)
+                  if os.path.isdir(os.path.join(root, d)) and not d.endswith(".tmp"))
+
+
+def latest_version(art: str) -> Optional[str]:
+    try:
+        with open(os.path.join(versions_root(art), LATEST_FILE), "r", encoding="utf-8") as f:
+            v = f.read().strip()
+    except OSError:
+        return None
+    return v or None
+
+
+def publish_version(art: str, files: Iterable[str], version: Optional[str] = None, keep: int = 5) -> str:
+    """
+    Copy `files` (names inside `art`) into a new version dir, then point
+    LATEST at it. The pointer is replaced atomically, so watchers never see
+    a half-written version. Only the newest `keep` versions are retained.
+    """
+    version = version or new_version_id()
+    dest = version_dir(art, version)
+    tmp = dest + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in files:
+        src = os.path.join(art, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(tmp, name))
+        elif os.path.exists(src):
+            shutil.copy2(src, os.path.join(tmp, name))
+    os.replace(tmp, dest)
+
+    pointer = os.path.join(versions_root(art), LATEST_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+    if keep > 0:
+        for old in list_versions(art)[:-keep]:
+            if old != version:
+                shutil.rmtree(version_dir(art, old), ignore_errors=True)
+    return version
@@ -0,0 +1,148 @@
+# Bulk scoring CLI: chunked CSV in, scores out, flat memory.
+# CLI: python -m src.score --in big.csv --out scores.parquet [--artifacts artifacts] [--workers 4]
+
+import argparse, multiprocessing, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from .features import CATEGORICAL_COLS, NUMERIC_COLS
+from .compiled import CompiledPreprocessor
+from .models import positive_proba
+
+INPUT_COLS = CATEGORICAL_COLS + NUMERIC_COLS
+
+
+def load_artifacts(artifacts_dir: str) -> Tuple[Any, Any, Optional[CompiledPreprocessor]]:
+    pre = load(os.path.join(artifacts_dir, "feature_pipeline.pkl"))
+    model = load(os.path.join(artifacts_dir, "model.pkl"))
+    compiled_path = os.path.join(artifacts_dir, "compiled_pipeline.json")
+    compiled = CompiledPreprocessor.load(compiled_path) if os.path.exists(compiled_path) else None
+    return pre, model, compiled
+
+
+def score_frame(df: pd.DataFrame, pre, model, compiled: Optional[CompiledPreprocessor] = None) -> np.ndarray:
+    if compiled is not None:
+        X = compiled.transform_columns({c: df[c].to_numpy() for c in INPUT_COLS})
+    else:
+        X = pre.transform(df[INPUT_COLS])
+    return positive_proba(model, X)
+
+
+# Per-process artifacts for the pool workers (loaded once in the initializer).
+_worker: Dict[str, Any] = {}
+
+def _init_worker(artifacts_dir: str) -> None:
+    _worker["pre"], _worker["model"], _worker["compiled"] = load_artifacts(artifacts_dir)
+
+def _score_in_worker(df: pd.DataFrame) -> np.ndarray:
+    return score_frame(df, _worker["pre"], _worker["model"], _worker["compiled"])
+
+
+class ScoreWriter:
+    """
+    Incremental writer for scored chunks (.parquet, otherwise CSV).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pq_writer = None
+        self._csv_header = True
+        self.written = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not path.endswith(".parquet") and os.path.exists(path):
+            os.remove(path)
+
+    def write(self, out: pd.DataFrame) -> None:
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(out, preserve_index=False)
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self.path, table.schema)
+            self._pq_writer.write_table(table)
+        else:
+            out.to_csv(self.path, mode="a", header=self._csv_header, index=False)
+            self._csv_header = False
+        self.written = True
+
+    def close(self) -> None:
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+
+
+def _result_frame(chunk: pd.DataFrame, prob: np.ndarray, id_col: Optional[str], threshold: float) -> pd.DataFrame:
+    out = pd.DataFrame({"prob": prob.astype(np.float64), "cls": (prob >= threshold).astype(np.int8)})
+    if id_col:
+        out.insert(0, id_col, chunk[id_col].to_numpy())
+    return out
+
+
+def score_csv(in_path: str, out_path: str, artifacts_dir: str = "artifacts", chunksize: int = 100_000,
+              workers: int = 1, id_col: Optional[str] = None, threshold: float = 0.5) -> int:
+    """
+    Score `in_path` chunk by chunk and stream results to `out_path`.
+    With workers > 1, at most 2 * workers chunks are in flight so memory
+    stays bounded. Output rows keep the input order. Returns the row count.
+    """
+    usecols = INPUT_COLS + ([id_col] if id_col else [])
+    chunks: Iterator[pd.DataFrame] = pd.read_csv(in_path, usecols=usecols, chunksize=chunksize)
+    writer = ScoreWriter(out_path)
+    n = 0
+    try:
+        if workers <= 1:
+            pre, model, compiled = load_artifacts(artifacts_dir)
+            for chunk in chunks:
+                prob = score_frame(chunk, pre, model, compiled)
+                writer.write(_result_frame(chunk, prob, id_col, threshold))
+                n += len(chunk)
+        else:
+            # spawn, not fork: a parent that already ran XGBoost/OpenMP can deadlock forked children.
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                     initargs=(artifacts_dir,)) as ex:
+                inflight: deque = deque()
+                for chunk in chunks:
+                    inflight.append((chunk, ex.submit(_score_in_worker, chunk)))
+                    if len(inflight) >= 2 * workers:
+                        done, fut = inflight.popleft()
+                        writer.write(_result_frame(done, fut.result(), id_col, threshold))
+                        n += len(done)
+                while inflight:
+                    done, fut = inflight.popleft()
+                    writer.write(_result_frame(done, fut.result(), id_col, threshold))
+                    n += len(done)
+        if not writer.written:
+            # Header-only input still gets an output file with the result schema.
+            empty = pd.DataFrame({c: pd.Series(dtype=object) for c in usecols})
+            writer.write(_result_frame(empty, np.empty(0), id_col, threshold))
+    finally:
+        writer.close()
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--in", dest="inp", required=True)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--artifacts", default=os.environ.get("ARTIFACTS_DIR", "artifacts"))
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--id-col", default=None)
+    ap.add_argument("--threshold", type=float, default=0.5)
+    args = ap.parse_args()
+
+    if args.out.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            ap.error("parquet output requires pyarrow (pip install pyarrow) or use a .csv --out")
+
+    n = score_csv(args.inp, args.out, args.artifacts, args.chunksize, args.workers, args.id_col, args.threshold)
+    print(f"Scored {n} rows -> {args.out}")
+
+if __name__ == "__main__":
+    main()
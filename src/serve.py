@@ -0,0 +1,260 @@
+# Pre-fork server: load the model once, then fork workers that share it.
+# CLI: python -m src.serve [--host 0.0.0.0] [--port 8000] [--workers N] [--threads-per-worker K]
+#
+# The parent imports src.app (which loads the active model), scores one
+# warm-up row single-threaded, moves every live object into the GC's
+# permanent generation (gc.freeze) and forks. Workers inherit the model
+# pages copy-on-write: the collector never walks the frozen objects, so
+# their headers stay clean, and large arrays keep their data in separate
+# buffers (or read-only mmaps with the inference bundle) that a refcount
+# change never touches. All workers accept on the one listening socket.
+#
+# The parent does not serve. It restarts workers that die and, with
+# MODEL_WATCH_SECS > 0, loads new registry versions itself and replaces the
+# workers one at a time so they keep sharing the new model.
+
+import argparse, os, signal, socket, sys, time
+
+# Thread pools read these when their library is first loaded, so they are set
+# before numpy, sklearn or xgboost are imported (workers inherit them).
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+STAT_FIELDS = ("pid", "started", "requests", "errors", "request_seconds")
+
+
+def _smaps_mb(pid: int):
+    # Linux only: Pss splits shared pages between the processes mapping them,
+    # so summing it over workers gives their real combined footprint.
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    out[key] = int(rest.split()[0]) / 1024
+    except (OSError, ValueError):
+        return {}
+    return {"rss_mb": round(out.get("Rss", 0), 1), "pss_mb": round(out.get("Pss", 0), 1),
+            "shared_mb": round(out.get("Shared_Clean", 0) + out.get("Shared_Dirty", 0), 1),
+            "private_mb": round(out.get("Private_Clean", 0) + out.get("Private_Dirty", 0), 1)}
+
+
+class WorkerStats:
+    """
+    One row of counters per worker slot in shared memory. Each worker writes
+    only its own row, so any worker can report on all of them.
+    """
+
+    def __init__(self, workers: int):
+        from multiprocessing.sharedctypes import RawArray
+        self.workers = workers
+        self._a = RawArray("d", workers * len(STAT_FIELDS))
+        self.slot = -1
+
+    def register(self, slot: int) -> None:
+        self.slot = slot
+        base = slot * len(STAT_FIELDS)
+        self._a[base:base + len(STAT_FIELDS)] = [os.getpid(), time.time(), 0, 0, 0]
+
+    def record(self, seconds: float, error: bool) -> None:
+        base = self.slot * len(STAT_FIELDS)
+        self._a[base + 2] += 1
+        self._a[base + 3] += error
+        self._a[base + 4] += seconds
+
+    def report(self):
+        now = time.time()
+        rows = []
+        for i in range(self.workers):
+            v = dict(zip(STAT_FIELDS, self._a[i * len(STAT_FIELDS):(i + 1) * len(STAT_FIELDS)]))
+            if not v["pid"]:
+                continue
+            uptime = now - v["started"]
+            rows.append({"worker": i, "pid": int(v["pid"]), "uptime_s": round(uptime, 1),
+                         "requests": int(v["requests"]), "errors": int(v["errors"]),
+                         "requests_per_s": round(v["requests"] / uptime, 3) if uptime > 0 else 0.0,
+                         "request_seconds": round(v["request_seconds"], 3), **_smaps_mb(int(v["pid"]))})
+        total = {k: round(sum(r.get(k, 0) for r in rows), 3)
+                 for k in ("requests", "errors", "requests_per_s", "pss_mb", "rss_mb")}
+        return {"parent_pid": os.getppid() if self.slot >= 0 else os.getpid(), "workers": rows,
+                "parent": _smaps_mb(os.getppid()) if self.slot >= 0 else {}, "total": total}
+
+
+class CountingApp:
+    """Outermost ASGI wrapper: per-worker request count, 5xx count and time in requests."""
+
+    def __init__(self, app, stats: WorkerStats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            self.stats.record(time.perf_counter() - t0, status[0] >= 500)
+
+
+class PreforkServer:
+    def __init__(self, app_module, sock: socket.socket, workers: int, threads: int, log_level: str):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.log_level = log_level
+        self.stats = WorkerStats(workers)
+        self.children = {}  # slot -> pid
+        self.stopping = False
+        self.reload_requested = False
+
+    def freeze(self) -> None:
+        import gc
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+    def spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid:
+            self.children[slot] = pid
+            return pid
+        code = 0
+        try:
+            self._worker(slot)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _worker(self, slot: int) -> None:
+        import uvicorn
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+        self.stats.register(slot)
+        self.app_module.after_fork(slot, self.threads)
+        config = uvicorn.Config(CountingApp(self.app_module.app, self.stats), log_level=self.log_level,
+                                access_log=False, lifespan="off")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def stop_worker(self, slot: int, timeout: float = 30.0) -> None:
+        pid = self.children.pop(slot, None)
+        if pid is None:
+            return
+        try:
+            os.kill(pid, signal.SIGTERM)  # uvicorn finishes in-flight requests first
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return
+            time.sleep(0.05)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+    def rolling_restart(self) -> None:
+        self.freeze()
+        for slot in list(self.children):
+            self.stop_worker(slot)
+            if self.stopping:
+                return
+            self.spawn(slot)
+
+    def _reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            for slot, p in list(self.children.items()):
+                if p == pid:
+                    del self.children[slot]
+                    if not self.stopping:
+                        print(f"worker {slot} (pid {pid}) exited with status {status}; restarting",
+                              file=sys.stderr)
+                        time.sleep(0.5)
+                        self.spawn(slot)
+
+    def run(self, watch_secs: float) -> None:
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reload_requested", True))
+        self.freeze()
+        for slot in range(self.workers):
+            self.spawn(slot)
+        next_check = time.monotonic() + watch_secs
+        try:
+            while not self.stopping:
+                time.sleep(0.2)
+                self._reap()
+                if watch_secs > 0 and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + watch_secs
+                    if self.app_module._check_for_update():
+                        self.reload_requested = True
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self.rolling_restart()
+        finally:
+            self.stopping = True
+            for slot in list(self.children):
+                self.stop_worker(slot)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", "0")),
+                    help="Worker processes (default: WORKERS env or the CPU count)")
+    ap.add_argument("--threads-per-worker", type=int, default=0,
+                    help="Scoring threads per worker (default: CPUs / workers, at least 1)")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    workers = args.workers or cpus
+    threads = args.threads_per_worker or max(1, cpus // workers)
+
+    for var in THREAD_ENV:
+        os.environ.setdefault(var, str(threads))
+    # The parent scores single-threaded: an OpenMP pool created before fork
+    # is not usable in the children. Workers switch to `threads` in after_fork.
+    os.environ["MODEL_THREADS"] = "1"
+    os.environ["SERVE_PREFORK"] = "1"
+    watch_secs = float(os.environ.get("MODEL_WATCH_SECS", "0"))
+
+    from . import app as app_module
+    if app_module._active is None:
+        sys.exit(f"No model artifacts under {app_module.ART}; run training first.")
+    app_module._active.smoke_test()  # warm-up: fault in model pages before they are shared
+    stats = WorkerStats(workers)
+    app_module.app.add_api_route("/workers", lambda: stats.report(), methods=["GET"],
+                                 summary="Per-worker requests, throughput and memory (src.serve)")
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    print(f"serving on {args.host}:{args.port} with {workers} workers x {threads} threads "
+          f"(parent pid {os.getpid()})", file=sys.stderr)
+
+    server = PreforkServer(app_module, sock, workers, threads, args.log_level)
+    server.stats = stats
+    server.run(watch_secs)
+
+
+if __name__ == "__main__":
+    main()
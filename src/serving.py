@@ -0,0 +1,224 @@
+# Loaded model state for the API: one immutable handle per artifact version.
+
+import itertools, logging, os, time
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from .features import ALLOWED_CATEGORIES, CATEGORICAL_COLS, NUMERIC_COLS
+from .compiled import CompiledPreprocessor
+from .batching import BatcherClosed, MicroBatcher
+from .models import positive_proba
+from .bundle import has_bundle, load_bundle
+from .trees import TreeEnsemble
+from .drift import ReferenceProfile
+from .live_drift import LiveDriftMonitor
+from .telemetry import Telemetry
+from .prediction_cache import PredictionCache, column_keys, row_keys
+from .profiling import span
+
+log = logging.getLogger("churn.serving")
+
+_handle_ids = itertools.count(1)
+
+
+class ModelHandle:
+    """
+    Preprocessor + model loaded from one artifacts directory.
+
+    Requests take a reference to the active handle once and use it for the
+    whole request, so swapping in a new version never mixes two models
+    within one response.
+    """
+
+    def __init__(self, pre, model, compiled: Optional[CompiledPreprocessor] = None,
+                 version: Optional[str] = None, path: Optional[str] = None,
+                 batch_window_ms: float = 0.0, batch_max_rows: int = 256,
+                 drift_window_s: float = 0.0, drift_bucket_s: float = 60.0,
+                 telemetry: Optional[Telemetry] = None, cache: Optional[PredictionCache] = None,
+                 threads: int = 0, shadow=None, explain_cache: Optional[PredictionCache] = None,
+                 explain_approx: bool = False):
+        self.pre = pre
+        self.model = model
+        self.compiled = compiled
+        self.version = version
+        self.path = path
+        self.batch_max_rows = batch_max_rows
+        # Stage timers ("frame", "transform", "predict"); None disables them.
+        self.telemetry = telemetry
+        # Shared across versions; entries are scoped to this handle, which
+        # the app activates on swap (see PredictionCache).
+        self.cache = cache
+        self.cache_scope = (version, next(_handle_ids))
+        # Challenger fed with every answered request (src.shadow.ShadowScorer);
+        # the app swaps it with a single assignment.
+        self.shadow = shadow
+        # Per-row contributions for /explain (src.explain), built on first use;
+        # the explanation cache is scoped like `cache`.
+        self.explain_cache = explain_cache
+        self.explain_approx = explain_approx
+        self._explainer = None
+        self.threads = threads
+        self.batcher = None
+        if batch_window_ms > 0:
+            self.batcher = MicroBatcher(self._score_direct, window_ms=batch_window_ms, max_rows=batch_max_rows)
+        # Live drift is tied to the version's own training reference, so a
+        # swap starts a fresh window against the new model's profile.
+        self.drift: Optional[LiveDriftMonitor] = None
+        profile_path = os.path.join(path, "reference_profile.json") if path else None
+        if drift_window_s > 0 and profile_path and os.path.exists(profile_path):
+            try:
+                self.drift = LiveDriftMonitor(ReferenceProfile.load(profile_path), drift_window_s, drift_bucket_s)
+            except Exception:
+                log.exception("Live drift disabled: cannot load %s", profile_path)
+        if threads:
+            self.set_threads(threads)
+
+    @classmethod
+    def load(cls, path: str, version: Optional[str] = None, use_bundle: bool = True,
+             native_trees: bool = False, **kw) -> "ModelHandle":
+        # The compact bundle needs only NumPy (plus the model's native runtime);
+        # joblib/sklearn/pandas are imported only for pickle-only artifact dirs.
+        if use_bundle and has_bundle(path, native_trees):
+            compiled, model = load_bundle(path, native_trees=native_trees)
+            return cls(None, model, compiled, version=version, path=path, **kw)
+        from joblib import load
+        pre = load(os.path.join(path, "feature_pipeline.pkl"))
+        model = load(os.path.join(path, "model.pkl"))
+        if native_trees:
+            model = TreeEnsemble.from_model(model) or model
+        compiled_path = os.path.join(path, "compiled_pipeline.json")
+        # Pandas-free fast path; older artifact dirs without it use pre.transform.
+        compiled = CompiledPreprocessor.load(compiled_path) if os.path.exists(compiled_path) else None
+        return cls(pre, model, compiled, version=version, path=path, **kw)
+
+    def transform_rows(self, rows: List[Dict[str, Any]]):
+        if self.compiled is not None:
+            return self._timed("transform", self.compiled.transform_rows, rows)
+        import pandas as pd
+        df = self._timed("frame", pd.DataFrame, rows, columns=CATEGORICAL_COLS + NUMERIC_COLS)
+        return self._timed("transform", self.pre.transform, df)
+
+    def transform_columns(self, cols: Dict[str, Any]):
+        if self.compiled is not None:
+            return self._timed("transform", self.compiled.transform_columns, cols)
+        import pandas as pd
+        df = self._timed("frame", pd.DataFrame, cols, columns=CATEGORICAL_COLS + NUMERIC_COLS)
+        return self._timed("transform", self.pre.transform, df)
+
+    def _timed(self, stage: str, fn, *args, **kw):
+        # Also a profiling span (src/profiling.py) when this request is sampled.
+        with span(stage):
+            if self.telemetry is None:
+                return fn(*args, **kw)
+            t0 = time.perf_counter()
+            out = fn(*args, **kw)
+            self.telemetry.stage(stage, time.perf_counter() - t0)
+            return out
+
+    def _score_direct(self, X) -> np.ndarray:
+        return positive_proba(self.model, X)
+
+    def score(self, X) -> np.ndarray:
+        return self._timed("predict", self._score, X)
+
+    def _score(self, X) -> np.ndarray:
+        # Large payloads are already vectorized; only small ones gain from coalescing.
+        if self.batcher is not None and len(X) < self.batch_max_rows:
+            try:
+                return self.batcher.submit(X)
+            except BatcherClosed:
+                pass  # handle was retired mid-request; score inline
+        return self._score_direct(X)
+
+    def score_rows(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Probabilities for validated rows; with a cache, only the misses are transformed and scored."""
+        X = None
+        if self.cache is None:
+            X = self.transform_rows(rows)
+            prob = self.score(X)
+        else:
+            keys = self._timed("cache", row_keys, rows)
+            prob, miss = self.cache.get_many(self.cache_scope, keys)
+            if len(miss):
+                sub = rows if len(miss) == len(rows) else [rows[i] for i in miss]
+                prob[miss] = self._store(keys, miss, self.score(self.transform_rows(sub)))
+        shadow = self.shadow
+        if shadow is not None:
+            shadow.submit(self, prob, rows=rows, X=X)
+        return prob
+
+    def score_columns(self, cols: Dict[str, np.ndarray]) -> np.ndarray:
+        """Columnar `score_rows`, for the output of io_schemas.validate_columns."""
+        X = None
+        if self.cache is None:
+            X = self.transform_columns(cols)
+            prob = self.score(X)
+        else:
+            keys = self._timed("cache", column_keys, cols)
+            prob, miss = self.cache.get_many(self.cache_scope, keys)
+            if len(miss):
+                sub = cols if len(miss) == len(keys) else {c: a[miss] for c, a in cols.items()}
+                prob[miss] = self._store(keys, miss, self.score(self.transform_columns(sub)))
+        shadow = self.shadow
+        if shadow is not None:
+            shadow.submit(self, prob, cols=cols, X=X)
+        return prob
+
+    def explainer(self):
+        # Two first requests may both build one; either result is the same.
+        if self._explainer is None:
+            from .explain import Explainer
+            self._explainer = Explainer.from_handle(self, self.explain_approx)
+        return self._explainer
+
+    def explain_rows(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Contributions, base value and probability per validated row (src.explain.EXPLAIN_COLUMNS)."""
+        ex = self.explainer()
+        if self.explain_cache is None:
+            return self._timed("explain", ex.explain, self.transform_rows(rows))
+        keys = self._timed("cache", row_keys, rows)
+        out, miss = self.explain_cache.get_many(self.cache_scope, keys)
+        if len(miss):
+            sub = rows if len(miss) == len(rows) else [rows[i] for i in miss]
+            values = self._timed("explain", ex.explain, self.transform_rows(sub))
+            self.explain_cache.put_many(self.cache_scope, [keys[i] for i in miss], values)
+            out[miss] = values
+        return out
+
+    def _store(self, keys: List[bytes], miss: np.ndarray, prob) -> np.ndarray:
+        prob = np.asarray(prob, dtype=np.float64)
+        self.cache.put_many(self.cache_scope, [keys[i] for i in miss], prob)
+        return prob
+
+    def set_threads(self, n: int) -> None:
+        """Threads per scoring call for models with their own thread pool (XGBoost)."""
+        self.threads = n
+        booster = getattr(self.model, "booster", None)  # bundle model
+        if booster is None and hasattr(self.model, "get_booster"):
+            self.model.set_params(n_jobs=n)
+            booster = self.model.get_booster()
+        if booster is not None:
+            booster.set_param({"nthread": n})
+        ex = self._explainer  # its own booster under TREE_EVAL=native
+        if ex is not None and ex.booster is not None and ex.booster is not booster:
+            ex.booster.set_param({"nthread": n})
+
+    def after_fork(self) -> None:
+        # Threads do not survive fork: a forked worker needs its own batcher thread.
+        if self.batcher is not None:
+            self.batcher = MicroBatcher(self._score_direct, window_ms=self.batcher.window_s * 1000,
+                                        max_rows=self.batcher.max_rows)
+
+    def smoke_test(self) -> None:
+        """
+        Score a synthetic row; raises if the artifacts cannot produce a valid probability.
+        """
+        row = {c: ALLOWED_CATEGORIES[c][0] for c in CATEGORICAL_COLS}
+        row.update({c: 0.0 for c in NUMERIC_COLS})
+        prob = np.asarray(self._score_direct(self.transform_rows([row])), dtype=float)
+        if prob.shape != (1,) or not np.all(np.isfinite(prob)) or not (0.0 <= prob[0] <= 1.0):
+            raise ValueError(f"Smoke prediction failed for version {self.version}: {prob!r}")
+
+    def close(self) -> None:
+        if self.batcher is not None:
+            self.batcher.close()
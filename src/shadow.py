@@ -0,0 +1,226 @@
+# Shadow scoring: a challenger model scores the same requests as the primary
+# off the request path, and both probabilities are logged for offline comparison.
+# Enabled in the API with SHADOW_VERSION or SHADOW_ARTIFACTS_DIR (see src/app.py).
+# CLI: python -m src.shadow --log artifacts/shadow/scores.jsonl [--threshold 0.5]
+#
+# The request thread only enqueues references to what it already built (the
+# validated inputs, the encoded matrix when there is one, the primary's
+# probabilities); none of them is modified after scoring, so nothing is
+# copied. The queue is bounded and `submit` never blocks: when the worker
+# falls behind, shadow work is dropped and counted. The worker wakes at most
+# once per `batch_wait_ms`, scores everything queued with one challenger
+# call and appends one JSONL line per request, so under load it costs a few
+# wake-ups a second instead of one GIL hand-off per request.
+#
+# Every trained version fits its own scaling, so the primary's matrix is
+# reused only when both versions have identical compiled preprocessing
+# (e.g. two model types trained on the same data); otherwise the worker
+# encodes the inputs with the challenger's pipeline.
+
+import argparse, json, logging, os, queue, random, threading, time
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+log = logging.getLogger("churn.shadow")
+
+
+class ShadowScorer:
+    """
+    Bounded queue + one daemon thread scoring `challenger` (a ModelHandle)
+    on requests the primary has already answered.
+    """
+
+    def __init__(self, challenger, log_path: str, max_queue: int = 1024, sample: float = 1.0,
+                 batch_wait_ms: float = 50.0, max_batch_rows: int = 4096):
+        self.challenger = challenger
+        self.log_path = log_path
+        self.max_queue = max_queue
+        self.sample = sample
+        self.batch_wait_s = batch_wait_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self._same_encoding: Dict[Any, bool] = {}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue(self.max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._log = None
+        self.submitted = self.dropped = self.scored = self.scored_rows = self.errors = 0
+        self.lag_seconds = self.max_lag_seconds = 0.0
+
+    def start(self) -> "ShadowScorer":
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+        return self
+
+    def after_fork(self) -> None:
+        # Threads (and a queue another thread may have held) do not survive fork.
+        self._reset()
+        self.challenger.after_fork()
+
+    def submit(self, primary, prob, rows=None, cols=None, X=None) -> bool:
+        """Queue one answered request (rows or validated columns); False if sampled out or dropped."""
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return False
+        try:
+            self._queue.put_nowait((time.monotonic(), time.time(), primary, prob, rows, cols, X))
+            queued = True
+        except queue.Full:
+            queued = False
+        with self._lock:
+            self.submitted += 1
+            self.dropped += not queued
+        return queued
+
+    def _encoded_alike(self, primary) -> bool:
+        key = primary.cache_scope
+        same = self._same_encoding.get(key)
+        if same is None:
+            a, b = primary.compiled, self.challenger.compiled
+            same = a is not None and b is not None and a.to_dict() == b.to_dict()
+            self._same_encoding[key] = same
+        return same
+
+    def _matrix(self, primary, rows, cols, X):
+        if X is not None and self._encoded_alike(primary):
+            return X
+        if rows is not None:
+            return self.challenger.transform_rows(rows)
+        return self.challenger.transform_columns(cols)
+
+    def _take(self) -> List[tuple]:
+        # Block for one request, let more arrive, then drain up to max_batch_rows.
+        items = [self._queue.get(timeout=0.5)]
+        self._stop.wait(self.batch_wait_s)
+        n = len(items[0][3])
+        while n < self.max_batch_rows:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            n += len(item[3])
+        return items
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                items = self._take()
+            except queue.Empty:
+                continue
+            try:
+                self._score(items)
+            except Exception:
+                self.errors += len(items)
+                log.exception("Shadow scoring failed")
+
+    def _score(self, items: List[tuple]) -> None:
+        mats = [self._matrix(primary, rows, cols, X) for _, _, primary, _, rows, cols, X in items]
+        prob = np.asarray(self.challenger.score(mats[0] if len(mats) == 1 else np.vstack(mats)), dtype=np.float64)
+        now, out, start = time.monotonic(), [], 0
+        for (t_submit, ts, primary, p, _, _, _), m in zip(items, mats):
+            ch = prob[start:start + len(m)]
+            start += len(m)
+            out.append(json.dumps({
+                "ts": round(ts, 3), "pid": os.getpid(),
+                "primary_version": primary.version, "challenger_version": self.challenger.version,
+                "primary": np.round(np.asarray(p, dtype=np.float64), 6).tolist(),
+                "challenger": np.round(ch, 6).tolist(),
+            }))
+            lag = now - t_submit
+            self.lag_seconds += lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        if self._log is None:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        # One O_APPEND write per batch, so workers sharing the file add whole lines.
+        self._log.write("\n".join(out) + "\n")
+        self._log.flush()
+        self.scored += len(items)
+        self.scored_rows += start
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "challenger_version": self.challenger.version,
+            "log_path": self.log_path,
+            "sample": self.sample,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "drop_rate": round(self.dropped / self.submitted, 4) if self.submitted else None,
+            "scored": self.scored,
+            "scored_rows": self.scored_rows,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.max_queue,
+            "mean_lag_ms": round(1e3 * self.lag_seconds / self.scored, 3) if self.scored else None,
+            "max_lag_ms": round(1e3 * self.max_lag_seconds, 3),
+        }
+
+    def prometheus(self) -> str:
+        s = self.stats()
+        out: List[str] = []
+        for name in ("submitted", "dropped", "scored", "scored_rows", "errors"):
+            metric = f"churn_shadow_{name}_total"
+            out += [f"# TYPE {metric} counter", f"{metric} {s[name]}"]
+        out += ["# TYPE churn_shadow_queue_depth gauge", f"churn_shadow_queue_depth {s['queue_depth']}"]
+        return "\n".join(out) + "\n"
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued request is scored (tests, benchmarks); False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.scored + self.errors < self.submitted - self.dropped:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._log is not None:
+            self._log.close()
+        self.challenger.close()
+
+
+def summarize(path: str, threshold: float = 0.5) -> Dict[str, Any]:
+    """Primary vs challenger agreement per (primary, challenger) version pair in a shadow log."""
+    pairs: Dict[tuple, List[List[np.ndarray]]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            a, b = pairs.setdefault((rec["primary_version"], rec["challenger_version"]), [[], []])
+            a.append(np.asarray(rec["primary"], dtype=np.float64))
+            b.append(np.asarray(rec["challenger"], dtype=np.float64))
+    out = []
+    for (pv, cv), (a, b) in pairs.items():
+        p, c = np.concatenate(a), np.concatenate(b)
+        diff = np.abs(p - c)
+        corr = float(np.corrcoef(p, c)[0, 1]) if len(p) > 1 and p.std() > 0 and c.std() > 0 else None
+        out.append({
+            "primary_version": pv, "challenger_version": cv, "requests": len(a), "rows": int(len(p)),
+            "mean_abs_diff": round(float(diff.mean()), 6),
+            "p99_abs_diff": round(float(np.percentile(diff, 99)), 6),
+            "max_abs_diff": round(float(diff.max()), 6),
+            "class_agreement": round(float(np.mean((p >= threshold) == (c >= threshold))), 6),
+            "correlation": round(corr, 6) if corr is not None else None,
+            "primary_positive_rate": round(float(np.mean(p >= threshold)), 6),
+            "challenger_positive_rate": round(float(np.mean(c >= threshold)), 6),
+        })
+    return {"log": path, "threshold": threshold, "pairs": out}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare primary and challenger probabilities from a shadow log")
+    ap.add_argument("--log", default=os.path.join(os.environ.get("ARTIFACTS_DIR", "artifacts"), "shadow", "scores.jsonl"))
+    ap.add_argument("--threshold", type=float, default=0.5)
+    args = ap.parse_args()
+    print(json.dumps(summarize(args.log, args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
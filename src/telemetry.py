@@ -0,0 +1,236 @@
+# In-process latency/throughput telemetry for the API: per-stage timers and
+# per-route request timers feeding log-bucketed histograms, exposed on
+# GET /metrics (Prometheus text format) and, optionally, appended to a
+# metrics_history.jsonl that src.agent_monitor reads (see src/app.py).
+
+import json, logging, math, os, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("churn.telemetry")
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class LogHistogram:
+    """
+    HDR-style histogram: buckets grow geometrically by `1 + rel_error`
+    between `lo` and `hi` (seconds), so every quantile is within
+    `rel_error` of the true value, whatever the scale. Histograms with the
+    same layout merge (and subtract) by adding bucket counts.
+    """
+
+    def __init__(self, lo: float = 1e-6, hi: float = 100.0, rel_error: float = 0.01):
+        self.lo, self.hi, self.rel_error = lo, hi, rel_error
+        self._inv_lo = 1.0 / lo
+        self._inv_log_gamma = 1.0 / math.log1p(rel_error)
+        self.n_buckets = int(math.log(hi / lo) * self._inv_log_gamma) + 2
+        self.counts = [0] * self.n_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, v: float) -> None:
+        i = int(math.log(v * self._inv_lo) * self._inv_log_gamma) + 1 if v > self.lo else 0
+        self.counts[i if i < self.n_buckets else self.n_buckets - 1] += 1
+        self.count += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+
+    def _empty(self) -> "LogHistogram":
+        return LogHistogram(self.lo, self.hi, self.rel_error)
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        return self
+
+    def minus(self, earlier: "LogHistogram") -> "LogHistogram":
+        """What was recorded since `earlier` (a snapshot of this histogram); max is not windowed."""
+        out = self._empty()
+        out.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+        out.count = self.count - earlier.count
+        out.sum = self.sum - earlier.sum
+        out.max = self.max
+        return out
+
+    def copy(self) -> "LogHistogram":
+        return self._empty().merge(self)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen > rank:
+                if i == 0:
+                    return self.lo
+                # Geometric middle of the bucket [lo * g^(i-1), lo * g^i).
+                return min(self.lo * (1.0 + self.rel_error) ** (i - 0.5), self.max)
+        return self.max
+
+
+class _Shard:
+    # One per thread: only its owner thread writes to it, so recording needs
+    # no lock; readers merge all shards.
+    __slots__ = ("hists", "counters")
+
+    def __init__(self):
+        self.hists: Dict[Tuple, LogHistogram] = {}
+        self.counters: Dict[Tuple, int] = {}
+
+
+class Telemetry:
+    """
+    Named timers and counters with per-thread shards.
+
+    `observe(("stage", name), seconds)` and `count(key, n)` are the hot-path
+    calls (about a microsecond, no lock); `snapshot()` merges every shard.
+    Keys are tuples: ("stage", name) and ("request", route) for histograms,
+    ("requests", route, status) and ("rows", route) for counters.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, key: Tuple, seconds: float) -> None:
+        hists = self._shard().hists
+        h = hists.get(key)
+        if h is None:
+            h = hists[key] = LogHistogram()
+        h.record(seconds)
+
+    def stage(self, name: str, seconds: float) -> None:
+        self.observe(("stage", name), seconds)
+
+    def count(self, key: Tuple, n: int = 1) -> None:
+        counters = self._shard().counters
+        counters[key] = counters.get(key, 0) + n
+
+    def snapshot(self) -> Tuple[Dict[Tuple, LogHistogram], Dict[Tuple, int]]:
+        with self._lock:
+            shards = list(self._shards)
+        hists: Dict[Tuple, LogHistogram] = {}
+        counters: Dict[Tuple, int] = {}
+        for s in shards:
+            for k, h in list(s.hists.items()):
+                if k in hists:
+                    hists[k].merge(h)
+                else:
+                    hists[k] = h.copy()
+            for k, v in list(s.counters.items()):
+                counters[k] = counters.get(k, 0) + v
+        return hists, counters
+
+    # ---- exposition --------------------------------------------------------
+
+    def prometheus(self, info: Optional[Dict[str, Any]] = None) -> str:
+        hists, counters = self.snapshot()
+        out: List[str] = []
+        for kind, metric, label in (("request", "churn_request_duration_seconds", "route"),
+                                    ("stage", "churn_stage_duration_seconds", "stage")):
+            out += [f"# HELP {metric} Server-side {kind} latency.", f"# TYPE {metric} summary"]
+            for key, h in sorted((k, h) for k, h in hists.items() if k[0] == kind):
+                lab = f'{label}="{key[1]}"'
+                out += [f'{metric}{{{lab},quantile="{q}"}} {h.quantile(q):.6g}' for q in QUANTILES]
+                out += [f"{metric}_sum{{{lab}}} {h.sum:.6g}", f"{metric}_count{{{lab}}} {h.count}"]
+        out += ["# HELP churn_requests_total Requests by route and status.", "# TYPE churn_requests_total counter"]
+        out += [f'churn_requests_total{{route="{k[1]}",status="{k[2]}"}} {v}'
+                for k, v in sorted(counters.items()) if k[0] == "requests"]
+        out += ["# HELP churn_rows_total Rows scored by route.", "# TYPE churn_rows_total counter"]
+        out += [f'churn_rows_total{{route="{k[1]}"}} {v}' for k, v in sorted(counters.items()) if k[0] == "rows"]
+        out += ["# HELP churn_uptime_seconds Seconds since telemetry started.", "# TYPE churn_uptime_seconds gauge",
+                f"churn_uptime_seconds {time.time() - self.started:.3f}"]
+        if info:
+            labels = ",".join(f'{k}="{v}"' for k, v in info.items())
+            out += ["# TYPE churn_model_info gauge", f"churn_model_info{{{labels}}} 1"]
+        return "\n".join(out) + "\n"
+
+
+class HistoryWriter:
+    """
+    Every `interval_s`, append one metrics_history.jsonl record for the
+    interval just ended: p50/p95/p99 latency (ms) over `routes`, request
+    rate and 5xx error rate. Fields follow the monitor's schema
+    (`latency_p95_ms`, `error_rate`); model-quality fields are left to the
+    evaluation jobs that know the labels.
+    """
+
+    def __init__(self, telemetry: Telemetry, path: str, interval_s: float, routes: Iterable[str],
+                 extra=None):
+        self.telemetry = telemetry
+        self.path = path
+        self.interval_s = interval_s
+        self.routes = set(routes)
+        self.extra = extra or (lambda: {})
+        self._prev = self._totals()
+        self._prev_t = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _totals(self) -> Tuple[LogHistogram, int, int]:
+        hists, counters = self.telemetry.snapshot()
+        h = LogHistogram()
+        for k, v in hists.items():
+            if k[0] == "request" and k[1] in self.routes:
+                h.merge(v)
+        errors = sum(v for k, v in counters.items()
+                     if k[0] == "requests" and k[1] in self.routes and int(k[2]) >= 500)
+        return h, h.count, errors
+
+    def record(self) -> Optional[Dict[str, Any]]:
+        """Build (and append) the record for the interval since the last call; None if idle."""
+        h, n, errors = self._totals()
+        now = time.monotonic()
+        prev_h, prev_n, prev_errors = self._prev
+        elapsed = max(now - self._prev_t, 1e-9)
+        self._prev, self._prev_t = (h, n, errors), now
+        window = h.minus(prev_h)
+        if window.count == 0:
+            return None
+        rec = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "latency_p50_ms": round(1e3 * window.quantile(0.5), 3),
+            "latency_p95_ms": round(1e3 * window.quantile(0.95), 3),
+            "latency_p99_ms": round(1e3 * window.quantile(0.99), 3),
+            "requests": window.count,
+            "rps": round(window.count / elapsed, 3),
+            "error_rate": round((errors - prev_errors) / window.count, 6),
+            **self.extra(),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+        return rec
+
+    def start(self) -> "HistoryWriter":
+        self._thread = threading.Thread(target=self._run, name="telemetry-history", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.record()
+            except Exception:
+                log.exception("Telemetry history append failed")
+
+    def stop(self) -> None:
+        self._stop.set()
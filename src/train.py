@@ -1,68 +1,209 @@
 # TODO: Implement training script.
 # CLI: python -m src.train --data data/customer_churn_synth.csv --outdir artifacts/
+#      [--profile [spans,cprofile,tracemalloc]]  (see src/profiling.py)
 
-import argparse, os, json
+import argparse, os, json, time
 from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
 from joblib import dump
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import StratifiedKFold, RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
 
 
 from .features import build_preprocessor, TARGET, SEED, \
     CATEGORICAL_COLS, NUMERIC_COLS
-from .models import build_model
-from .metrics import compute_metrics, save_json, get_git_sha
+from .models import build_model, positive_proba
+from .metrics import SEGMENT_COLS, evaluate, save_json, get_git_sha, peak_rss_mb
+from .compiled import CompiledPreprocessor
+from .registry import new_version_id, publish_version
+from .bundle import BUNDLE_DIR, export_bundle
+from .datacache import cache_key, load_prepared, save_prepared
+from .outofcore import scan, train_xgb_chunked, read_chunks, holdout_mask
+from .drift import ReferenceProfile
+from . import profiling
+from .profiling import span
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--data", required=True)
-    ap.add_argument("--outdir", required=True)
-    ap.add_argument("--model", default="xgb", choices=["xgb","hgb","logreg"])
-    args = ap.parse_args()
+# Files copied into each versioned artifact dir (see src/registry.py).
+VERSIONED_FILES = [
+    "feature_pipeline.pkl", "model.pkl", "compiled_pipeline.json",
+    "metrics.json", "feature_importances.csv", "hpo_trials.json", "reference_profile.json",
+    BUNDLE_DIR,
+]
+TEST_SIZE = 0.2
 
-    os.makedirs(args.outdir, exist_ok=True)
 
-    df = pd.read_csv(args.data)
+def prepare_data(data_path: str, seed: int = SEED, test_size: float = TEST_SIZE):
+    """
+    Read, split and preprocess. Returns the dict stored by src/datacache.py,
+    including the drift reference profile of the training rows.
+    """
+    with span("read_csv"):
+        df = pd.read_csv(data_path)
     X = df[CATEGORICAL_COLS + NUMERIC_COLS]
     y = df[TARGET].astype(int)
 
-    X_tr, X_val, y_tr, y_val = train_test_split(
-        X, y, test_size=0.2, random_state=SEED, stratify=y
+    idx_tr, idx_val = train_test_split(
+        np.arange(len(df)), test_size=test_size, random_state=seed, stratify=y
     )
-
     pre = build_preprocessor()
-    X_trp = pre.fit_transform(X_tr)
-    X_valp = pre.transform(X_val)
+    with span("fit_transform"):
+        X_trp = pre.fit_transform(X.iloc[idx_tr])
+    with span("transform"):
+        X_valp = pre.transform(X.iloc[idx_val])
+    with span("reference_profile"):
+        profile = ReferenceProfile.from_frame(X.iloc[idx_tr])
+    return {
+        "pre": pre,
+        "X_trp": X_trp,
+        "X_valp": X_valp,
+        "y_tr": y.to_numpy()[idx_tr],
+        "y_val": y.to_numpy()[idx_val],
+        "idx_tr": idx_tr,
+        "idx_val": idx_val,
+        "profile": profile,
+    }
+
+
+def train_in_memory(args):
+    """
+    Default path: whole CSV in memory, cached preparation, HPO.
+    """
+    # Split + fitted preprocessing are cached by data fingerprint; a hit skips
+    # the CSV parse and fit_transform entirely (arrays come back memory-mapped).
+    t0 = time.perf_counter()
+    cache_dir = args.cache_dir or os.path.join(args.outdir, "cache")
+    key = cache_key(args.data, SEED, TEST_SIZE)
+    with span("data_cache_load"):
+        prep = None if args.no_cache else load_prepared(cache_dir, key)
+    cache_hit = prep is not None
+    if prep is None:
+        with span("prepare_data"):
+            prep = prepare_data(args.data)
+        if not args.no_cache:
+            with span("data_cache_save"):
+                save_prepared(cache_dir, key, prep)
+    pre, X_trp, X_valp, y_tr, y_val = (prep[k] for k in ("pre", "X_trp", "X_valp", "y_tr", "y_val"))
+    data_cache = {"key": key, "hit": cache_hit, "enabled": not args.no_cache,
+                  "prepare_seconds": time.perf_counter() - t0}
 
     model = build_model(args.model)
 
     # Always do randomized HPO (deterministic)
     HPO_TRIALS = 15
-    model = randomized_hpo(model, X_trp, y_tr, HPO_TRIALS, seed=SEED)
+    n_jobs = args.hpo_jobs or os.cpu_count() or 1
+    with span("hpo"):
+        model, hpo = run_hpo(model, X_trp, y_tr, HPO_TRIALS, seed=SEED, mode=args.hpo, n_jobs=n_jobs)
 
     #model.fit(X_trp, y_tr)
+    run_meta = {"training_mode": "in_memory", "n_train": int(len(y_tr)), "data_cache": data_cache}
+    # Segment columns of the validation rows (not part of the cached arrays).
+    with span("read_segments"):
+        seg_val = pd.read_csv(args.data, usecols=SEGMENT_COLS).iloc[prep["idx_val"]]
+    return pre, model, X_valp, y_val, seg_val, prep["profile"], hpo, run_meta
 
-    if hasattr(model, "predict_proba"):
-        p_val = model.predict_proba(X_valp)[:, 1]
+
+def train_chunked(args):
+    """
+    Out-of-core path (see src/outofcore.py): the full CSV is never resident.
+    """
+    t0 = time.perf_counter()
+    with span("scan"):
+        stats, X_val, y_val, n_train = scan(args.data, args.chunksize, SEED, TEST_SIZE, args.val_max_rows)
+    pre = stats.build_preprocessor()
+    scan_seconds = time.perf_counter() - t0
+    with span("fit_chunked"):
+        model = train_xgb_chunked(args.data, pre, build_model("xgb"), args.chunksize, SEED, TEST_SIZE)
+
+    def train_rows():
+        for i, chunk in enumerate(read_chunks(args.data, args.chunksize)):
+            yield chunk[~holdout_mask(chunk[TARGET].astype(int).to_numpy(), TEST_SIZE, SEED, i)]
+    with span("reference_profile"):
+        profile = ReferenceProfile.from_chunks(train_rows)
+    run_meta = {
+        "training_mode": "chunked",
+        "chunksize": args.chunksize,
+        "n_train": n_train,
+        "n_val": int(len(y_val)),
+        "scan_seconds": scan_seconds,
+        "fit_seconds": time.perf_counter() - t0 - scan_seconds,
+    }
+    with span("transform"):
+        X_valp = pre.transform(X_val)
+    return pre, model, X_valp, y_val, X_val[SEGMENT_COLS], profile, run_meta
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", required=True)
+    ap.add_argument("--outdir", required=True)
+    ap.add_argument("--model", default="xgb", choices=["xgb","hgb","logreg"])
+    ap.add_argument("--keep-versions", type=int, default=5,
+                    help="Versioned artifact dirs to retain under <outdir>/versions")
+    ap.add_argument("--hpo", default="random", choices=["random", "halving"],
+                    help="random: every trial on full folds; halving: successive halving over boosting rounds")
+    ap.add_argument("--hpo-jobs", type=int, default=0,
+                    help="Parallel HPO fits (0 = all cores); each fit then uses one thread")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Prepared-data cache (default: <outdir>/cache)")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--chunksize", type=int, default=0,
+                    help="Out-of-core mode: stream the CSV in chunks of N rows (xgb only, no HPO)")
+    ap.add_argument("--val-max-rows", type=int, default=200_000,
+                    help="Out-of-core mode: cap on holdout rows kept for evaluation")
+    ap.add_argument("--eval-bootstrap", type=int, default=200,
+                    help="Bootstrap replicates for the metric confidence intervals (0 disables)")
+    profiling.add_arguments(ap)
+    args = ap.parse_args()
+    if args.chunksize and args.model != "xgb":
+        ap.error("--chunksize requires --model xgb")
+    try:
+        prof = profiling.from_args("train", args)
+    except ValueError as e:
+        ap.error(str(e))
+
+    os.makedirs(args.outdir, exist_ok=True)
+    if args.chunksize:
+        pre, model, X_valp, y_val, seg_val, profile, run_meta = train_chunked(args)
+        hpo = None
     else:
-        s = model.decision_function(X_valp).reshape(-1, 1)
-        p_val = MinMaxScaler().fit_transform(s).ravel()
+        pre, model, X_valp, y_val, seg_val, profile, hpo, run_meta = train_in_memory(args)
 
-    y_pred = (p_val >= 0.5).astype(int)
-    m = compute_metrics(y_val, p_val, y_pred)
+    with span("predict_proba"):
+        p_val = positive_proba(model, X_valp)
+    # Drift reference for the inputs (training rows) and for the model's output.
+    profile.set_prediction_reference(p_val)
+    profile.save(os.path.join(args.outdir, "reference_profile.json"))
 
+    with span("evaluate"):
+        m = evaluate(y_val, p_val, threshold=0.5, segments=seg_val, n_boot=args.eval_bootstrap, seed=SEED)
+
+    version = new_version_id()
     meta = {
+        "model_version": version,
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "git_sha": get_git_sha(),
         "model_type": model.__class__.__name__,
+        **run_meta,
+        "peak_rss_mb": peak_rss_mb(),
     }
+    trials_path = os.path.join(args.outdir, "hpo_trials.json")
+    if hpo is not None:
+        meta["hpo"] = {k: v for k, v in hpo.items() if k != "trials"}
+        save_json(trials_path, hpo["trials"])
+    elif os.path.exists(trials_path):
+        os.remove(trials_path)  # stale trials must not be versioned with this model
+    if prof is not None:
+        # Covers everything up to here; saving the artifacts below is not included.
+        meta["profile"] = prof.finish()
     save_json(os.path.join(args.outdir, "metrics.json"), {**m, **meta})
 
     dump(pre, os.path.join(args.outdir, "feature_pipeline.pkl"))
     dump(model, os.path.join(args.outdir, "model.pkl"))
+    CompiledPreprocessor.from_pipeline(pre).save(os.path.join(args.outdir, "compiled_pipeline.json"))
+    export_bundle(args.outdir, pre, model)
 
     # Features importance
     try:
@@ -78,11 +219,16 @@ def main():
     except Exception:
         pass
 
+    # Versioned copy last: LATEST only moves once every file is in place.
+    publish_version(args.outdir, VERSIONED_FILES, version=version, keep=args.keep_versions)
+
     print(json.dumps(m, indent=2))
 
-def randomized_hpo(model, X, y, trials: int, seed: int = 42):
+def _search_space(model):
     """
-    Run trial randomized HPO.
+    (param_dist, halving resource) for models that get HPO, else None. The
+    resource is the boosting-round parameter, so halving prunes weak
+    configurations after a fraction of the trees.
     """
     try:
         from xgboost import XGBClassifier  # optional
@@ -99,34 +245,96 @@ def randomized_hpo(model, X, y, trials: int, seed: int = 42):
             "colsample_bytree": [0.6, 0.8, 1.0],
             "reg_lambda": [0.0, 0.5, 1.0, 2.0],
         }
-        scoring = "roc_auc"
-    else:
-        from sklearn.ensemble import HistGradientBoostingClassifier
-        if isinstance(model, HistGradientBoostingClassifier):
-            param_dist = {
-                "max_leaf_nodes": [15, 31, 63],
-                "learning_rate": [0.03, 0.05, 0.08, 0.1],
-                "l2_regularization": [0.0, 0.5, 1.0],
-            }
-        else:
+        return param_dist, "n_estimators"
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    if isinstance(model, HistGradientBoostingClassifier):
+        param_dist = {
+            "max_leaf_nodes": [15, 31, 63],
+            "learning_rate": [0.03, 0.05, 0.08, 0.1],
+            "l2_regularization": [0.0, 0.5, 1.0],
+        }
+        return param_dist, "max_iter"
+    return None
+
+
+def run_hpo(model, X, y, trials: int, seed: int = 42, mode: str = "random", n_jobs: int = 1):
+    """
+    Deterministic HPO under `seed`. Returns (best_estimator, report) where
+    report has the wall time, best score/params and one entry per trial
+    (report is None for models without a search space).
+
+    With n_jobs > 1 trials run in parallel and the estimator is pinned to
+    one thread so XGBoost does not oversubscribe the cores.
+    """
+    space = _search_space(model)
+    if space is None:
+        with span("fit"):
             model.fit(X, y)
-            return model
-        scoring = "roc_auc"
+        return model, None
+    param_dist, resource = space
+    if n_jobs > 1 and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
 
     cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=seed)
-    search = RandomizedSearchCV(
-        model,
-        param_distributions=param_dist,
-        n_iter=trials,
-        scoring=scoring,
-        cv=cv,
-        random_state=seed,
-        n_jobs=1,
-        verbose=0,
-        refit=True,
-    )
-    search.fit(X, y)
-    return search.best_estimator_
+    common = dict(scoring="roc_auc", cv=cv, random_state=seed, n_jobs=n_jobs, verbose=0, refit=True)
+    if mode == "halving":
+        max_rounds = max(param_dist.pop(resource, [model.get_params()[resource]]))
+        search = HalvingRandomSearchCV(
+            model, param_distributions=param_dist, n_candidates=trials,
+            resource=resource, max_resources=max_rounds, min_resources=max(max_rounds // 9, 1),
+            factor=3, **common,
+        )
+    elif mode == "random":
+        search = RandomizedSearchCV(model, param_distributions=param_dist, n_iter=trials, **common)
+    else:
+        raise ValueError(f"Unknown HPO mode: {mode}")
+
+    t0 = time.perf_counter()
+    with span("search_fit"):
+        search.fit(X, y)
+        wall = time.perf_counter() - t0
+        if profiling.active():
+            # Trials run in joblib workers: their fit + score time is added as
+            # children afterwards, scaled to the wall time when they overlapped.
+            res = search.cv_results_
+            busy = (res["mean_fit_time"] + res["mean_score_time"]) * cv.get_n_splits()
+            scale = min(1.0, wall / busy.sum()) if busy.sum() > 0 else 1.0
+            for seconds in busy:
+                profiling.record("trial", float(seconds) * scale)
+
+    res = search.cv_results_
+    n_splits = cv.get_n_splits()
+    trials_out = []
+    for i, params in enumerate(res["params"]):
+        trial = {
+            "params": {k: (v.item() if hasattr(v, "item") else v) for k, v in params.items()},
+            "mean_score": float(res["mean_test_score"][i]),
+            "std_score": float(res["std_test_score"][i]),
+            "fit_seconds": float((res["mean_fit_time"][i] + res["mean_score_time"][i]) * n_splits),
+        }
+        if mode == "halving":
+            trial["iter"] = int(res["iter"][i])
+            trial["n_resources"] = int(res["n_resources"][i])
+        trials_out.append(trial)
+
+    best_params = {k: (v.item() if hasattr(v, "item") else v) for k, v in search.best_params_.items()}
+    report = {
+        "mode": mode,
+        "n_jobs": n_jobs,
+        "n_trials": len(trials_out),
+        "wall_seconds": wall,
+        "best_score": float(search.best_score_),
+        "best_params": best_params,
+        "trials": trials_out,
+    }
+    return search.best_estimator_, report
+
+
+def randomized_hpo(model, X, y, trials: int, seed: int = 42):
+    """
+    Run trial randomized HPO.
+    """
+    return run_hpo(model, X, y, trials, seed=seed, mode="random", n_jobs=1)[0]
 
 
 if __name__ == "__main__":
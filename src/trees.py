@@ -0,0 +1,180 @@
+# Vectorized NumPy evaluator for the boosted-tree models built by src/models.py.
+# Converts XGBoost / HistGradientBoosting ensembles into flat node arrays and
+# walks every tree for a whole batch at once.
+
+import json, os
+from typing import Any, Dict, Optional
+import numpy as np
+
+# Arrays that define an ensemble; also the .npy file stems inside a bundle.
+NODE_ARRAYS = ["feature", "threshold", "left", "right", "value", "default_left", "roots"]
+
+
+class TreeEnsemble:
+    """
+    Binary-logistic tree ensemble as contiguous node arrays.
+
+    All trees share one node table; `roots[t]` is the root of tree t and
+    leaves have left == -1 with their output in `value`. A row goes left when
+    `x < threshold` (XGBoost) or `x <= threshold` (HGB, `inclusive=True`);
+    NaN follows `default_left`.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left, roots,
+                 base_margin: float, max_depth: int, inclusive: bool, source: str = ""):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+        self.inclusive = bool(inclusive)
+        self.source = source
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    # ---- conversion -------------------------------------------------------
+
+    @classmethod
+    def from_model(cls, model: Any) -> Optional["TreeEnsemble"]:
+        """
+        Convert a fitted XGBClassifier/Booster or HistGradientBoostingClassifier;
+        None for models this evaluator does not support.
+        """
+        if hasattr(model, "get_booster") or model.__class__.__name__ == "Booster":
+            return cls.from_xgb(model)
+        if model.__class__.__name__ == "HistGradientBoostingClassifier":
+            return cls.from_hgb(model)
+        return None
+
+    @classmethod
+    def from_xgb(cls, model: Any) -> "TreeEnsemble":
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        if learner["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"Unsupported XGBoost objective: {learner['objective']['name']}")
+        gb = learner["gradient_booster"]
+        if gb["name"] != "gbtree":
+            raise ValueError(f"Unsupported XGBoost booster: {gb['name']}")
+        trees = gb["model"]["trees"]
+        # XGBClassifier keeps every tree unless early stopping picked a best iteration.
+        best = booster.attr("best_iteration")
+        if best is not None:
+            trees = trees[: int(best) + 1]
+
+        base = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        parts: Dict[str, list] = {k: [] for k in NODE_ARRAYS}
+        offset, depth = 0, 0
+        for t in trees:
+            if any(t["split_type"]):
+                raise ValueError("Categorical XGBoost splits are not supported")
+            left = np.asarray(t["left_children"], dtype=np.int64)
+            right = np.asarray(t["right_children"], dtype=np.int64)
+            leaf = left == -1
+            parts["feature"].append(np.where(leaf, 0, t["split_indices"]))
+            parts["threshold"].append(np.where(leaf, 0.0, t["split_conditions"]))
+            parts["left"].append(np.where(leaf, -1, left + offset))
+            parts["right"].append(np.where(leaf, -1, right + offset))
+            parts["value"].append(np.where(leaf, t["split_conditions"], 0.0))
+            parts["default_left"].append(np.asarray(t["default_left"], dtype=bool))
+            parts["roots"].append([offset])
+            depth = max(depth, _depth(left, right))
+            offset += len(left)
+
+        arrays = {k: np.concatenate(v) for k, v in parts.items()}
+        # XGBoost compares float32 features against float32 split values.
+        arrays["threshold"] = arrays["threshold"].astype(np.float32)
+        return cls(**arrays, base_margin=float(np.log(base / (1.0 - base))),
+                   max_depth=depth, inclusive=False, source="xgb")
+
+    @classmethod
+    def from_hgb(cls, model: Any) -> "TreeEnsemble":
+        if getattr(model, "n_trees_per_iteration_", 1) != 1:
+            raise ValueError("Only binary HistGradientBoostingClassifier is supported")
+        parts: Dict[str, list] = {k: [] for k in NODE_ARRAYS}
+        offset, depth = 0, 0
+        for (pred,) in model._predictors:
+            nodes = pred.nodes
+            if nodes["is_categorical"].any():
+                raise ValueError("Categorical HGB splits are not supported")
+            leaf = nodes["is_leaf"].astype(bool)
+            left = nodes["left"].astype(np.int64)
+            right = nodes["right"].astype(np.int64)
+            parts["feature"].append(np.where(leaf, 0, nodes["feature_idx"]))
+            parts["threshold"].append(np.where(leaf, 0.0, nodes["num_threshold"]))
+            parts["left"].append(np.where(leaf, -1, left + offset))
+            parts["right"].append(np.where(leaf, -1, right + offset))
+            parts["value"].append(np.where(leaf, nodes["value"], 0.0))
+            parts["default_left"].append(nodes["missing_go_to_left"].astype(bool))
+            parts["roots"].append([offset])
+            depth = max(depth, int(nodes["depth"].max()))
+            offset += len(nodes)
+
+        arrays = {k: np.concatenate(v) for k, v in parts.items()}
+        arrays["threshold"] = arrays["threshold"].astype(np.float64)
+        base = float(np.ravel(model._baseline_prediction)[0])
+        return cls(**arrays, base_margin=base, max_depth=depth, inclusive=True, source="hgb")
+
+    # ---- evaluation -------------------------------------------------------
+
+    def decision_function(self, X, chunk_rows: int = 4096) -> np.ndarray:
+        X = np.asarray(X, dtype=self.threshold.dtype)
+        out = np.empty(len(X), dtype=np.float64)
+        for s in range(0, len(X), chunk_rows):
+            out[s:s + chunk_rows] = self._margin(X[s:s + chunk_rows])
+        return out
+
+    def _margin(self, X: np.ndarray) -> np.ndarray:
+        n = len(X)
+        rows = np.arange(n)[:, None]
+        idx = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            left = self.left[idx]
+            active = left >= 0
+            if not active.any():
+                break
+            x = X[rows, self.feature[idx]]
+            thr = self.threshold[idx]
+            go_left = (x <= thr) if self.inclusive else (x < thr)
+            nan = np.isnan(x)
+            if nan.any():
+                go_left = np.where(nan, self.default_left[idx], go_left)
+            nxt = np.where(go_left, left, self.right[idx])
+            idx = np.where(active, nxt, idx)
+        return self.value[idx].sum(axis=1) + self.base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    # ---- persistence ------------------------------------------------------
+
+    def save(self, root: str, prefix: str = "trees_") -> Dict[str, Any]:
+        """
+        Write node arrays as `<prefix><name>.npy` under `root`; returns the
+        scalar metadata to keep alongside (e.g. in a bundle manifest).
+        """
+        for k in NODE_ARRAYS:
+            np.save(os.path.join(root, f"{prefix}{k}.npy"), getattr(self, k))
+        return {"base_margin": self.base_margin, "max_depth": self.max_depth,
+                "inclusive": self.inclusive, "source": self.source}
+
+    @classmethod
+    def load(cls, root: str, meta: Dict[str, Any], prefix: str = "trees_", mmap: bool = True) -> "TreeEnsemble":
+        mode = "r" if mmap else None
+        arrays = {k: np.load(os.path.join(root, f"{prefix}{k}.npy"), mmap_mode=mode) for k in NODE_ARRAYS}
+        return cls(**arrays, **meta)
+
+
+def _depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = np.zeros(len(left), dtype=np.int64)
+    # XGBoost stores children after their parents, so one forward pass suffices.
+    for i in range(len(left)):
+        if left[i] >= 0:
+            depth[left[i]] = depth[right[i]] = depth[i] + 1
+    return int(depth.max())
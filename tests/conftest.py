@@ -3,3 +3,88 @@ ROOT = os.path.dirname(os.path.abspath(__file__))  # .../tests
 ROOT = os.path.dirname(ROOT)                       # repo root
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+import importlib
+import subprocess
+import pytest
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+SAMPLE_ROWS = [
+    {
+        "plan_type": "Standard",
+        "contract_type": "Monthly",
+        "autopay": "Yes",
+        "is_promo_user": "No",
+        "add_on_count": 1,
+        "tenure_months": 8,
+        "monthly_usage_gb": 130.5,
+        "avg_latency_ms": 145.0,
+        "support_tickets_30d": 0,
+        "discount_pct": 10.0,
+        "payment_failures_90d": 0,
+        "downtime_hours_30d": 0.0,
+    },
+    {
+        "plan_type": "Basic",
+        "contract_type": "Monthly",
+        "autopay": "No",
+        "is_promo_user": "Yes",
+        "add_on_count": 0,
+        "tenure_months": 2,
+        "monthly_usage_gb": 70.0,
+        "avg_latency_ms": 210.0,
+        "support_tickets_30d": 3,
+        "discount_pct": 0.0,
+        "payment_failures_90d": 2,
+        "downtime_hours_30d": 0.0,
+    },
+]
+
+
+@pytest.fixture
+def sample_rows():
+    return [dict(r) for r in SAMPLE_ROWS]
+
+
+@pytest.fixture(scope="session")
+def artifacts_dir(tmp_path_factory):
+    """
+    Session-scoped artifacts trained once into a temp dir (the tracked
+    artifacts/ directory is left untouched).
+    """
+    if not os.path.exists(DATA_PATH):
+        pytest.skip(f"Dataset not found at {DATA_PATH}")
+    out = tmp_path_factory.mktemp("artifacts")
+    subprocess.run(
+        [sys.executable, "-m", "src.train", "--data", DATA_PATH, "--outdir", str(out)],
+        check=True,
+    )
+    return str(out)
+
+
+@pytest.fixture
+def load_app(monkeypatch):
+    """
+    Re-import src.app under the given environment (the app reads its config
+    and artifacts at import). The default app is restored afterwards.
+    """
+    import src.app
+
+    def _load(**env):
+        for k, v in env.items():
+            monkeypatch.setenv(k, str(v))
+        return importlib.reload(src.app)
+
+    yield _load
+    src.app._watch_stop.set()
+    if src.app._history_writer is not None:
+        src.app._history_writer.stop()
+    if src.app._active is not None:
+        src.app._active.close()
+    if src.app._shadow is not None:
+        src.app._shadow.close()
+    if src.app._profiler is not None:
+        src.app._profiler.stop()
+    monkeypatch.undo()
+    importlib.reload(src.app)
@@ -0,0 +1,51 @@
+# agent_monitor --daemon: incremental evaluation, debouncing, status transitions.
+
+import asyncio, json
+
+from src.agent_monitor import ModelWatch, build_plan, load_jsonl, run_daemon
+
+METRICS = "data/metrics_history.jsonl"
+
+
+def test_daemon_emits_only_status_transitions(tmp_path):
+    lines = open(METRICS, encoding="utf-8").read().splitlines()
+    a, b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    a.write_text("\n".join(lines[:60]) + "\n", encoding="utf-8")
+    b.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    drift = tmp_path / "drift.json"
+    drift.write_text(json.dumps({"overall_drift": False}), encoding="utf-8")
+    watches = [ModelWatch("a", str(a), str(drift)), ModelWatch("b", str(b), store_root=str(tmp_path / "store"))]
+
+    events, evaluations = [], []
+    for w in watches:
+        plan = w.plan
+        w.plan = lambda plan=plan, w=w: evaluations.append(w.name) or plan()
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.ensure_future(run_daemon(watches, lambda w, old, p: events.append((w.name, old, p)),
+                                                poll_s=0.01, debounce_s=0.2, stop=stop))
+        await asyncio.sleep(0.6)
+        # A burst of degraded points for model a, written line by line.
+        bad = json.loads(lines[59])
+        for _ in range(2):
+            with open(a, "a", encoding="utf-8") as f:
+                f.write(json.dumps({**bad, "roc_auc": 0.5}) + "\n")
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.6)
+        # More bad points keep the status: re-evaluated, nothing emitted.
+        with open(a, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**bad, "roc_auc": 0.5}) + "\n")
+        await asyncio.sleep(0.6)
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+
+    b_status = build_plan(load_jsonl(METRICS), {})["status"]
+    got = [(n, old, p["status"]) for n, old, p in events]
+    assert sorted(got[:2]) == [("a", None, "healthy"), ("b", None, b_status)]
+    assert got[2:] == [("a", "healthy", "critical")]
+    assert events[-1][2] == build_plan(load_jsonl(str(a))[:-1], {"overall_drift": False})
+    # Initial evaluations, one for the debounced burst, one for the last point.
+    assert evaluations.count("a") == 3 and evaluations.count("b") == 1
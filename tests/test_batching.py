@@ -0,0 +1,89 @@
+# Micro-batcher coalesces concurrent calls and routes results back per caller.
+
+import threading
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher
+
+
+def test_micro_batcher_coalesces_and_splits_results():
+    calls = []
+
+    def score(X):
+        calls.append(len(X))
+        return X[:, 0] * 2.0
+
+    batcher = MicroBatcher(score, window_ms=50, max_rows=8)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.submit(np.full((2, 3), i, dtype=float))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert sum(calls) == 20
+    assert max(calls) <= 8 and len(calls) < 10
+    for i in range(10):
+        np.testing.assert_array_equal(results[i], [2.0 * i, 2.0 * i])
+
+    st = batcher.stats()
+    assert st["requests"] == 10 and st["rows"] == 20
+    assert st["queue_delay_ms_p95"] is not None
+
+
+def test_micro_batcher_propagates_errors():
+    def boom(X):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(boom, window_ms=1, max_rows=4)
+    try:
+        batcher.submit(np.zeros((1, 2)))
+    except ValueError as e:
+        assert "bad batch" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    finally:
+        batcher.close()
+
+
+def test_app_batching_matches_unbatched_predictions(artifacts_dir, load_app, sample_rows):
+    from fastapi.testclient import TestClient
+
+    plain = load_app(ARTIFACTS_DIR=artifacts_dir, BATCH_WINDOW_MS=0)
+    assert plain._active.batcher is None
+    expected = [TestClient(plain.app).post("/predict", json={"rows": [r]}).json()["prob"][0]
+                for r in sample_rows]
+
+    mod = load_app(ARTIFACTS_DIR=artifacts_dir, BATCH_WINDOW_MS=20, BATCH_MAX_ROWS=2)
+    assert mod._active.batcher is not None
+    client = TestClient(mod.app)
+
+    results = {}
+
+    def worker(i):
+        row = sample_rows[i % 2]
+        results[i] = client.post("/predict", json={"rows": [row]}).json()["prob"][0]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(60)
+    assert len(results) == 8
+    for i, p in results.items():
+        assert p == pytest.approx(expected[i % 2], rel=1e-6)
+
+    st = client.get("/stats").json()["batching"]
+    assert st["requests"] == 8 and st["batches"] >= 1
+    assert st["window_ms"] == 20 and st["max_rows"] == 2
+
+    # Payloads of BATCH_MAX_ROWS rows or more bypass the batcher.
+    resp = client.post("/predict", json={"rows": sample_rows})
+    assert resp.json()["prob"] == pytest.approx(expected, rel=1e-6)
+    assert client.get("/stats").json()["batching"]["requests"] == 8
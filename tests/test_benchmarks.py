@@ -0,0 +1,46 @@
+# Load-test harness (benchmarks/loadtest.py) and results comparison.
+
+import asyncio
+
+import httpx
+
+from benchmarks.compare import compare
+from benchmarks.loadtest import Recorder, build_requests, closed_loop, open_loop
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+def test_request_mix_is_seeded():
+    sizes, endpoints = {"1": 0.5, "20": 0.5}, {"predict": 0.5, "columnar": 0.3, "stream": 0.2}
+    a = build_requests(DATA_PATH, 50, 7, sizes, endpoints)
+    assert a == build_requests(DATA_PATH, 50, 7, sizes, endpoints)
+    assert a != build_requests(DATA_PATH, 50, 8, sizes, endpoints)
+    assert {r[0] for r in a} == set(endpoints) and {r[3] for r in a} == {1, 20}
+
+
+def test_closed_and_open_loop_against_app(artifacts_dir, load_app):
+    app = load_app(ARTIFACTS_DIR=artifacts_dir).app
+    reqs = build_requests(DATA_PATH, 20, 0, {"1": 0.8, "10": 0.2},
+                          {"predict": 0.6, "columnar": 0.2, "stream": 0.2})
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+            closed, opened = Recorder(), Recorder()
+            t_closed = await closed_loop(client, reqs, 2, 0.5, closed)
+            t_open = await open_loop(client, reqs, 20.0, 0.5, opened, poisson=False, seed=0, max_inflight=4)
+            return closed.metrics(t_closed), opened.metrics(t_open)
+
+    closed, opened = asyncio.run(go())
+    assert closed["requests"] > 0 and closed["errors"] == 0
+    assert opened["requests"] == 10 and opened["errors"] == 0
+    assert opened["latency_p50_ms"] <= opened["latency_p99_ms"] <= opened["latency_max_ms"]
+    assert closed["predict.requests"] + closed.get("columnar.requests", 0) + \
+        closed.get("stream.requests", 0) == closed["requests"]
+
+
+def test_compare_judges_direction():
+    base = {"latency_p95_ms": 10.0, "rows_per_s": 1000.0, "requests": 5, "peak_rss_mb": 200.0}
+    new = {"latency_p95_ms": 13.0, "rows_per_s": 1300.0, "requests": 50, "peak_rss_mb": 201.0}
+    verdicts = {r["metric"]: r["verdict"] for r in compare(base, new, threshold_pct=10)}
+    assert verdicts == {"latency_p95_ms": "regression", "rows_per_s": "improvement",
+                        "requests": "", "peak_rss_mb": ""}
@@ -0,0 +1,25 @@
+# Compact inference bundle scores like the pickled artifacts.
+
+import os
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from src.bundle import has_bundle, load_bundle
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+def test_bundle_matches_pickles(artifacts_dir):
+    assert has_bundle(artifacts_dir)
+    comp, model = load_bundle(artifacts_dir)
+    # Arrays are views onto the mapped .npy files, not private copies.
+    assert isinstance(comp.mean.base, np.memmap)
+
+    df = pd.read_csv(DATA_PATH, nrows=2000)[CATEGORICAL_COLS + NUMERIC_COLS]
+    pre = load(os.path.join(artifacts_dir, "feature_pipeline.pkl"))
+    clf = load(os.path.join(artifacts_dir, "model.pkl"))
+    expected = clf.predict_proba(pre.transform(df))[:, 1]
+    got = model.predict_proba(comp.transform_rows(df.to_dict(orient="records")))[:, 1]
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,56 @@
+# Columnar /predict/columnar matches row-wise /predict, including 400 errors.
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+from src.io_schemas import validate_columns
+
+
+def _to_columns(rows):
+    return {c: [r[c] for r in rows] for c in CATEGORICAL_COLS + NUMERIC_COLS}
+
+
+def test_columnar_matches_rows(artifacts_dir, load_app, sample_rows):
+    mod = load_app(ARTIFACTS_DIR=artifacts_dir)
+    client = TestClient(mod.app)
+
+    rows = sample_rows * 50
+    ref = client.post("/predict", json={"rows": rows}).json()
+    resp = client.post("/predict/columnar", json={"columns": _to_columns(rows)})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["prob"] == pytest.approx(ref["prob"], rel=1e-6)
+    assert body["cls"] == ref["cls"]
+
+
+def test_columnar_invalid_payload_returns_400(artifacts_dir, load_app, sample_rows):
+    mod = load_app(ARTIFACTS_DIR=artifacts_dir)
+    client = TestClient(mod.app)
+
+    cols = _to_columns(sample_rows)
+    cols["plan_type"][1] = "Gold"
+    cols["discount_pct"][0] = 150.0
+    cols["tenure_months"][1] = None
+    resp = client.post("/predict/columnar", json={"columns": cols})
+    assert resp.status_code == 400
+    body = resp.json()
+    assert body["detail"] == "Invalid request payload"
+    locs = {tuple(e["loc"]) for e in body["errors"]}
+    assert locs == {
+        ("body", "columns", "plan_type", 1),
+        ("body", "columns", "discount_pct", 0),
+        ("body", "columns", "tenure_months", 1),
+    }
+
+
+def test_validate_columns_shape_errors(sample_rows):
+    cols = _to_columns(sample_rows)
+    del cols["autopay"]
+    _, errors = validate_columns(cols)
+    assert [e["type"] for e in errors] == ["missing"]
+
+    cols = _to_columns(sample_rows)
+    cols["avg_latency_ms"] = cols["avg_latency_ms"][:1]
+    _, errors = validate_columns(cols)
+    assert errors and errors[0]["loc"][-1] == "avg_latency_ms"
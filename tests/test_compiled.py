@@ -0,0 +1,47 @@
+# Parity of the compiled (pandas-free) preprocessor against the sklearn pipeline.
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import build_preprocessor, CATEGORICAL_COLS, NUMERIC_COLS
+from src.compiled import CompiledPreprocessor
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    if not os.path.exists(DATA_PATH):
+        pytest.skip(f"Dataset not found at {DATA_PATH}")
+    df = pd.read_csv(DATA_PATH)[CATEGORICAL_COLS + NUMERIC_COLS]
+    pre = build_preprocessor().fit(df)
+    return pre, df
+
+
+def test_compiled_matches_pipeline_on_dataset(fitted, tmp_path):
+    pre, df = fitted
+    path = tmp_path / "compiled_pipeline.json"
+    CompiledPreprocessor.from_pipeline(pre).save(str(path))
+    comp = CompiledPreprocessor.load(str(path))
+
+    expected = pre.transform(df)
+    got = comp.transform_rows(df.to_dict(orient="records"))
+    assert got.dtype == np.float32
+    assert got.shape == expected.shape
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_compiled_handles_missing_and_unknown(fitted):
+    pre, df = fitted
+    comp = CompiledPreprocessor.from_pipeline(pre)
+    edge = df.head(3).copy()
+    edge = edge.astype({c: "object" for c in CATEGORICAL_COLS})
+    edge.loc[edge.index[0], "plan_type"] = np.nan
+    edge.loc[edge.index[1], "contract_type"] = "Weekly"
+    edge.loc[edge.index[2], "tenure_months"] = np.nan
+
+    expected = pre.transform(edge)
+    got = comp.transform_rows(edge.to_dict(orient="records"))
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,35 @@
+# Prepared-data cache: hit reproduces a fresh preparation, key follows the data bytes.
+
+import numpy as np
+import pandas as pd
+
+from src.datacache import cache_key, load_prepared, save_prepared
+from src.features import SEED
+from src.train import prepare_data
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+def test_cache_roundtrip_and_key(tmp_path):
+    data = tmp_path / "small.csv"
+    pd.read_csv(DATA_PATH, nrows=2000).to_csv(data, index=False)
+    root = str(tmp_path / "cache")
+
+    key = cache_key(str(data), SEED, 0.2)
+    assert load_prepared(root, key) is None
+
+    fresh = prepare_data(str(data))
+    save_prepared(root, key, fresh)
+    hit = load_prepared(root, key)
+    assert hit is not None
+    assert isinstance(hit["X_trp"], np.memmap)
+    for k in ("X_trp", "X_valp", "y_tr", "y_val", "idx_tr", "idx_val"):
+        np.testing.assert_array_equal(hit[k], fresh[k])
+    assert hit["profile"].to_dict() == fresh["profile"].to_dict()
+    np.testing.assert_allclose(hit["pre"].transform(pd.read_csv(data).head(50)),
+                               fresh["pre"].transform(pd.read_csv(data).head(50)))
+
+    assert cache_key(str(data), SEED + 1, 0.2) != key
+    with open(data, "a") as f:
+        f.write(open(data).read().splitlines()[1] + "\n")
+    assert cache_key(str(data), SEED, 0.2) != key
@@ -0,0 +1,55 @@
+# Per-row contributions: additivity, one-hot groups summed back to their
+# feature, the /explain endpoint with its cache, and the bulk CLI.
+
+import numpy as np
+import pandas as pd
+
+from src.explain import FEATURES, explain_csv, group_matrix
+from src.serving import ModelHandle
+
+
+def test_contributions_add_up_and_group_one_hot(artifacts_dir, sample_rows):
+    h = ModelHandle.load(artifacts_dir)
+    values = h.explain_rows(sample_rows)
+    prob = values[:, -1]
+    assert np.array_equal(prob, h.score_rows(sample_rows))
+    assert np.allclose(values[:, :-1].sum(axis=1), np.log(prob / (1 - prob)), atol=1e-4)
+
+    # Raw contributions per encoded column, summed by hand per input feature.
+    ex = h.explainer()
+    names = h.compiled.feature_names()
+    raw = ex._contribs(h.transform_rows(sample_rows))
+    for i, f in enumerate(FEATURES):
+        cols = [j for j, n in enumerate(names) if n == f or n.startswith(f + "_")]
+        assert np.allclose(values[:, i], raw[:, cols].sum(axis=1), atol=1e-6)
+    G = group_matrix(names)
+    assert G.sum() == len(names) + 1 and (G.sum(axis=1) == 1).all()
+
+
+def test_explain_endpoint_cache_and_bulk_cli(artifacts_dir, load_app, sample_rows, tmp_path):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(load_app(ARTIFACTS_DIR=artifacts_dir).app)
+    body = client.post("/explain", json={"rows": sample_rows}, params={"top_k": 2}).json()
+    assert body["units"] == "log-odds" and body["features"] == FEATURES
+    prob = client.post("/predict", json={"rows": sample_rows}).json()["prob"]
+    for row, p in zip(body["rows"], prob):
+        assert row["prob"] == p and set(row["contributions"]) == set(FEATURES)
+        assert len(row["top"]) <= 2 and all(r["contribution"] > 0 for r in row["top"])
+        top = sorted(row["contributions"].values(), reverse=True)
+        assert [r["contribution"] for r in row["top"]] == [v for v in top[:2] if v > 0]
+    assert client.post("/explain", json={"rows": sample_rows}).json()["rows"][0]["prob"] == prob[0]
+    assert client.get("/stats").json()["explain_cache"]["hits"] == 2
+    assert client.post("/explain", json={"rows": sample_rows}, params={"top_k": 99}).status_code == 400
+
+    # Bulk: repeated rows are explained once and match the endpoint.
+    src = tmp_path / "in.csv"
+    pd.DataFrame(sample_rows * 3).assign(customer_id=range(6)).to_csv(src, index=False)
+    r = explain_csv(str(src), str(tmp_path / "out.csv"), artifacts_dir, id_col="customer_id", top_k=2)
+    assert r["rows"] == 6 and r["explained_rows"] == 2
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert out["customer_id"].tolist() == list(range(6))
+    for i, row in enumerate(body["rows"] * 3):
+        assert abs(out["prob"][i] - row["prob"]) < 1e-12
+        assert np.allclose([out[f"contrib_{f}"][i] for f in FEATURES], [row["contributions"][f] for f in FEATURES])
+        assert out["reason_1"][i] == row["top"][0]["feature"]
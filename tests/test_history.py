@@ -0,0 +1,71 @@
+# Incremental metrics-history store behind `agent_monitor --store`.
+
+import json
+
+from src.agent_monitor import build_plan, load_jsonl, plan_from_store
+from src.history import HistoryStore
+
+METRICS = "data/metrics_history.jsonl"
+DRIFT = {"overall_drift": True}
+
+
+def test_incremental_ingest_matches_full_history(tmp_path):
+    lines = open(METRICS, encoding="utf-8").read().splitlines()
+    src = tmp_path / "metrics.jsonl"
+    store_dir = str(tmp_path / "store")
+
+    # First run sees a bad line and half of a line that is still being written.
+    src.write_text("\n".join(lines[:100]) + "\nnot json\n" + lines[100][:20], encoding="utf-8")
+    assert HistoryStore(store_dir, segment_rows=50).ingest_jsonl(str(src)) == 100
+    src.write_text("\n".join(lines[:100]) + "\nnot json\n" + "\n".join(lines[100:]) + "\n", encoding="utf-8")
+    store = HistoryStore(store_dir, segment_rows=50)
+    assert store.ingest_jsonl(str(src)) == len(lines) - 100
+    assert store.ingest_jsonl(str(src)) == 0
+
+    history = load_jsonl(METRICS)
+    assert store.rows == len(history) and store.bad_lines == 1
+    assert len(store.segments) == -(-len(lines) // 50)
+    assert plan_from_store(store, DRIFT) == build_plan(history, DRIFT)
+    assert plan_from_store(store, {}) == build_plan(history, {})
+
+
+def test_time_index_reads_overlapping_segments_only(tmp_path, monkeypatch):
+    import builtins
+    store = HistoryStore(str(tmp_path), segment_rows=24)
+    store.append(load_jsonl(METRICS))
+    since, until = "2025-08-10", "2025-08-11"
+
+    opened = []
+    real_open = builtins.open
+    monkeypatch.setattr(builtins, "open", lambda p, *a, **k: opened.append(p) or real_open(p, *a, **k))
+    got = list(store.read(since, until))
+    monkeypatch.undo()
+
+    assert got == [r for r in load_jsonl(METRICS) if since <= r["ts"] < until]
+    assert 0 < len(opened) <= 2 < len(store.segments)
+
+
+def test_compaction_and_crash_recovery(tmp_path):
+    store = HistoryStore(str(tmp_path), segment_rows=24)
+    history = load_jsonl(METRICS)
+    store.append(history)
+    plan = plan_from_store(store, DRIFT)
+
+    removed = store.compact("2025-08-14", resolution="day")
+    assert removed > 0
+    # 24-row segments of hourly points end at 21:32, so days up to 08-13 are compacted.
+    rows = list(store.read())
+    daily, raw = [r for r in rows if "n" in r], [r for r in rows if "n" not in r]
+    old = [r for r in history if r["ts"] < "2025-08-13T22"]
+    assert [r["ts"] for r in daily] == sorted({r["ts"][:10] for r in old})
+    assert sum(r["n"] for r in daily) == len(old) and removed == len(old) - len(daily)
+    assert raw == history[len(old):]
+
+    # Bytes written after the last checkpoint are discarded on reopen.
+    last = tmp_path / store.segments[-1]["name"]
+    with open(last, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": "2099-01-01", "roc_auc": 0.1}) + "\n")
+    reopened = HistoryStore(str(tmp_path))
+    assert plan_from_store(reopened, DRIFT) == plan
+    assert reopened.stats()["stored_rows"] == len(history) - removed
+    assert not any(r["ts"].startswith("2099") for r in reopened.read(since="2025-08-17"))
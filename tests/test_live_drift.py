@@ -0,0 +1,59 @@
+# Live drift: window counters reproduce offline PSI and expire old buckets.
+
+import pandas as pd
+import pytest
+
+from src.drift import DriftAccumulator, ReferenceProfile
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS
+from src.live_drift import LiveDriftMonitor
+
+REF = "data/churn_ref_sample.csv"
+NEW = "data/churn_shifted_sample.csv"
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_live_psi_matches_offline_and_window_expires():
+    profile = ReferenceProfile.from_frame(pd.read_csv(REF))
+    new = pd.read_csv(NEW)
+    clock = FakeClock()
+    mon = LiveDriftMonitor(profile, window_s=300, bucket_s=60, clock=clock)
+
+    half = len(new) // 2
+    mon.record_columns({c: new[c].to_numpy()[:half] for c in CATEGORICAL_COLS + NUMERIC_COLS}, [0.1] * half)
+    clock.t += 120
+    mon.record_rows(new.iloc[half:].to_dict("records"), [0.9] * (len(new) - half))
+
+    live = mon.report()
+    offline = DriftAccumulator(profile).update(new).report()
+    assert live["rows"] == len(new)
+    assert live["features"] == offline["features"]
+    assert live["overall_drift"] == offline["overall_drift"]
+    assert sum(live["prediction"]["counts"]) == len(new)
+
+    clock.t += 250  # first bucket leaves the 300s window
+    assert mon.report()["rows"] == len(new) - half
+    clock.t += 600
+    assert mon.report()["rows"] == 0
+
+
+def test_drift_endpoint_tracks_served_rows(artifacts_dir, load_app, sample_rows):
+    from fastapi.testclient import TestClient
+
+    app = load_app(ARTIFACTS_DIR=artifacts_dir, LIVE_DRIFT_WINDOW_S=3600)
+    client = TestClient(app.app)
+    assert client.get("/drift").json()["rows"] == 0
+    client.post("/predict", json={"rows": sample_rows})
+    body = client.get("/drift").json()
+    assert body["rows"] == len(sample_rows)
+    assert body["model_version"] == app._active.version
+    assert body["prediction"]["psi"] is not None
+
+    off = load_app(ARTIFACTS_DIR=artifacts_dir, LIVE_DRIFT_WINDOW_S=0)
+    assert TestClient(off.app).get("/drift").status_code == 404
@@ -0,0 +1,51 @@
+# Sort-once evaluation engine against sklearn: point metrics, bootstrap
+# replicates and segments.
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, average_precision_score, roc_auc_score
+
+from src.metrics import SortedScores, bootstrap_ci, evaluate
+
+
+def _sk(y, p):
+    return {"roc_auc": roc_auc_score(y, p), "pr_auc": average_precision_score(y, p),
+            "accuracy": accuracy_score(y, p >= 0.5)}
+
+
+def test_point_metrics_sweep_and_segments_match_sklearn():
+    rng = np.random.default_rng(0)
+    n = 3000
+    y = (rng.random(n) < 0.3).astype(int)
+    p = np.round(np.clip(rng.random(n) * 0.7 + 0.25 * y, 0, 1), 2)  # many ties
+    seg = pd.DataFrame({"plan_type": rng.choice(["Basic", "Standard", "Pro"], n),
+                        "contract_type": rng.choice(["Monthly", "Annual"], n)})
+    m = evaluate(y, p, segments=seg, n_boot=0)
+    for k, v in _sk(y, p).items():
+        assert abs(m[k] - v) < 1e-12
+    at_half = next(r for r in m["threshold_sweep"] if r["threshold"] == 0.5)
+    assert abs(at_half["accuracy"] - m["accuracy"]) < 1e-6
+    assert abs(at_half["recall"] - y[p >= 0.5].sum() / y.sum()) < 1e-6
+    for col in seg:
+        for v, got in m["segments"][col].items():
+            mask = (seg[col] == v).to_numpy()
+            assert got["n"] == mask.sum()
+            for k, want in _sk(y[mask], p[mask]).items():
+                assert abs(got[k] - want) < 1e-12
+
+
+def test_vectorized_bootstrap_matches_per_replicate_loop():
+    rng = np.random.default_rng(1)
+    n, n_boot = 400, 50
+    y = (rng.random(n) < 0.4).astype(int)
+    p = np.round(rng.random(n) * 0.6 + 0.3 * y, 2)
+    s = SortedScores(y, p)
+    got = bootstrap_ci(s, n_boot=n_boot, level=0.9, seed=7)
+
+    # Same index matrix (positions in sorted order), scored one replicate at a time.
+    idx = np.random.default_rng(7).integers(0, n, size=(n_boot, n), dtype=np.int32)
+    reps = [_sk(y[s.order[i]], p[s.order[i]]) for i in idx]
+    for k in ("roc_auc", "pr_auc", "accuracy"):
+        want = np.percentile([r[k] for r in reps], [5, 95])
+        assert np.allclose(got[k], want, atol=1e-6)
+        assert got[k][0] <= _sk(y, p)[k] <= got[k][1]
@@ -0,0 +1,70 @@
+# Prediction cache: keys, LRU/TTL/memory bounds, scoping to the active model,
+# and partial scoring of mixed batches in the app.
+
+import numpy as np
+
+from src.io_schemas import validate_columns
+from src.prediction_cache import ENTRY_BYTES, PredictionCache, column_keys, row_keys
+
+
+def test_keys_and_bounds(sample_rows):
+    cols, errors = validate_columns({c: [r[c] for r in sample_rows] for c in sample_rows[0]})
+    assert not errors
+    keys = row_keys(sample_rows)
+    assert keys == column_keys(cols) and len(set(keys)) == 2
+    assert row_keys([{**sample_rows[0], "discount_pct": 10}]) == keys[:1]  # int and float agree
+
+    now = [0.0]
+    cache = PredictionCache(3, ttl_s=10, clock=lambda: now[0])
+    cache.activate("v1")
+    cache.put_many("v1", [b"a", b"b", b"c"], np.array([0.1, 0.2, 0.3]))
+    cache.get_many("v1", [b"a"])  # a becomes most recent
+    cache.put_many("v1", [b"d"], np.array([0.4]))
+    prob, miss = cache.get_many("v1", [b"a", b"b", b"d"])
+    assert miss.tolist() == [1] and prob[0] == 0.1 and prob[2] == 0.4
+    assert cache.evictions == 1
+
+    now[0] = 11.0
+    assert cache.get_many("v1", [b"a"])[1].tolist() == [0] and cache.expirations == 1
+
+    # Another scope never reads or writes; activating it drops everything.
+    cache.put_many("old", [b"x"], np.array([0.9]))
+    assert cache.get_many("old", [b"c"])[1].tolist() == [0]
+    cache.activate("v2")
+    assert cache.stats()["entries"] == 0 and cache.invalidations == 2
+    assert PredictionCache(10 ** 6, max_bytes=100 * ENTRY_BYTES).capacity == 100
+
+    vec = PredictionCache(10, width=3)
+    vec.activate("v1")
+    vec.put_many("v1", [b"a", b"b"], np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+    out, miss = vec.get_many("v1", [b"b", b"x", b"a"])
+    assert miss.tolist() == [1] and out[0].tolist() == [4.0, 5.0, 6.0] and out[2].tolist() == [1.0, 2.0, 3.0]
+    assert np.isnan(out[1]).all()
+
+
+def test_app_scores_only_misses_and_clears_on_swap(artifacts_dir, load_app, sample_rows):
+    from fastapi.testclient import TestClient
+
+    app_mod = load_app(ARTIFACTS_DIR=artifacts_dir, PREDICTION_CACHE_SIZE=100)
+    client = TestClient(app_mod.app)
+    h = app_mod._active
+    scored = []
+    transform = h.transform_rows
+    h.transform_rows = lambda rows: scored.append(len(rows)) or transform(rows)
+
+    first = client.post("/predict", json={"rows": sample_rows[:1]}).json()
+    both = client.post("/predict", json={"rows": sample_rows}).json()
+    assert scored == [1, 1]  # the second call scored only the new row
+    assert both["prob"][0] == first["prob"][0]
+    uncached = h.score(transform(sample_rows))
+    assert np.allclose(both["prob"], uncached)
+
+    cols = {c: [r[c] for r in sample_rows] for c in sample_rows[0]}
+    assert client.post("/predict/columnar", json={"columns": cols}).json() == both
+    stats = client.get("/stats").json()["prediction_cache"]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 2, 2)
+    assert "churn_prediction_cache_hits_total 3" in client.get("/metrics").text
+
+    app_mod._swap(app_mod._load_handle(None))
+    assert client.get("/stats").json()["prediction_cache"]["entries"] == 0
+    assert client.post("/predict", json={"rows": sample_rows}).json() == both
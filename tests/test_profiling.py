@@ -0,0 +1,52 @@
+# Opt-in profiling: no-op spans when disabled, nested span self times in the
+# collapsed output, the drift CLI's summary, and sampled API requests.
+
+import json, subprocess, sys
+
+import pytest
+
+from src import profiling
+from src.profiling import Profiler, parse_modes, record, span
+
+
+def test_spans_collapsed_stacks_and_cli_summary(tmp_path):
+    assert span("x") is span("y")  # the shared no-op span: nothing is active
+    assert parse_modes("") == () and parse_modes("1") == ("spans",)
+    assert parse_modes("tracemalloc,cprofile") == profiling.MODES
+    with pytest.raises(ValueError):
+        parse_modes("perf")
+
+    p = Profiler("job", out_dir=str(tmp_path)).start()
+    with span("outer"):
+        with span("inner"):
+            pass
+        record("worker", 0.5, count=3)
+    p.totals[("job", "outer")][0] = 2.0  # pin the times the checks below depend on
+    p.totals[("job", "outer", "inner")][0] = 0.25
+    summary = p.finish()
+    assert not profiling.active() and p.finish() is None
+    assert summary["spans"]["job;outer;worker"] == {"count": 3, "total_s": 0.5, "self_s": 0.5}
+    assert summary["spans"]["job;outer"]["self_s"] == 1.25
+    folded = open(summary["files"][0]).read().splitlines()
+    assert "job;outer 1250000" in folded and "job;outer;inner 250000" in folded
+
+    out = tmp_path / "drift"
+    subprocess.run([sys.executable, "-m", "src.drift", "--ref", "data/churn_ref_sample.csv",
+                    "--new", "data/churn_shifted_sample.csv", "--outdir", str(out), "--chunksize", "500",
+                    "--profile", "--profile-dir", str(tmp_path)], check=True, capture_output=True)
+    spans = json.loads((out / "drift_report.json").read_text())["profile"]["spans"]
+    assert spans["drift;new_data;histogram"]["count"] == spans["drift;new_data;read_csv"]["count"] - 1
+
+
+def test_app_profiles_one_in_n_requests(artifacts_dir, load_app, sample_rows, tmp_path):
+    from fastapi.testclient import TestClient
+
+    assert TestClient(load_app(ARTIFACTS_DIR=artifacts_dir).app).get("/admin/profile").status_code == 404
+    client = TestClient(load_app(ARTIFACTS_DIR=artifacts_dir, PROFILE="1", PROFILE_SAMPLE_N=2,
+                                 PROFILE_DIR=str(tmp_path)).app)
+    for _ in range(4):
+        assert client.post("/predict", json={"rows": sample_rows}).status_code == 200
+    spans = client.get("/admin/profile", params={"format": "json"}).json()["spans"]
+    assert spans["POST /predict"]["count"] == 2
+    assert spans["POST /predict;predict"]["count"] == spans["POST /predict;transform"]["count"] == 2
+    assert "POST /predict;transform " in client.get("/admin/profile").text
@@ -0,0 +1,64 @@
+# Versioned artifacts: the app follows LATEST, rejects broken versions and honours pins.
+
+import os
+import shutil
+import pytest
+from fastapi.testclient import TestClient
+
+from src import registry
+
+
+@pytest.fixture
+def art(artifacts_dir, tmp_path):
+    # Private copy: these tests publish (and break) versions.
+    dst = tmp_path / "artifacts"
+    shutil.copytree(artifacts_dir, dst)
+    return str(dst)
+
+
+def test_train_publishes_version(art):
+    versions = registry.list_versions(art)
+    assert versions and registry.latest_version(art) == versions[-1]
+    assert os.path.exists(os.path.join(registry.version_dir(art, versions[-1]), "model.pkl"))
+
+
+def test_hot_reload_swap_and_pin(art, load_app, sample_rows):
+    first = registry.latest_version(art)
+    mod = load_app(ARTIFACTS_DIR=art)
+    client = TestClient(mod.app)
+    assert mod._active.version == first
+    in_flight = mod._active
+
+    second = registry.publish_version(art, os.listdir(registry.version_dir(art, first)),
+                                      version=first + "-b")
+    # publish_version copies from the flat dir, which holds the same files.
+    assert mod._check_for_update() == second
+    assert mod._active.version == second
+    # A request that started on the old handle can still finish on it.
+    assert len(in_flight.score(in_flight.transform_rows(sample_rows))) == 2
+    assert client.post("/predict", json={"rows": sample_rows}).status_code == 200
+
+    resp = client.post("/admin/model/pin", json={"version": first})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["active_version"] == first and resp.json()["pinned"] == first
+    # Pinned: newer versions are ignored until unpinned.
+    assert mod._check_for_update() is None
+
+    resp = client.delete("/admin/model/pin")
+    assert resp.json()["pinned"] is None and resp.json()["active_version"] == second
+
+    assert client.post("/admin/model/pin", json={"version": "nope"}).status_code == 404
+
+
+def test_broken_version_is_rejected(art, load_app):
+    good = registry.latest_version(art)
+    mod = load_app(ARTIFACTS_DIR=art)
+
+    bad = registry.publish_version(art, ["feature_pipeline.pkl", "model.pkl"], version=good + "-bad")
+    with open(os.path.join(registry.version_dir(art, bad), "model.pkl"), "wb") as f:
+        f.write(b"not a pickle")
+
+    assert mod._check_for_update() is None
+    assert mod._active.version == good
+    info = TestClient(mod.app).get("/admin/model").json()
+    assert info["latest_version"] == bad and info["last_reload_error"].startswith(bad)
@@ -0,0 +1,92 @@
+# Bulk scoring CLI and NDJSON streaming route agree with /predict.
+
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src.score import score_csv, load_artifacts, score_frame
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+@pytest.mark.parametrize("out_name,workers", [("scores.parquet", 1), ("scores.csv", 2)])
+def test_score_csv_chunked_matches_full_frame(artifacts_dir, tmp_path, out_name, workers):
+    src_csv = tmp_path / "in.csv"
+    pd.read_csv(DATA_PATH, nrows=2500).to_csv(src_csv, index=False)
+    out = tmp_path / out_name
+
+    n = score_csv(str(src_csv), str(out), artifacts_dir, chunksize=1000, workers=workers)
+    assert n == 2500
+
+    got = pd.read_parquet(out) if out_name.endswith(".parquet") else pd.read_csv(out)
+    pre, model, compiled = load_artifacts(artifacts_dir)
+    expected = score_frame(pd.read_csv(src_csv), pre, model, compiled)
+    np.testing.assert_allclose(got["prob"].to_numpy(), expected, rtol=1e-6)
+    assert set(got["cls"].unique()) <= {0, 1}
+
+
+@pytest.mark.parametrize("out_name", ["scores.parquet", "scores.csv"])
+def test_score_csv_header_only_writes_empty_output(artifacts_dir, tmp_path, out_name):
+    src_csv = tmp_path / "in.csv"
+    pd.read_csv(DATA_PATH, nrows=0).to_csv(src_csv, index=False)
+    out = tmp_path / out_name
+
+    assert score_csv(str(src_csv), str(out), artifacts_dir) == 0
+    got = pd.read_parquet(out) if out_name.endswith(".parquet") else pd.read_csv(out)
+    assert len(got) == 0 and list(got.columns) == ["prob", "cls"]
+
+
+def _post_with_timeout(client, timeout_s=60, **kwargs):
+    # A hung streaming route must fail the test, not stall the whole run.
+    result = {}
+    t = threading.Thread(
+        target=lambda: result.setdefault("resp", client.post("/predict/stream", **kwargs)),
+        daemon=True,
+    )
+    t.start()
+    t.join(timeout_s)
+    assert not t.is_alive(), "/predict/stream did not respond in time"
+    return result["resp"]
+
+
+def test_predict_stream_ndjson(artifacts_dir, load_app, sample_rows):
+    mod = load_app(ARTIFACTS_DIR=artifacts_dir, STREAM_CHUNK_ROWS=2)
+    client = TestClient(mod.app)
+
+    bad = dict(sample_rows[0], plan_type="Gold")
+    lines = [sample_rows[0], bad, sample_rows[1]]
+    body = "\n".join(json.dumps(r) for r in lines) + "\n"
+    resp = _post_with_timeout(client, content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200, resp.text
+
+    out = [json.loads(l) for l in resp.text.splitlines() if l]
+    assert len(out) == 3
+    assert out[1]["line"] == 2 and out[1]["error"][0]["loc"] == ["plan_type"]
+
+    ref = client.post("/predict", json={"rows": sample_rows}).json()
+    assert [out[0]["prob"], out[2]["prob"]] == pytest.approx(ref["prob"])
+    assert [out[0]["cls"], out[2]["cls"]] == ref["cls"]
+
+
+def test_predict_stream_chunked_upload(artifacts_dir, load_app, sample_rows):
+    mod = load_app(ARTIFACTS_DIR=artifacts_dir, STREAM_CHUNK_ROWS=64)
+    client = TestClient(mod.app)
+
+    n = 1000
+    payload = "".join(json.dumps(sample_rows[i % 2]) + "\n" for i in range(n)).encode()
+
+    def body():
+        # Uneven pieces so lines straddle chunk boundaries (Transfer-Encoding: chunked).
+        for i in range(0, len(payload), 777):
+            yield payload[i:i + 777]
+
+    resp = _post_with_timeout(client, content=body(), headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200, resp.text
+    out = [json.loads(l) for l in resp.text.splitlines() if l]
+    assert len(out) == n
+    ref = client.post("/predict", json={"rows": sample_rows}).json()["prob"]
+    assert [o["prob"] for o in out[:4]] == pytest.approx(ref * 2)
@@ -0,0 +1,62 @@
+# Pre-fork server: shared listening socket, per-worker stats, rolling restart.
+
+import os, signal, socket, subprocess, sys, time
+
+import httpx
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert proc.poll() is None, "server exited"
+        try:
+            workers = httpx.get(url + "/workers", timeout=2).json()["workers"]
+            if len(workers) == 2:
+                return workers
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
+        time.sleep(0.3)
+    raise AssertionError("server did not start")
+
+
+def test_prefork_workers_share_socket_and_restart(artifacts_dir, sample_rows):
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "ARTIFACTS_DIR": artifacts_dir, "BATCH_WINDOW_MS": "2"}
+    proc = subprocess.Popen([sys.executable, "-m", "src.serve", "--port", str(port), "--workers", "2",
+                             "--log-level", "warning"], env=env)
+    try:
+        before = _wait_ready(url, proc)
+        assert len({w["pid"] for w in before}) == 2 and proc.pid not in {w["pid"] for w in before}
+
+        # New connections per request, so the kernel spreads them over workers.
+        for _ in range(20):
+            r = httpx.post(url + "/predict", json={"rows": sample_rows})
+            assert r.status_code == 200 and len(r.json()["prob"]) == 2
+        report = httpx.get(url + "/workers").json()
+        assert report["total"]["requests"] >= 20 and report["total"]["errors"] == 0
+        if sys.platform.startswith("linux"):
+            assert all(w["pss_mb"] > 0 and w["shared_mb"] > 0 for w in report["workers"])
+
+        os.kill(proc.pid, signal.SIGHUP)  # rolling restart: same slots, new processes
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                after = httpx.get(url + "/workers", timeout=2).json()["workers"]
+                if len(after) == 2 and not {w["pid"] for w in after} & {w["pid"] for w in before}:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.3)
+        else:
+            raise AssertionError("workers were not replaced")
+        assert httpx.post(url + "/predict", json={"rows": sample_rows}).status_code == 200
+    finally:
+        proc.terminate()
+        assert proc.wait(timeout=60) == 0
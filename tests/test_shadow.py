@@ -0,0 +1,70 @@
+# Shadow scoring: challenger probabilities logged next to the primary's, the
+# shared-matrix and re-encoding paths, and dropping (not waiting) when full.
+
+import json, threading, time
+
+import numpy as np
+
+from src.shadow import ShadowScorer, summarize
+
+
+def test_app_logs_primary_and_challenger(artifacts_dir, load_app, sample_rows, tmp_path):
+    from fastapi.testclient import TestClient
+
+    log_path = tmp_path / "shadow.jsonl"
+    cols = {c: [r[c] for r in sample_rows] for c in sample_rows[0]}
+    # Same artifacts as challenger: identical probabilities on both paths.
+    for env in ({}, {"PREDICTION_CACHE_SIZE": 100}):
+        mod = load_app(ARTIFACTS_DIR=artifacts_dir, SHADOW_ARTIFACTS_DIR=artifacts_dir,
+                       SHADOW_LOG_PATH=log_path, **env)
+        client = TestClient(mod.app)
+        prob = client.post("/predict", json={"rows": sample_rows}).json()["prob"]
+        assert client.post("/predict/columnar", json={"columns": cols}).json()["prob"] == prob
+        assert mod._shadow.flush()
+        s = client.get("/stats").json()["shadow"]
+        assert s["scored"] == 2 and s["scored_rows"] == 4 and s["dropped"] == 0
+        assert "churn_shadow_scored_total 2" in client.get("/metrics").text
+        mod._shadow.close()
+        mod._shadow = None
+
+    recs = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(recs) == 4
+    for r in recs:
+        assert np.allclose(r["primary"], prob, atol=1e-6) and np.allclose(r["challenger"], r["primary"], atol=1e-6)
+    pair = summarize(str(log_path))["pairs"][0]
+    assert pair["rows"] == 8 and pair["class_agreement"] == 1.0 and pair["max_abs_diff"] < 1e-6
+
+
+class _SlowChallenger:
+    version, compiled, cache_scope = "slow", None, None
+
+    def __init__(self, release):
+        self.release = release
+
+    def transform_rows(self, rows):
+        return np.zeros((len(rows), 1))
+
+    def score(self, X):
+        self.release.wait(10)
+        return np.full(len(X), 0.5)
+
+    def after_fork(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_full_queue_drops_without_blocking(sample_rows, tmp_path):
+    release = threading.Event()
+    shadow = ShadowScorer(_SlowChallenger(release), str(tmp_path / "s.jsonl"), max_queue=4).start()
+    primary = _SlowChallenger(release)
+    t0 = time.perf_counter()
+    queued = [shadow.submit(primary, np.array([0.1, 0.2]), rows=sample_rows) for _ in range(50)]
+    assert time.perf_counter() - t0 < 0.5  # never waits on the stuck challenger
+    s = shadow.stats()
+    assert s["submitted"] == 50 and s["dropped"] == 50 - sum(queued) and s["dropped"] >= 40
+    release.set()
+    assert shadow.flush()
+    assert shadow.stats()["scored"] == sum(queued)
+    shadow.close()
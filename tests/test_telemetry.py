@@ -0,0 +1,60 @@
+# In-process latency telemetry: histogram accuracy, per-thread shards, /metrics
+# and the metrics_history.jsonl records the agent monitor consumes.
+
+import threading
+
+import numpy as np
+
+from src.agent_monitor import build_plan, load_jsonl
+from src.telemetry import LogHistogram, Telemetry
+
+
+def test_histogram_quantiles_and_thread_shards():
+    x = np.random.default_rng(0).lognormal(-6, 1, 20_000)
+    h = LogHistogram()
+    for v in x:
+        h.record(float(v))
+    for q in (0.5, 0.95, 0.99):
+        assert abs(h.quantile(q) / np.quantile(x, q) - 1) < 0.01
+
+    tel = Telemetry()
+    parts = np.array_split(x, 4)
+    threads = [threading.Thread(target=lambda p=p: [tel.observe(("stage", "s"), float(v)) for v in p])
+               for p in parts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    merged = tel.snapshot()[0][("stage", "s")]
+    assert merged.count == len(x) and merged.counts == h.counts
+
+    later = merged.copy()
+    later.record(5.0)
+    window = later.minus(merged)
+    assert window.count == 1 and abs(window.quantile(0.5) / 5.0 - 1) < 0.01
+
+
+def test_metrics_endpoint_and_history_records(artifacts_dir, load_app, sample_rows, tmp_path):
+    from fastapi.testclient import TestClient
+
+    path = tmp_path / "metrics_history.jsonl"
+    app = load_app(ARTIFACTS_DIR=artifacts_dir, TELEMETRY_HISTORY_PATH=path, TELEMETRY_HISTORY_SECS=3600)
+    client = TestClient(app.app)
+    for _ in range(5):
+        assert client.post("/predict", json={"rows": sample_rows}).status_code == 200
+    assert client.post("/predict", json={"rows": [{}]}).status_code == 400
+
+    text = client.get("/metrics").text
+    assert 'churn_requests_total{route="/predict",status="200"} 5' in text
+    assert 'churn_requests_total{route="/predict",status="400"} 1' in text
+    assert f'churn_rows_total{{route="/predict"}} {5 * len(sample_rows)}' in text
+    for stage in ("validate", "transform", "predict"):
+        assert f'churn_stage_duration_seconds_count{{stage="{stage}"}} 5' in text
+    assert f'model_version="{app._active.version}"' in text
+
+    rec = app._history_writer.record()
+    assert rec["requests"] == 6 and rec["latency_p50_ms"] <= rec["latency_p95_ms"] <= rec["latency_p99_ms"]
+    assert app._history_writer.record() is None  # idle interval: nothing appended
+    history = load_jsonl(str(path))
+    assert history == [rec]
+    assert {"latency_p95_ms": rec["latency_p95_ms"]} in build_plan(history * 2, {})["findings"]
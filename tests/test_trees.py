@@ -0,0 +1,56 @@
+# NumPy tree evaluator reproduces the library probabilities on the validation split.
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import load
+from sklearn.model_selection import train_test_split
+
+from src.features import CATEGORICAL_COLS, NUMERIC_COLS, TARGET, SEED
+from src.models import build_model
+from src.trees import TreeEnsemble
+
+DATA_PATH = "data/customer_churn_synth.csv"
+
+
+@pytest.fixture(scope="module")
+def split(artifacts_dir):
+    # Same split as src/train.py.
+    df = pd.read_csv(DATA_PATH)
+    X, y = df[CATEGORICAL_COLS + NUMERIC_COLS], df[TARGET].astype(int)
+    X_tr, X_val, y_tr, _ = train_test_split(X, y, test_size=0.2, random_state=SEED, stratify=y)
+    pre = load(os.path.join(artifacts_dir, "feature_pipeline.pkl"))
+    return pre.transform(X_tr), y_tr, pre.transform(X_val)
+
+
+def _with_missing(X):
+    X = X.copy()
+    X[::7, -3] = np.nan
+    return X
+
+
+def test_native_matches_trained_model(artifacts_dir, split):
+    _, _, X_val = split
+    model = load(os.path.join(artifacts_dir, "model.pkl"))
+    ens = TreeEnsemble.from_model(model)
+    assert ens is not None
+    for X in (X_val, _with_missing(X_val)):
+        np.testing.assert_allclose(ens.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-6)
+
+
+def test_native_matches_hgb(split):
+    X_tr, y_tr, X_val = split
+    model = build_model("hgb").fit(X_tr, y_tr)
+    ens = TreeEnsemble.from_model(model)
+    for X in (X_val, _with_missing(X_val)):
+        np.testing.assert_allclose(ens.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-6)
+
+
+def test_bundle_native_mode_skips_xgboost(artifacts_dir, split):
+    from src.bundle import load_bundle
+    _, _, X_val = split
+    _, model = load_bundle(artifacts_dir, native_trees=True)
+    assert isinstance(model, TreeEnsemble)
+    expected = load(os.path.join(artifacts_dir, "model.pkl")).predict_proba(X_val)[:, 1]
+    np.testing.assert_allclose(model.predict_proba(X_val)[:, 1], expected, atol=1e-6)